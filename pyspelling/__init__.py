@@ -1,17 +1,30 @@
 """Spell check with Aspell or Hunspell."""
 import os
 import importlib
+import shutil
+import tempfile
 from . import util
 from .__meta__ import __version__, __version_info__  # noqa: F401
 from . import flow_control
 from . import filters
+from .walk import DirectoryIndex
+from .detection import EncodingCache
 from wcmatch import glob
 import codecs
-from collections import namedtuple
-from concurrent.futures import ProcessPoolExecutor
+from collections import namedtuple, Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 __all__ = ("spellcheck",)
 
+LANGUAGE_RESULTS = ('intersection', 'each')
+BINARY_FILES = ('check', 'skip', 'report')
+
+# Recorded in place of the pipeline output of streamed files, which is never held in memory to be shared.
+STREAMED = 'streamed'
+
+# Thread pools that check languages in worker processes, kept for the life of the worker.
+WORKER_LANGUAGE_POOLS = {}
+
 STEP_ERROR = """Pipeline step in unexpected format: {}
 
 Each pipeline step should be in the form {{key: options: {{}}}} not {{key: {{}}, key2: {{}}}}
@@ -25,13 +38,25 @@ def log(text, level, verbose=0):
         print(text)
 
 
-class Results(namedtuple('Results', ['words', 'context', 'category', 'error'])):
+class Results(
+    namedtuple('Results', ['words', 'context', 'category', 'error', 'suggestions', 'language', 'skipped'])
+):
     """Results."""
 
-    def __new__(cls, words, context, category, error=None):
+    def __new__(cls, words, context, category, error=None, suggestions=None, language=None, skipped=None):
         """Allow defaults."""
 
-        return super().__new__(cls, words, context, category, error)
+        return super().__new__(cls, words, context, category, error, suggestions, language, skipped)
+
+    @property
+    def context(self):
+        """Get the rendered context."""
+
+        return filters.render_context(self[1])
+
+
+class Language(namedtuple('Language', ['name', 'options', 'personal_dict'])):
+    """Spell checker options and personal dictionary of a language checked by a task."""
 
 
 class SpellChecker:
@@ -65,13 +90,58 @@ class SpellChecker:
 
         return []
 
+    def setup_suggest_command(self, encoding, options, personal_dict):
+        """Setup the command used to request suggestions."""
+
+        # Both spell checkers accept the same options in their Ispell compatible pipe mode,
+        # so just swap out the list mode argument.
+        cmd = self.setup_command(encoding, options, personal_dict)
+        cmd[1] = '-a'
+        return cmd
+
+    def parse_suggestions(self, output):
+        """Parse the Ispell compatible pipe mode output."""
+
+        suggestions = {}
+        for line in output.replace('\r', '').split('\n'):
+            if line.startswith('&'):
+                # `& original count offset: suggestion, suggestion`
+                head, tail = line.split(': ', 1)
+                suggestions[head.split(' ')[1]] = [s for s in tail.split(', ') if s]
+            elif line.startswith('#'):
+                # `# original offset`: no suggestions found
+                suggestions[line.split(' ')[1]] = []
+        return suggestions
+
+    def suggest(self, words, options, personal_dict):
+        """Get suggestions for the given misspelled words."""
+
+        if not words:
+            return {}
+
+        cmd = self.setup_suggest_command('utf-8', options, personal_dict)
+        self.log("Command: " + str(cmd), 4)
+
+        # Prefix each line with `^` so words are never interpreted as pipe mode commands.
+        text = ''.join(f'^{word}\n' for word in words).encode('utf-8')
+        suggestions = self.parse_suggestions(util.call(cmd, input_text=text, encoding='utf-8'))
+        return {word: suggestions.get(word, []) for word in words}
+
+    def _accepts_source(self, source, filter_index):
+        """Check if the pipeline step takes the source, binary content only goes to filters that accept it."""
+
+        if not source._is_bytes():
+            return True
+        f = self.pipeline_steps[filter_index]
+        return isinstance(f, flow_control.FlowControl) or f.ACCEPTS_BINARY
+
     def _pipeline_step(self, sources, options, personal_dict, filter_index=1, flow_status=flow_control.ALLOW):
         """Recursively run text objects through the pipeline steps."""
 
         for source in sources:
             if source._has_error():
                 yield source
-            elif not source._is_bytes() and filter_index < len(self.pipeline_steps):
+            elif filter_index < len(self.pipeline_steps) and self._accepts_source(source, filter_index):
                 f = self.pipeline_steps[filter_index]
                 if isinstance(f, flow_control.FlowControl):
                     err = ''
@@ -79,7 +149,7 @@ class SpellChecker:
                         status = f._run(source.category)
                     except Exception as e:
                         err = self.get_error(e)
-                        yield filters.SourceText('', source.context, '', '', err)
+                        yield filters.SourceText('', source.lazy_context, '', '', err)
                     if not err:
                         if filter_index < len(self.pipeline_steps):
                             yield from self._pipeline_step(
@@ -92,7 +162,7 @@ class SpellChecker:
                             srcs = f._run(source)
                         except Exception as e:
                             err = self.get_error(e)
-                            yield filters.SourceText('', source.context, '', '', err)
+                            yield filters.SourceText('', source.lazy_context, '', '', err)
                         if not err:
                             yield from self._pipeline_step(
                                 srcs, options, personal_dict, filter_index + 1
@@ -108,13 +178,64 @@ class SpellChecker:
                 # Binary content
                 yield source
 
-    def _spelling_pipeline(self, sources, options, personal_dict):
+    def _check_languages(self, text, encoding, source, languages, language_results, pool):
+        """Check the text against multiple languages, one spell checker session per language in the thread pool."""
+
+        def check(language):
+            """Check the text against a single language."""
+
+            cmd = self.setup_command(encoding, dict(language.options), language.personal_dict)
+            self.log("Command: " + str(cmd), 4)
+            wordlist = util.call_spellchecker(cmd, input_text=text, encoding=encoding)
+            return {w for w in wordlist.replace('\r', '').split('\n') if w}
+
+        wordlists = list(pool.map(check, languages))
+
+        if language_results == 'each':
+            for language, words in zip(languages, wordlists):
+                yield Results(sorted(words), source.lazy_context, source.category, language=language.name)
+        else:
+            # Only words that are unknown in every language are misspelled.
+            yield Results(sorted(set.intersection(*wordlists)), source.lazy_context, source.category)
+
+    def _spelling_pipeline(
+        self, sources, options, personal_dict, languages=None, language_results='intersection', pool=None
+    ):
         """Check spelling pipeline."""
 
-        for source in self._pipeline_step(sources, options, personal_dict):
+        yield from self._spell_check_sources(
+            self._pipeline_step(sources, options, personal_dict),
+            options,
+            personal_dict,
+            languages,
+            language_results,
+            pool
+        )
+
+    def _spell_check_sources(
+        self, sources, options, personal_dict, languages=None, language_results='intersection', pool=None
+    ):
+        """
+        Spell check text objects that have been through the pipeline.
+
+        Multiple languages are checked in `pool`, which should be shared by all the sources of a task.
+        If no pool is given, one is created for the sources.
+        """
+
+        if languages and pool is None:
+            with ThreadPoolExecutor(max_workers=len(languages)) as pool:
+                yield from self._spell_check_sources(
+                    sources, options, personal_dict, languages, language_results, pool
+                )
+            return
+
+        for source in sources:
+            if isinstance(source.text, memoryview):
+                # Views of binary content are only copied here, as the spell checker is given bytes.
+                source = source._replace(text=source.text.tobytes())
             # Don't waste time on empty strings
             if source._has_error():
-                yield Results([], source.context, source.category, source.error)
+                yield Results([], source.lazy_context, source.category, source.error)
             elif not source.text or source.text.isspace():
                 continue
             else:
@@ -129,6 +250,15 @@ class SpellChecker:
                     text = source.text.encode(encoding)
                 self.log('', 3)
                 self.log(text, 3)
+
+                if languages:
+                    try:
+                        yield from self._check_languages(text, encoding, source, languages, language_results, pool)
+                    except Exception as e:  # pragma: no cover
+                        err = self.get_error(e)
+                        yield Results([], source.lazy_context, source.category, err)
+                    continue
+
                 cmd = self.setup_command(encoding, options, personal_dict)
                 self.log("Command: " + str(cmd), 4)
 
@@ -136,12 +266,12 @@ class SpellChecker:
                     wordlist = util.call_spellchecker(cmd, input_text=text, encoding=encoding)
                     yield Results(
                         [w for w in sorted(set(wordlist.replace('\r', '').split('\n'))) if w],
-                        source.context,
+                        source.lazy_context,
                         source.category
                     )
                 except Exception as e:  # pragma: no cover
                     err = self.get_error(e)
-                    yield Results([], source.context, source.category, err)
+                    yield Results([], source.lazy_context, source.category, err)
 
     def spell_check_no_pipeline(self, sources, options, personal_dict):
         """Spell check without the pipeline."""
@@ -220,12 +350,24 @@ class SpellChecker:
             raise ValueError("Could not find the 'get_plugin' function in module '%s'!" % module)
         return attr()
 
+    def _guard_source(self, sources, f):
+        """Yield streamed sources, reporting an error if one occurs."""
+
+        try:
+            yield from sources
+        except Exception as e:
+            err = self.get_error(e)
+            yield filters.SourceText('', f, '', '', err)
+
     def get_source(self, f):
         """Get the source."""
 
         if self.pipeline_steps:
             try:
                 source = self.pipeline_steps[0]._run_first(f)
+                if not isinstance(source, list):
+                    # Very large files are streamed, so errors can surface while iterating.
+                    source = self._guard_source(source, f)
             except Exception as e:
                 err = self.get_error(e)
                 source = [filters.SourceText('', f, '', '', err)]
@@ -521,6 +663,101 @@ class Hunspell(SpellChecker):
         return cmd
 
 
+class SharedPipelines:
+    """Pipeline output shared between tasks with the same sources and pipeline."""
+
+    def __init__(self, keys):
+        """Initialize with the pipeline keys of all the tasks that will be run."""
+
+        self.pending = Counter(key for key in keys if key is not None)
+        self.cache = {}
+
+    def get(self, key):
+        """Get the recorded pipeline output for the given key, if there is any."""
+
+        return self.cache.get(key)
+
+    def is_wanted(self, key):
+        """Check whether tasks other than the current one still need the pipeline output."""
+
+        return self.pending[key] > 1
+
+    def done(self, key, record):
+        """Mark a task as done, storing its pipeline output or releasing it once no task needs it."""
+
+        self.pending[key] -= 1
+        if self.pending[key] <= 0:
+            self.cache.pop(key, None)
+        elif record is not None:
+            self.cache[key] = record
+
+
+class Suggestions:
+    """
+    Misspelled words of a run that need suggestions.
+
+    Results are held until all tasks are done, so suggestions are looked up only once for the unique words
+    of each dictionary. Personal dictionaries are copied when they are first seen, as a later task may compile
+    a different dictionary to the same file.
+    """
+
+    def __init__(self):
+        """Initialize."""
+
+        self.lookups = {}
+        self.results = []
+        self.tempdir = None
+
+    def keep_dictionary(self, language):
+        """Keep a copy of the personal dictionary of a language as it is now."""
+
+        if not language.personal_dict or not os.path.exists(language.personal_dict):
+            return language
+        if self.tempdir is None:
+            self.tempdir = tempfile.mkdtemp(prefix='pyspelling-')
+        copy = os.path.join(self.tempdir, str(len(self.lookups)), os.path.basename(language.personal_dict))
+        os.makedirs(os.path.dirname(copy))
+        shutil.copyfile(language.personal_dict, copy)
+        return language._replace(personal_dict=copy)
+
+    def add(self, spelltask, results):
+        """Add the results of a task, collecting the misspelled words of each dictionary."""
+
+        for result in results:
+            fingerprints = []
+            if result.words:
+                for language in spelltask.get_result_languages(result):
+                    fingerprint = spelltask.get_fingerprint(language)
+                    if fingerprint not in self.lookups:
+                        self.lookups[fingerprint] = (spelltask, self.keep_dictionary(language), set())
+                    self.lookups[fingerprint][2].update(result.words)
+                    fingerprints.append(fingerprint)
+            self.results.append((result, fingerprints))
+
+    def resolve(self):
+        """Look up the suggestions and yield the results with their suggestions attached."""
+
+        found = {
+            fingerprint: spelltask.get_suggestions(sorted(words), language)
+            for fingerprint, (spelltask, language, words) in self.lookups.items()
+        }
+        for result, fingerprints in self.results:
+            if fingerprints:
+                suggestions = {w: [] for w in result.words}
+                for fingerprint in fingerprints:
+                    for w in result.words:
+                        suggestions[w].extend(s for s in found[fingerprint].get(w, []) if s not in suggestions[w])
+                result = result._replace(suggestions=suggestions)
+            yield result
+
+    def close(self):
+        """Remove the copied personal dictionaries."""
+
+        if self.tempdir is not None:
+            shutil.rmtree(self.tempdir, ignore_errors=True)
+            self.tempdir = None
+
+
 def iter_tasks(matrix, names, groups):
     """Iterate tasks."""
 
@@ -595,6 +832,41 @@ class SpellingTask:
         self.debug = debug
         self.jobs = jobs
         self.skip_dict_compile = skip_dict_compile
+        self.encoding_cache = None
+        self.language_pool = None
+        self.in_worker = False
+
+    def __getstate__(self):
+        """Get the state to send to worker processes, which use their own thread pool."""
+
+        state = self.__dict__.copy()
+        state['language_pool'] = None
+        state['in_worker'] = True
+        return state
+
+    def get_language_pool(self):
+        """
+        Get the thread pool that checks the languages of the task.
+
+        The pool is created once per task, and worker processes keep one for as long as they live.
+        """
+
+        if self.language_pool is None:
+            size = len(self.languages)
+            if self.in_worker:
+                if size not in WORKER_LANGUAGE_POOLS:
+                    WORKER_LANGUAGE_POOLS[size] = ThreadPoolExecutor(max_workers=size)
+                self.language_pool = WORKER_LANGUAGE_POOLS[size]
+            else:
+                self.language_pool = ThreadPoolExecutor(max_workers=size)
+        return self.language_pool
+
+    def close_language_pool(self):
+        """Shut down the thread pool of the task."""
+
+        if self.language_pool is not None and not self.in_worker:
+            self.language_pool.shutdown()
+        self.language_pool = None
 
     def log(self, text, level):
         """Log level."""
@@ -611,14 +883,15 @@ class SpellingTask:
                 flags |= self.GLOB_FLAG_MAP.get(value, 0)
         return flags
 
-    def walk_src(self, targets, flags, limit):
+    def walk_src(self, targets, flags, limit, index=None):
         """Walk source and parse files."""
 
+        iglob = glob.iglob if index is None else index.iglob
         for target in targets:
             # Glob using `S` for patterns with `|` and `O` to exclude directories.
             kwargs = {"flags": flags | glob.S | glob.O}
             kwargs['limit'] = limit
-            yield from glob.iglob(target, **kwargs)
+            yield from iglob(target, **kwargs)
 
     def get_checker(self):
         """Get a spell checker object."""
@@ -631,10 +904,23 @@ class SpellingTask:
             self.debug
         )
         checker._build_pipeline(self.task)
+        if checker.pipeline_steps:
+            checker.pipeline_steps[0].encoding_cache = self.encoding_cache
         return checker
 
-    def process_file(self, f, checker):
-        """Process a given file."""
+    def process_file(self, f, checker, record=None):
+        """
+        Process a given file.
+
+        If `record` is a list, the pipeline output for the file is appended to it
+        so that it can be shared with other tasks.
+        """
+
+        if self.is_skipped_binary(f, checker):
+            if record is not None:
+                record.append((f, None))
+            yield from self.skip_binary(f)
+            return
 
         self.log('', 2)
         self.log('> Processing: %s' % f, 1)
@@ -642,16 +928,241 @@ class SpellingTask:
         source = checker.get_source(f)
 
         if checker.pipeline_steps is not None:
-            yield from checker._spelling_pipeline(source, self.options, self.personal_dict)
+            sources = checker._pipeline_step(source, self.options, self.personal_dict)
+            if record is not None:
+                if isinstance(source, list):
+                    sources = list(sources)
+                    record.append((f, sources))
+                else:
+                    record.append((f, STREAMED))
+            yield from self.check_sources(sources, checker)
+        elif len(self.languages) > 1:
+            yield from self.check_languages_no_pipeline(source, checker)
         else:
             yield from checker.spell_check_no_pipeline(source, self.options, self.personal_dict)
 
+    def is_skipped_binary(self, f, checker):
+        """
+        Check if the file is a binary file that should be skipped.
+
+        Filters that read binary files, like ODF and OOXML, opt out of the check via `SKIP_BINARY`.
+        """
+
+        if self.binary_files == 'check':
+            return False
+        if checker.pipeline_steps and not checker.pipeline_steps[0].SKIP_BINARY:
+            return False
+        try:
+            return util.is_binary_file(f)
+        except OSError:
+            # Let the pipeline report the error.
+            return False
+
+    def skip_binary(self, f):
+        """Skip a binary file, reporting it if requested."""
+
+        self.log('', 2)
+        self.log('> Skipping binary file: %s' % f, 1)
+        if self.binary_files == 'report':
+            yield Results([], f, 'binary', skipped='binary file')
+
+    def check_sources(self, sources, checker):
+        """Spell check the pipeline output of a file."""
+
+        if len(self.languages) > 1:
+            yield from checker._spell_check_sources(
+                sources,
+                self.options,
+                self.personal_dict,
+                self.languages,
+                self.language_results,
+                self.get_language_pool()
+            )
+        else:
+            yield from checker._spell_check_sources(sources, self.options, self.personal_dict)
+
+    def check_shared(self, f, sources, checker):
+        """Spell check pipeline output shared by another task."""
+
+        if sources is None:
+            yield from self.skip_binary(f)
+            return
+        if sources == STREAMED:
+            yield from self.process_file(f, checker)
+            return
+
+        self.log('', 2)
+        self.log('> Processing: %s (shared)' % f, 1)
+        yield from self.check_sources(sources, checker)
+
+    def check_languages_no_pipeline(self, source, checker):
+        """Check the file against multiple languages without the pipeline."""
+
+        # Each language returns exactly one result per source, so the results can be lined up.
+        per_language = [
+            list(checker.spell_check_no_pipeline(source, language.options, language.personal_dict))
+            for language in self.languages
+        ]
+        for results in zip(*per_language):
+            error = next((r.error for r in results if r.error), None)
+            if error is not None:
+                yield results[0]._replace(words=[], error=error)
+            elif self.language_results == 'each':
+                for language, r in zip(self.languages, results):
+                    yield r._replace(language=language.name)
+            else:
+                yield results[0]._replace(words=sorted(set.intersection(*[set(r.words) for r in results])))
+
+    def get_fingerprint(self, language):
+        """Get a fingerprint that identifies the dictionary setup of a language."""
+
+        mtime = os.path.getmtime(language.personal_dict) if language.personal_dict else None
+        return (
+            self.spellchecker.__name__,
+            self.binary,
+            repr(sorted(language.options.items())),
+            language.personal_dict,
+            mtime
+        )
+
+    def get_result_languages(self, result):
+        """Get the languages a result was checked against, results without a language apply to all of them."""
+
+        return [lang for lang in self.languages if result.language is None or lang.name == result.language]
+
+    def get_suggestions(self, words, language):
+        """Get suggestions for the given words from the dictionary of a language."""
+
+        self.log('Generating suggestions for %d word(s)...' % len(words), 1)
+        checker = self.spellchecker(self.config, self.binary, self.verbose, self.default_encoding, self.debug)
+        return checker.suggest(words, language.options, language.personal_dict)
+
+    def setup_personal_dict(self, task):
+        """Compile the personal dictionary of a task (or task language) if needed."""
+
+        if not self.skip_dict_compile:
+            return self.spellchecker.setup_dictionary(task, self.binary, self.verbose)
+
+        dictionary_options = task.get('dictionary', {})
+        output = os.path.abspath(dictionary_options.get('output', os.path.abspath(self.spellchecker.DICTIONARY)))
+        if os.path.exists(output):
+            return output
+        return self.spellchecker.setup_dictionary(task, self.binary, self.verbose)
+
+    def setup_languages(self, task):
+        """
+        Setup the languages to check.
+
+        Each entry under `languages` is layered on top of the task's own spell checker
+        and dictionary options. Tasks without `languages` check a single language.
+        """
+
+        languages = []
+        for index, entry in enumerate(task.get('languages', [])):
+            lang_task = dict(task)
+            for key in ('aspell', 'hunspell', 'dictionary'):
+                lang_task[key] = dict(task.get(key, {}), **entry.get(key, {}))
+            options = self.spellchecker.get_options(lang_task)
+            name = str(entry.get('name', options.get('d', options.get('lang', options.get('l', index)))))
+            if 'output' not in entry.get('dictionary', {}):
+                # Give each language its own compiled dictionary so they don't overwrite each other.
+                base, ext = os.path.splitext(lang_task['dictionary'].get('output', self.spellchecker.DICTIONARY))
+                lang_task['dictionary']['output'] = '{}-{}{}'.format(base, name, ext)
+            languages.append(Language(name, options, self.setup_personal_dict(lang_task)))
+
+        if not languages:
+            languages.append(Language(None, self.spellchecker.get_options(task), self.setup_personal_dict(task)))
+        return languages
+
     def multi_check(self, f):
         """Check the file for spelling errors (for multi-processing)."""
 
-        return list(self.process_file(f, self.get_checker()))
+        record = [] if self.share_pipeline else None
+        results = list(self.process_file(f, self.get_checker(), record))
+        return results, record, self.encoding_cache.take() if self.encoding_cache is not None else []
+
+    def multi_check_chunk(self, chunk):
+        """Check a chunk of a split file for spelling errors (for multi-processing)."""
+
+        f, source = chunk
+        checker = self.get_checker()
+        sources = checker._pipeline_step([source], self.options, self.personal_dict)
+        # Chunks are streamed, so other tasks run the pipeline over the file themselves.
+        record = [(f, STREAMED)] if self.share_pipeline else None
+        # The first filter ran in the main process, so there are no detected encodings to send back.
+        return list(self.check_sources(sources, checker)), record, []
+
+    def multi_check_unit(self, unit):
+        """Check a file or a chunk of a split file for spelling errors (for multi-processing)."""
+
+        return self.multi_check(unit[0]) if unit[1] is None else self.multi_check_chunk(unit)
+
+    def can_split(self, f, checker):
+        """Check if a file can be split into chunks that are spell checked in parallel."""
 
-    def run_task(self, task, source_patterns=None):
+        first = checker.pipeline_steps[0] if checker.pipeline_steps else None
+        return first is not None and first.SPLIT_SAFE and first.is_very_large_file(f)
+
+    def iter_units(self, files, checker):
+        """
+        Get the units of work for the worker pool.
+
+        Most files are a unit of their own, but very large files are split into the chunks
+        that the first filter streams, which are then passed through the rest of the pipeline
+        by the workers. Splitting happens here, so the first filter sees the whole file in order.
+        """
+
+        for f in files:
+            if self.can_split(f, checker) and not self.is_skipped_binary(f, checker):
+                self.log('', 2)
+                self.log('> Splitting: %s' % f, 1)
+                for source in checker.get_source(f):
+                    yield f, source
+            else:
+                yield f, None
+
+    @staticmethod
+    def map_units(pool, fn, units, limit):
+        """Map units to the pool in order, with at most `limit` units pending so units are only created as needed."""
+
+        pending = deque()
+        for unit in units:
+            pending.append(pool.submit(fn, unit))
+            if len(pending) >= limit:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def multi_check_shared(self, shared):
+        """Check shared pipeline output for spelling errors (for multi-processing)."""
+
+        return list(self.check_shared(*shared, self.get_checker()))
+
+    @staticmethod
+    def get_pipeline_key(task, source_patterns=None):
+        """
+        Get a key that identifies the files a task will find and how they are filtered.
+
+        Tasks with the same key produce the same pipeline output. Tasks without a pipeline have no key.
+        """
+
+        steps = task.get('pipeline', [])
+        if steps is None:
+            return None
+        if not steps:
+            steps = task.get('filters', [])
+        return repr(
+            (
+                tuple(source_patterns if source_patterns else task.get('sources', [])),
+                task.get('glob_flags', "N|B|G"),
+                task.get('glob_pattern_limit', 1000),
+                task.get('default_encoding', ''),
+                task.get('binary_files', 'check'),
+                steps
+            )
+        )
+
+    def run_task(self, task, source_patterns=None, shared=None, index=None, encodings=None):
         """Walk source and initiate spell check."""
 
         # Perform spell check
@@ -660,16 +1171,16 @@ class SpellingTask:
         # Setup filters and variables for the spell check
         self.task = task
         self.default_encoding = self.task.get('default_encoding', '')
-        self.options = self.spellchecker.get_options(self.task)
-        if not self.skip_dict_compile:
-            self.personal_dict = self.spellchecker.setup_dictionary(self.task, self.binary, self.verbose)
-        else:
-            dictionary_options = self.task.get('dictionary', {})
-            output = os.path.abspath(dictionary_options.get('output', os.path.abspath(self.spellchecker.DICTIONARY)))
-            if os.path.exists(output):
-                self.personal_dict = output
-            else:
-                self.personal_dict = self.spellchecker.setup_dictionary(self.task, self.binary, self.verbose)
+        self.encoding_cache = encodings
+        self.language_results = self.task.get('language_results', 'intersection')
+        if self.language_results not in LANGUAGE_RESULTS:
+            raise ValueError("'%s' is not a valid value for 'language_results'" % self.language_results)
+        self.binary_files = self.task.get('binary_files', 'check')
+        if self.binary_files not in BINARY_FILES:
+            raise ValueError("'%s' is not a valid value for 'binary_files'" % self.binary_files)
+        self.languages = self.setup_languages(self.task)
+        self.options = self.languages[0].options
+        self.personal_dict = self.languages[0].personal_dict
         self.found_match = False
         glob_flags = self._to_flags(self.task.get('glob_flags', "N|B|G"))
         glob_limit = self.task.get('glob_pattern_limit', 1000)
@@ -681,18 +1192,53 @@ class SpellingTask:
         jobs = self.config.get('jobs', 1) if self.jobs is None else self.jobs
 
         expect_match = self.task.get('expect_match', True)
-        if jobs != 1 and jobs > 0:
-            # Use multi-processing to process files concurrently
-            with ProcessPoolExecutor(max_workers=jobs if jobs else None) as pool:
-                for results in pool.map(self.multi_check, self.walk_src(source_patterns, glob_flags, glob_limit)):
+
+        # Reuse the pipeline output of an earlier task with the same sources and pipeline,
+        # or record ours if a later task can use it.
+        key = self.get_pipeline_key(self.task, source_patterns) if shared is not None else None
+        cached = shared.get(key) if key is not None else None
+        self.share_pipeline = cached is None and key is not None and shared.is_wanted(key)
+        record = [] if self.share_pipeline else None
+
+        try:
+            if cached is not None:
+                self.log('Sharing pipeline output of a previous task...', 2)
+                if jobs != 1 and jobs > 0:
+                    with ProcessPoolExecutor(max_workers=jobs if jobs else None) as pool:
+                        for results in pool.map(self.multi_check_shared, cached):
+                            self.found_match = True
+                            yield from results
+                else:
+                    checker = self.get_checker()
+                    for f, sources in cached:
+                        self.found_match = True
+                        yield from self.check_shared(f, sources, checker)
+            elif jobs != 1 and jobs > 0:
+                # Use multi-processing to process files concurrently
+                with ProcessPoolExecutor(max_workers=jobs if jobs else None) as pool:
+                    files = self.walk_src(source_patterns, glob_flags, glob_limit, index)
+                    units = self.iter_units(files, self.get_checker())
+                    for results, recorded, detected in self.map_units(pool, self.multi_check_unit, units, jobs * 2):
+                        self.found_match = True
+                        if record is not None:
+                            for entry in recorded:
+                                # Split files are recorded once, not once per chunk.
+                                if entry[1] != STREAMED or not record or record[-1] != entry:
+                                    record.append(entry)
+                        if detected:
+                            self.encoding_cache.merge(detected)
+                        yield from results
+            else:
+                # Avoid overhead of multiprocessing if we are single threaded
+                checker = self.get_checker()
+                for f in self.walk_src(source_patterns, glob_flags, glob_limit, index):
                     self.found_match = True
-                    yield from results
-        else:
-            # Avoid overhead of multiprocessing if we are single threaded
-            checker = self.get_checker()
-            for f in self.walk_src(source_patterns, glob_flags, glob_limit):
-                self.found_match = True
-                yield from self.process_file(f, checker)
+                    yield from self.process_file(f, checker, record)
+        finally:
+            self.close_language_pool()
+
+        if key is not None:
+            shared.done(key, record)
 
         if not self.found_match and expect_match:
             raise RuntimeError(
@@ -712,7 +1258,8 @@ def spellcheck(
     verbose=0,
     debug=False,
     jobs=None,
-    skip_dict_compile=False
+    skip_dict_compile=False,
+    suggest=False
 ):
     """Spell check."""
 
@@ -743,26 +1290,55 @@ def spellcheck(
         sources = []
 
     processed_tasks = 0
+    tasks = list(iter_tasks(matrix, names, groups))
+    shared = SharedPipelines(SpellingTask.get_pipeline_key(task, sources) for task in tasks)
+    # All tasks glob against the same directory listings, so the file system is only walked once.
+    index = DirectoryIndex(config.get('directory_cache'))
+    # Encodings detected by a task's first filter are reused by later tasks (and runs) with the same filter.
+    encodings = EncodingCache(config.get('encoding_cache'))
 
-    for task in iter_tasks(matrix, names, groups):
+    # Suggestions are only looked up once all tasks are done, for the unique misspelled words of the run.
+    suggestions = Suggestions() if suggest else None
 
-        processed_tasks += 1
+    try:
+        for task in tasks:
 
-        if not checker:
-            checker = preferred_checker
+            processed_tasks += 1
 
-        log('Using {} to spellcheck {}'.format(checker, task.get('name', '')), 1, verbose)
+            if not checker:
+                checker = preferred_checker
 
-        spelltask = SpellingTask(checker, config, binary, verbose, jobs, debug, skip_dict_compile)
+            log('Using {} to spellcheck {}'.format(checker, task.get('name', '')), 1, verbose)
 
-        for result in spelltask.run_task(task, source_patterns=sources):
-            log('Context: %s' % result.context, 2, verbose)
-            yield result
+            spelltask = SpellingTask(checker, config, binary, verbose, jobs, debug, skip_dict_compile)
 
-        log("", 1, verbose)
+            results = spelltask.run_task(task, source_patterns=sources, shared=shared, index=index, encodings=encodings)
+            if suggestions is not None:
+                suggestions.add(spelltask, results)
+            else:
+                for result in results:
+                    if verbose >= 2:
+                        log('Context: %s' % result.context, 2, verbose)
+                    yield result
+
+            # Persist any new directory listings and encodings
+            # (if `directory_cache` and `encoding_cache` are configured).
+            index.save()
+            encodings.save()
+
+            log("", 1, verbose)
+
+        if processed_tasks == 0:
+            raise ValueError(
+                'There are either no tasks in the configuration file'
+                ' or the specified name or group can not be found.'
+            )
 
-    if processed_tasks == 0:
-        raise ValueError(
-            'There are either no tasks in the configuration file'
-            ' or the specified name or group can not be found.'
-        )
+        if suggestions is not None:
+            for result in suggestions.resolve():
+                if verbose >= 2:
+                    log('Context: %s' % result.context, 2, verbose)
+                yield result
+    finally:
+        if suggestions is not None:
+            suggestions.close()
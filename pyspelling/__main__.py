@@ -41,6 +41,11 @@ def main():
         action='store_true',
         help="Skip dictionary compilation if the compiled file already exists."
     )
+    parser.add_argument(
+        '--suggest',
+        action='store_true',
+        help="Show spelling suggestions for misspelled words."
+    )
     args = parser.parse_args()
 
     return run(
@@ -53,7 +58,8 @@ def main():
         verbose=args.verbose,
         debug=args.debug,
         jobs=args.jobs,
-        skip_dict_compile=args.skip_dict_compile
+        skip_dict_compile=args.skip_dict_compile,
+        suggest=args.suggest
     )
 
 
@@ -71,6 +77,7 @@ def run(config, **kwargs):
     if jobs is not None and jobs < 0:
         jobs = 1
     skip_dict_compile = kwargs.get('skip_dict_compile', False)
+    suggest = kwargs.get('suggest', False)
 
     fail = False
     count = 0
@@ -84,18 +91,25 @@ def run(config, **kwargs):
         verbose=verbose,
         debug=debug,
         jobs=jobs,
-        skip_dict_compile=skip_dict_compile
+        skip_dict_compile=skip_dict_compile,
+        suggest=suggest
     ):
         count += 1
         if results.error:
             fail = True
             print(f'ERROR: {results.context} -- {results.error}')
+        elif results.skipped:
+            print(f'SKIPPED: {results.context} -- {results.skipped}')
         elif results.words:
             fail = True
-            print(f'Misspelled words:\n<{results.category}> {results.context}')
+            language = f' [{results.language}]' if results.language else ''
+            print(f'Misspelled words:\n<{results.category}>{language} {results.context}')
             print('-' * 80)
             for word in results.words:
-                print(word)
+                if results.suggestions and results.suggestions.get(word):
+                    print('{}: {}'.format(word, ', '.join(results.suggestions[word])))
+                else:
+                    print(word)
             print('-' * 80)
             print('')
 
@@ -0,0 +1,142 @@
+"""Encoding detection cache shared between runs."""
+import os
+import gzip
+import json
+import time
+import hashlib
+from .walk import RACY_NS
+
+CACHE_VERSION = 1
+
+# Caches loaded by worker processes, so each worker only reads the cache file once.
+_worker_caches = {}
+
+
+def _worker_cache(cache_file):
+    """Get the cache for a worker process."""
+
+    cache = _worker_caches.get(cache_file)
+    if cache is None:
+        cache = _worker_caches[cache_file] = EncodingCache(cache_file)
+        # Track new entries so they can be sent back to the main process.
+        cache.added = []
+    return cache
+
+
+class EncodingCache:
+    """
+    Encodings detected by the first filter of a pipeline.
+
+    Entries are stored per filter, and a filter is identified by its type, its options,
+    and its default encoding, so changing any of them will cause files to be detected
+    again. A file's cached encoding is only used if its size and modification time
+    are unchanged.
+
+    If a cache file is provided, detected encodings are persisted between runs.
+    """
+
+    def __init__(self, cache_file=None):
+        """Initialize."""
+
+        self.cache_file = cache_file
+        self.cache = self.load(cache_file) if cache_file else {}
+        self.keys = {}
+        self.added = None
+        self.modified = False
+
+    def __reduce__(self):
+        """
+        Only pickle the cache file.
+
+        Worker processes load their own copy of the cache, and send the entries they add back
+        with their results (see `take` and `merge`).
+        """
+
+        return (_worker_cache, (self.cache_file,))
+
+    @staticmethod
+    def load(cache_file):
+        """Load the cache file."""
+
+        try:
+            with gzip.open(cache_file, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION:
+                return data['filters']
+        except Exception:
+            # A missing or corrupt cache is simply rebuilt.
+            pass
+        return {}
+
+    def save(self):
+        """Save the cache file if anything changed."""
+
+        if not self.cache_file or not self.modified:
+            return
+
+        parent = os.path.dirname(os.path.abspath(self.cache_file))
+        os.makedirs(parent, exist_ok=True)
+        temp = self.cache_file + '.tmp'
+        with gzip.open(temp, 'wt', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'filters': self.cache}, f, separators=(',', ':'))
+        os.replace(temp, self.cache_file)
+        self.modified = False
+
+    def get_key(self, flt):
+        """Get the key that identifies how a filter detects encodings."""
+
+        name = '{}.{}|{}|{!r}'.format(
+            type(flt).__module__, type(flt).__qualname__, flt.default_encoding, sorted(flt.config.items())
+        )
+        key = self.keys.get(name)
+        if key is None:
+            key = self.keys[name] = hashlib.sha1(name.encode('utf-8')).hexdigest()
+        return key
+
+    def detect(self, flt, source_file):
+        """Detect the encoding of a file with the given filter, using the cached encoding if the file is unchanged."""
+
+        path = os.path.abspath(source_file)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return flt._detect_encoding(source_file)
+
+        key = self.get_key(flt)
+        stamp = [st.st_size, st.st_mtime_ns]
+        entry = self.cache.get(key, {}).get(path)
+        if entry is not None and entry[:2] == stamp:
+            if entry[2] is None:
+                raise UnicodeDecodeError('None', b'', 0, 0, 'Unicode cannot be detected.')
+            return entry[2]
+
+        try:
+            encoding = flt._detect_encoding(source_file)
+        except UnicodeDecodeError:
+            # Remember files that can't be detected as well, the filter falls back to its default encoding.
+            encoding = None
+        # A file modified this recently could change again without its modification time changing.
+        if time.time_ns() - st.st_mtime_ns > RACY_NS:
+            entry = stamp + [encoding]
+            self.cache.setdefault(key, {})[path] = entry
+            if self.added is not None:
+                self.added.append((key, path, entry))
+            self.modified = True
+        if encoding is None:
+            raise UnicodeDecodeError('None', b'', 0, 0, 'Unicode cannot be detected.')
+        return encoding
+
+    def take(self):
+        """Take the entries added since the last call."""
+
+        added = self.added or []
+        if self.added is not None:
+            self.added = []
+        return added
+
+    def merge(self, entries):
+        """Merge entries added by a worker process."""
+
+        for key, path, entry in entries:
+            self.cache.setdefault(key, {})[path] = entry
+            self.modified = True
@@ -2,6 +2,7 @@
 import re
 import codecs
 import contextlib
+import io
 import mmap
 import os
 from collections import namedtuple
@@ -37,6 +38,56 @@ RE_LINE_ENDINGS = re.compile(r'(?:\r\n|(?!\r\n)[\n\r])')
 BINARY_ENCODE = ''
 
 
+class LazyContext:
+    """
+    Context that is only rendered when it is read.
+
+    The context is stored as a format string and its arguments (file names, line numbers, selectors,
+    or other contexts), so the string is only built for the few chunks whose context is displayed.
+    """
+
+    __slots__ = ('args', 'fmt')
+
+    def __init__(self, fmt, *args):
+        """Initialize."""
+
+        self.fmt = fmt
+        self.args = args
+
+    def __str__(self):
+        """Render the context."""
+
+        return self.fmt % self.args
+
+    def __repr__(self):
+        """Representation."""
+
+        return f'LazyContext({str(self)!r})'
+
+    def __eq__(self, other):
+        """Compare the rendered context."""
+
+        if isinstance(other, (str, LazyContext)):
+            return str(self) == str(other)
+        return NotImplemented
+
+    def __hash__(self):
+        """Hash the rendered context."""
+
+        return hash(str(self))
+
+    def __reduce__(self):
+        """Only pickle the format and its arguments."""
+
+        return (LazyContext, (self.fmt, *self.args))
+
+
+def render_context(context):
+    """Render a context that may be lazy."""
+
+    return str(context) if isinstance(context, LazyContext) else context
+
+
 class SourceText(namedtuple('SourceText', ['text', 'context', 'encoding', 'category', 'error'])):
     """Source text."""
 
@@ -62,10 +113,22 @@ class SourceText(namedtuple('SourceText', ['text', 'context', 'encoding', 'categ
 
         return super().__new__(cls, text, context, encoding, category, error)
 
+    @property
+    def context(self):
+        """Get the rendered context."""
+
+        return render_context(self[1])
+
+    @property
+    def lazy_context(self):
+        """Get the context without rendering it, so it can be passed on or extended lazily."""
+
+        return self[1]
+
     def _is_bytes(self):
         """Is bytes."""
 
-        return isinstance(self.text, bytes)
+        return isinstance(self.text, (bytes, bytearray, memoryview))
 
     def _has_error(self):
         """Check if object has an error associated with it."""
@@ -73,16 +136,98 @@ class SourceText(namedtuple('SourceText', ['text', 'context', 'encoding', 'categ
         return self.error is not None
 
 
+class BufferReader(io.RawIOBase):
+    """Read a bytes-like object as a binary file without copying it."""
+
+    def __init__(self, buffer):
+        """Initialize."""
+
+        super().__init__()
+        self._buffer = memoryview(buffer).cast('B')
+        self._pos = 0
+
+    def readable(self):
+        """Is readable."""
+
+        return True
+
+    def seekable(self):
+        """Is seekable."""
+
+        return True
+
+    def tell(self):
+        """Get the position."""
+
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        """Seek to the position."""
+
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._buffer)
+        elif whence != io.SEEK_SET:
+            raise ValueError(f'Invalid whence ({whence})')
+        if offset < 0:
+            raise ValueError(f'Negative seek position {offset}')
+        self._pos = offset
+        return offset
+
+    def read(self, size=-1):
+        """Read up to `size` bytes, only the requested bytes are copied."""
+
+        end = len(self._buffer) if size is None or size < 0 else self._pos + size
+        data = self._buffer[self._pos:end].tobytes()
+        self._pos += len(data)
+        return data
+
+    def readall(self):
+        """Read the remaining bytes."""
+
+        return self.read()
+
+    def readinto(self, b):
+        """Read bytes into a buffer."""
+
+        data = self._buffer[self._pos:self._pos + len(b)]
+        size = len(data)
+        memoryview(b).cast('B')[:size] = data
+        self._pos += size
+        return size
+
+    def close(self):
+        """Release the buffer."""
+
+        if not self.closed:
+            self._buffer.release()
+        super().close()
+
+
 class Filter(plugin.Plugin):
     """Spelling language."""
 
     MAX_GUESS_SIZE = 31457280
+    STREAM_CHUNK_SIZE = 1048576
     CHECK_BOM = True
+    # Filters that stream very large files as independent chunks can have the
+    # chunks spell checked in parallel when they are the first filter.
+    SPLIT_SAFE = False
+    # Filters that read binary files should disable this so binary files are not skipped.
+    SKIP_BINARY = True
+    # Filters that parse binary content should enable this so binary sources from
+    # the previous filter are passed to them instead of straight to the spell checker.
+    ACCEPTS_BINARY = False
 
     def __init__(self, options, default_encoding='utf-8'):
         """Initialize."""
 
         self.default_encoding = PYTHON_ENCODING_NAMES.get(default_encoding, default_encoding).lower()
+        # The file being processed when run as the first filter: `(name, size, buffer)`.
+        self._source = None
+        # Cache of detected encodings (see `pyspelling.detection.EncodingCache`), attached when run in a task.
+        self.encoding_cache = None
         super().__init__(options)
         self.setup()
 
@@ -175,20 +320,60 @@ class Filter(plugin.Plugin):
 
         return encoding
 
+    @contextlib.contextmanager
+    def _map_source(self, source_file):
+        """
+        Map the source file into memory.
+
+        Encoding detection and `read_text` share the mapped buffer, so the file is only read once.
+        If the file cannot be mapped, both simply fall back to reading the file themselves.
+        """
+
+        f = m = None
+        try:
+            f = open(source_file, 'rb')  # noqa: SIM115
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                self._source = (source_file, size, b'')
+            elif not self._is_very_large(size):
+                m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._source = (source_file, size, m)
+        except (OSError, ValueError):
+            pass
+
+        try:
+            yield
+        finally:
+            self._source = None
+            if m is not None:
+                with contextlib.suppress(BufferError):
+                    m.close()
+            if f is not None:
+                f.close()
+
+    def _get_source_buffer(self, source_file):
+        """Get the buffer of the file being processed if it is the requested file."""
+
+        return self._source if self._source is not None and self._source[0] == source_file else None
+
     def _run_first(self, source_file):
         """Run on as first in chain."""
 
         self.reset()
         self.current_encoding = self.default_encoding
         encoding = None
-        try:
-            encoding = self._detect_encoding(source_file)
-            content = self.filter(source_file, encoding)
-        except UnicodeDecodeError:
-            if not encoding or encoding != self.default_encoding:
-                content = self.filter(source_file, self.default_encoding)
-            else:
-                raise
+        with self._map_source(source_file):
+            try:
+                if self.encoding_cache is not None:
+                    encoding = self.encoding_cache.detect(self, source_file)
+                else:
+                    encoding = self._detect_encoding(source_file)
+                content = self.filter(source_file, encoding)
+            except UnicodeDecodeError:
+                if not encoding or encoding != self.default_encoding:
+                    content = self.filter(source_file, self.default_encoding)
+                else:
+                    raise
         return content
 
     def _run(self, source):
@@ -202,19 +387,23 @@ class Filter(plugin.Plugin):
 
         encoding = None
 
-        file_size = os.path.getsize(filename)
+        source = self._get_source_buffer(filename)
+        file_size = os.path.getsize(filename) if source is None else source[1]
         # If the file is really big, lets just call it binary.
         # We don't have time to let Python chug through a massive file.
         if not self._is_very_large(file_size):
-            with open(filename, "rb") as f:
-                if file_size == 0:
-                    encoding = 'ascii'
+            if file_size == 0:
+                encoding = 'ascii'
+            else:
+                if source is not None:
+                    encoding = self._analyze_file(source[2])
                 else:
-                    encoding = self._detect_buffer_encoding(f)
-                    if encoding is None:
-                        raise UnicodeDecodeError('None', b'', 0, 0, 'Unicode cannot be detected.')
-                    if encoding != BINARY_ENCODE:
-                        encoding = self._verify_encoding(encoding)
+                    with open(filename, "rb") as f:
+                        encoding = self._detect_buffer_encoding(f)
+                if encoding is None:
+                    raise UnicodeDecodeError('None', b'', 0, 0, 'Unicode cannot be detected.')
+                if encoding != BINARY_ENCODE:
+                    encoding = self._verify_encoding(encoding)
         else:  # pragma: no cover
             raise UnicodeDecodeError('None', b'', 0, 0, 'Unicode detection is not applied to very large files!')
 
@@ -235,14 +424,239 @@ class Filter(plugin.Plugin):
 
         return None
 
+    def read_text(self, source_file, encoding, normalize_newlines=True):
+        """
+        Read and decode the source file.
+
+        When running as the first filter, the content is decoded from the buffer that was
+        used for encoding detection instead of reading the file again. Decoding is always strict.
+        If `normalize_newlines` is enabled, all line endings are translated to line feeds as `open` would.
+        """
+
+        source = self._get_source_buffer(source_file)
+        if source is not None:
+            text = str(source[2], encoding, 'strict')
+        else:
+            with open(source_file, 'rb') as f:
+                text = str(f.read(), encoding, 'strict')
+
+        if normalize_newlines and '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text
+
+    def is_very_large_file(self, source_file):
+        """
+        Check if the source file is too large to be read at once.
+
+        Filters that support it should stream such files with `stream_text`.
+        """
+
+        return self._get_source_buffer(source_file) is None and self._is_very_large(os.path.getsize(source_file))
+
+    def stream_text(self, source_file, encoding, normalize_newlines=True, split_lines=True):
+        """
+        Incrementally read and decode the source file.
+
+        Text is yielded in chunks of roughly `STREAM_CHUNK_SIZE` that always end on a line boundary,
+        so a line is never split between two chunks. If `split_lines` is disabled, chunks are yielded
+        as they are decoded instead, which is useful for content that may not have any lines at all.
+        """
+
+        with open(source_file, 'rb') as f:
+            yield from self.stream_decode(f, encoding, normalize_newlines, split_lines)
+
+    def stream_decode(self, f, encoding, normalize_newlines=True, split_lines=True):
+        """Incrementally decode a binary file object like `stream_text` does."""
+
+        decoder = codecs.getincrementaldecoder(encoding)('strict')
+        pending = ''
+        while True:
+            data = f.read(self.STREAM_CHUNK_SIZE)
+            text = pending + decoder.decode(data, not data)
+            if not data:
+                break
+
+            if split_lines:
+                # Split after the last line ending, but never between `\r` and a `\n` that may follow it.
+                index = max(text.rfind('\n'), text.rfind('\r', 0, len(text) - 1)) + 1
+            else:
+                index = len(text) - 1 if text.endswith('\r') else len(text)
+            pending = text[index:]
+            if index:
+                text = text[:index]
+                if normalize_newlines and '\r' in text:
+                    text = text.replace('\r\n', '\n').replace('\r', '\n')
+                yield text
+
+        if text:
+            if normalize_newlines and '\r' in text:
+                text = text.replace('\r\n', '\n').replace('\r', '\n')
+            yield text
+
+    def stream_lines(self, source_file, encoding, normalize_newlines=True):
+        """Stream the source file like `stream_text`, but also yield the context of the lines in each chunk."""
+
+        line = 1
+        for text in self.stream_text(source_file, encoding, normalize_newlines):
+            count = text.count('\n')
+            if not normalize_newlines:
+                count += text.count('\r') - text.count('\r\n')
+            end = line + count - (1 if text.endswith(('\n', '\r')) else 0)
+            yield text, self.line_context(source_file, line, end)
+            line += count
+
+    def line_context(self, source_file, start, end):
+        """Get the context for a range of lines in the source file."""
+
+        if start >= end:
+            return LazyContext('%s (%d)', source_file, start)
+        return LazyContext('%s (%d-%d)', source_file, start, end)
+
+    def binary_stream(self, source):
+        """
+        Get a binary file object of the content of the source.
+
+        Binary content is read in place, only text is encoded.
+        """
+
+        if source._is_bytes():
+            return BufferReader(source.text)
+        return io.BytesIO(source.text.encode(source.encoding))
+
     def filter(self, source_file, encoding):  # noqa A001
         """Open and filter the file from disk."""
 
-        with open(source_file, 'r', encoding=encoding, errors='strict') as f:
-            text = f.read()
-        return [SourceText(text, source_file, encoding, 'text')]
+        return [SourceText(self.read_text(source_file, encoding), source_file, encoding, 'text')]
 
     def sfilter(self, source):
         """Execute filter."""
 
-        return [SourceText(source.text, source.context, source.encoding, 'text')]
+        return [SourceText(source.text, source.lazy_context, source.encoding, 'text')]
+
+
+class CodeFilter(Filter):
+    """
+    Base of filters that find comments and strings in code.
+
+    Instead of trying a pattern at every character, the text is searched with `candidates` for where
+    comments and strings can start, and `match_candidate` is only tried there. Filters that evaluate
+    the matches of `pattern` also get `_find_content`, which can stream text with `open_pattern`.
+    """
+
+    def prepare(self, text):
+        """Prepare the text before it is scanned."""
+
+        return text
+
+    def match_candidate(self, text, index, pos):
+        """
+        Match a comment or string at the candidate found at `index`, or return `None`.
+
+        The whitespace before line comments, back to `pos`, is part of their match.
+        """
+
+        start = index
+        if text.startswith('//', index):
+            while start > pos and text[start - 1] in ' \t':
+                start -= 1
+        return self.pattern.match(text, start)
+
+    def next_token(self, text, pos):
+        """Find the next comment or string from `pos`, or return `None` if there are no more."""
+
+        while True:
+            c = self.candidates.search(text, pos)
+            if c is None:
+                return None
+            index = c.start(0)
+            token = self.match_candidate(text, index, pos)
+            if token is not None:
+                return token
+            pos = index + 1
+
+    def find_content(self, text):
+        """Find content."""
+
+        self._find_content(self.norm_nl(self.prepare(text)), 0, True)
+
+    def find_content_stream(self, chunks, context):
+        """
+        Find content in a stream of text chunks.
+
+        The sources found in each chunk are yielded as soon as the chunk is evaluated, see `flush_content`.
+        """
+
+        text = ''
+        pos = 0
+        for chunk in chunks:
+            text += self.prepare(chunk)
+            index = self._find_content(text, pos, False)
+            # Keep the character before the unprocessed text so that `^` still works.
+            start = max(index - 1, 0)
+            text = text[start:]
+            pos = index - start
+            yield from self.flush_content(context, False)
+        self._find_content(text, pos, True)
+        yield from self.flush_content(context, True)
+
+    def flush_content(self, context, final):
+        """
+        Get the sources of the comments and strings found so far, and forget them.
+
+        Unless the text is `final`, the last line comment is kept when comments are grouped, as the
+        next line may continue it.
+        """
+
+        held = None
+        if not final and self.group_comments and self.line_comments:
+            held = self.line_comments.pop()
+        content = []
+        self.extend_src(content, context)
+        self.block_comments.clear()
+        self.line_comments.clear()
+        self.quoted_strings.clear()
+        if held is not None:
+            self.line_comments.append(held)
+        return content
+
+    def _find_content(self, text, pos, final):
+        """
+        Evaluate comments and strings from `pos`.
+
+        Code between comments and strings is skipped, only its lines are counted.
+
+        If the text is not `final`, evaluation stops at the first comment or string that may continue
+        in text that hasn't been read yet, or at the last line, which may not be complete yet, and the index
+        where evaluation stopped is returned.
+        """
+
+        end = len(text)
+        opened = None
+        if not final:
+            end = max(pos, text.rfind('\n', pos) + 1)
+            opened = self.open_pattern.search(text, pos)
+
+        while True:
+            m = self.next_token(text, pos)
+            if m is None:
+                break
+            start = m.start(0)
+            if not final:
+                if opened is not None and opened.start(0) < start:
+                    break
+                if start >= end or m.end(0) == len(text):
+                    end = min(start, end)
+                    break
+            self.line_num += text.count('\n', pos, start)
+            self.evaluate(m)
+            pos = m.end(0)
+            if opened is not None and opened.start(0) < pos:
+                # Comments and strings that only open inside other comments and strings don't count.
+                opened = self.open_pattern.search(text, pos)
+
+        if opened is not None:
+            end = min(opened.start(0), end)
+        # The last comment or string may have ended on the last line.
+        end = max(end, pos)
+        self.line_num += text.count('\n', pos, end)
+        return end
@@ -0,0 +1,428 @@
+"""
+Comments filter.
+
+Find comments and strings in languages described by a table of their comment and string syntax.
+"""
+import re
+import textwrap
+from .. import filters
+
+# Language tables.
+#
+# - `line_comments`: markers of comments that run to the end of the line.
+# - `block_comments`: `(open, close)` markers of block comments.
+# - `nested_comments`: block comments can be nested.
+# - `long_comments`: `(prefix, fill, open, close, end)` of block comments whose markers are repeated fill
+#   characters between brackets, e.g. Lua's `--[==[ ... ]==]`. The close marker must repeat the fill as often
+#   as the open marker does.
+# - `comment_boundary`: lookbehind that line comments must match, for languages whose comment markers
+#   are only comments at the start of a word.
+# - `string_boundary`: pattern that the text between the start of the line and a string must end with, for
+#   languages whose quotes only start a string at the start of a value.
+# - `strings`: `(open, close, escape, multiline)` of strings. An escape that is the same as the close marker
+#   escapes by doubling the close marker.
+# - `long_strings`: `(prefix, fill, open, close, end)` of strings like `long_comments`, e.g. Rust's `r#"..."#`.
+# - `heredocs`: pattern of the start of a heredoc, its `delim` group is the line that ends the heredoc.
+# - `skip`: `(open, close, escape, multiline)` of quoted code that is skipped, like quoted identifiers.
+# - `chars`: openers of character literals (a character or an escape followed by the opener).
+# - `escapes`: backslashes escape the next character in code.
+LANGUAGES = {
+    "csharp": {
+        "line_comments": ['//'],
+        "block_comments": [('/*', '*/')],
+        "strings": [
+            ('"""', '"""', None, True),
+            ('@"', '"', '"', True),
+            ('$@"', '"', '"', True),
+            ('@$"', '"', '"', True),
+            ('$"', '"', '\\', False),
+            ('"', '"', '\\', False)
+        ],
+        "chars": ["'"]
+    },
+    "go": {
+        "line_comments": ['//'],
+        "block_comments": [('/*', '*/')],
+        "strings": [('`', '`', None, True), ('"', '"', '\\', False)],
+        "chars": ["'"]
+    },
+    "java": {
+        "line_comments": ['//'],
+        "block_comments": [('/*', '*/')],
+        "strings": [('"""', '"""', '\\', True), ('"', '"', '\\', False)],
+        "chars": ["'"]
+    },
+    "kotlin": {
+        "line_comments": ['//'],
+        "block_comments": [('/*', '*/')],
+        "nested_comments": True,
+        "strings": [('"""', '"""', None, True), ('"', '"', '\\', False)],
+        "chars": ["'"]
+    },
+    "lua": {
+        "line_comments": ['--'],
+        "long_comments": [('--[', '=', '[', ']', ']')],
+        "strings": [('"', '"', '\\', False), ("'", "'", '\\', False)],
+        "long_strings": [('[', '=', '[', ']', ']')]
+    },
+    "r": {
+        "line_comments": ['#'],
+        "strings": [('"', '"', '\\', True), ("'", "'", '\\', True)],
+        "skip": [('`', '`', '\\', False)]
+    },
+    "ruby": {
+        "line_comments": ['#'],
+        "strings": [('"', '"', '\\', True), ("'", "'", '\\', True)],
+        "heredocs": r'''<<[-~]?(?P<quote>["'`]?)(?P<delim>[A-Za-z_]\w*)(?P=quote)''',
+        "skip": [('`', '`', '\\', True)]
+    },
+    "rust": {
+        "line_comments": ['//'],
+        "block_comments": [('/*', '*/')],
+        "nested_comments": True,
+        "strings": [('b"', '"', '\\', True), ('"', '"', '\\', True)],
+        "long_strings": [('br', '#', '"', '"', ''), ('r', '#', '"', '"', '')],
+        "chars": ["b'", "'"]
+    },
+    "shell": {
+        "line_comments": ['#'],
+        "comment_boundary": r'(?<![^\s;&|()])',
+        "strings": [('"', '"', '\\', True), ("$'", "'", '\\', True), ("'", "'", None, True)],
+        "heredocs": r'''(?<!<)<<-?[ \t]*(?P<quote>["']?)\\?(?P<delim>[A-Za-z_]\w*)(?P=quote)''',
+        "escapes": True
+    },
+    "sql": {
+        "line_comments": ['--'],
+        "block_comments": [('/*', '*/')],
+        "strings": [("'", "'", "'", True)],
+        "skip": [('"', '"', '"', True), ('`', '`', '`', False)]
+    },
+    "swift": {
+        "line_comments": ['//'],
+        "block_comments": [('/*', '*/')],
+        "nested_comments": True,
+        "strings": [('"""', '"""', '\\', True), ('"', '"', '\\', False)]
+    },
+    "toml": {
+        "line_comments": ['#'],
+        "strings": [
+            ('"""', '"""', '\\', True),
+            ("'''", "'''", None, True),
+            ('"', '"', '\\', False),
+            ("'", "'", None, False)
+        ]
+    },
+    "yaml": {
+        "line_comments": ['#'],
+        "comment_boundary": r'(?<!\S)',
+        # Quotes within plain scalars, like apostrophes in prose, don't start strings.
+        "string_boundary": r'(?:^|[:?-][ \t]|[\[{,])[ \t]*\Z',
+        "strings": [('"', '"', '\\', True), ("'", "'", "'", True)]
+    }
+}
+
+LINE = 0
+BLOCK = 1
+NESTED = 2
+STRING = 3
+HEREDOC = 4
+SKIP = 5
+
+
+class CommentsFilter(filters.CodeFilter):
+    """Comments filter."""
+
+    def __init__(self, options, default_encoding='utf-8'):
+        """Initialization."""
+
+        super().__init__(options, default_encoding)
+
+    def get_default_config(self):
+        """Get default configuration."""
+
+        return {
+            "language": "",
+            "block_comments": True,
+            "line_comments": True,
+            "group_comments": False,
+            "strings": False,
+            "prefix": ""
+        }
+
+    def validate_options(self, k, v):
+        """Validate options."""
+
+        super().validate_options(k, v)
+        if k == 'language' and v.lower() not in LANGUAGES:
+            raise ValueError(f"{self.__class__.__name__}: '{v}' is not a valid value for '{k}'")
+
+    def setup(self):
+        """Setup."""
+
+        language = self.config['language'].lower()
+        if not language:
+            raise ValueError(f"{self.__class__.__name__}: option 'language' is required")
+        self.blocks = self.config['block_comments']
+        self.lines = self.config['line_comments']
+        self.group_comments = self.config['group_comments']
+        self.strings = self.config['strings']
+        self.prefix = self.config['prefix'] or language
+        self.build_scanner(LANGUAGES[language])
+
+    def build_scanner(self, table):
+        """
+        Build the scanner of a language table.
+
+        Tokens are grouped by the first character of their opener, longest openers first. The scanner
+        searches for those characters, and only tries the tokens whose opener is found there.
+        """
+
+        boundary = table.get('comment_boundary', '')
+        string_boundary = table.get('string_boundary')
+        self.string_boundary = re.compile(string_boundary, re.MULTILINE) if string_boundary else None
+        tokens = [
+            (marker, LINE, re.compile(boundary + re.escape(marker) + r'(?P<content>[^\n]*)'), None)
+            for marker in table.get('line_comments', [])
+        ]
+
+        for start, end in table.get('block_comments', []):
+            if table.get('nested_comments', False):
+                tokens.append((start, NESTED, re.compile(re.escape(start)), None))
+                self.nesting = re.compile(f'(?P<open>{re.escape(start)})|{re.escape(end)}')
+            else:
+                pattern = f'{re.escape(start)}(?P<content>.*?)(?:{re.escape(end)}|\\Z)'
+                tokens.append((start, BLOCK, re.compile(pattern, re.DOTALL), None))
+
+        for kind, key in ((BLOCK, 'long_comments'), (STRING, 'long_strings')):
+            for prefix, fill, start, end, close in table.get(key, []):
+                pattern = re.compile(
+                    '{}(?P<fill>(?:{})*){}(?P<content>.*?){}(?P=fill){}'.format(
+                        *(re.escape(x) for x in (prefix, fill, start, end, close))
+                    ),
+                    re.DOTALL
+                )
+                tokens.append((prefix + fill, kind, pattern, None))
+                tokens.append((prefix + start, kind, pattern, None))
+
+        for kind, key in ((STRING, 'strings'), (SKIP, 'skip')):
+            for start, end, escape, multiline in table.get(key, []):
+                pattern = self.compile_string(start, end, escape, multiline)
+                # Doubled close markers are unescaped.
+                tokens.append((start, kind, pattern, end if escape == end else None))
+
+        for start in table.get('chars', []):
+            pattern = '{0}(?:\\\\.[^{1}\\n]*|[^\\\\{1}\\n]){1}'.format(re.escape(start), re.escape(start[-1]))
+            tokens.append((start, SKIP, re.compile(pattern), None))
+
+        if table.get('heredocs'):
+            tokens.append(('<<', HEREDOC, re.compile(table['heredocs']), None))
+
+        if table.get('escapes', False):
+            tokens.append(('\\', SKIP, re.compile(r'\\.', re.DOTALL), None))
+
+        self.tokens = {}
+        for token in sorted(tokens, key=lambda t: -len(t[0])):
+            self.tokens.setdefault(token[0][0], []).append(token)
+        self.candidates = re.compile('[{}]'.format(''.join(re.escape(c) for c in self.tokens)))
+
+    @staticmethod
+    def compile_string(start, end, escape, multiline):
+        """Compile the pattern of a string."""
+
+        if escape == end:
+            escaped = re.escape(end * 2)
+        elif escape:
+            escaped = re.escape(escape) + '.'
+        else:
+            escaped = ''
+        if len(end) == 1:
+            char = '[^{}{}{}]'.format(re.escape(end), re.escape(escape) if escape else '', '' if multiline else '\\n')
+        else:
+            char = '(?!{}){}'.format(re.escape(end), '.' if multiline else '[^\\n]')
+        content = f'(?:{escaped}|{char})*' if escaped else f'{char}*'
+        return re.compile(f'{re.escape(start)}(?P<content>{content}){re.escape(end)}', re.DOTALL)
+
+    def evaluate_block(self, content):
+        """Evaluate block comments."""
+
+        if self.blocks:
+            self.block_comments.append([content, self.line_num, self.current_encoding])
+
+    def evaluate_line(self, text, start, index, content):
+        """Evaluate a line comment at `start`, `index` is where the search for it began."""
+
+        if not self.lines:
+            return
+
+        # Comments with only whitespace before them on their line are inline comments.
+        begin = start
+        while begin > index and text[begin - 1] in ' \t':
+            begin -= 1
+        if begin == 0 or text[begin - 1] == '\n':
+            # Consecutive lines with only comments with same leading whitespace
+            # will be captured as a single block.
+            leading = text[begin:start]
+            if self.group_comments and self.line_num == self.prev_line + 1 and leading == self.leading:
+                self.line_comments[-1][0] += '\n' + content
+            else:
+                self.line_comments.append([content, self.line_num, self.current_encoding])
+            self.leading = leading
+            self.prev_line = self.line_num
+        else:
+            self.line_comments.append([content, self.line_num, self.current_encoding])
+
+    def evaluate_string(self, content):
+        """Evaluate strings."""
+
+        if self.strings:
+            self.quoted_strings.append([content, self.line_num, self.current_encoding])
+
+    def evaluate_nested(self, text, index):
+        """Evaluate a nested block comment whose content starts at `index`, and return the index after it."""
+
+        depth = 1
+        for m in self.nesting.finditer(text, index):
+            if m.group('open'):
+                depth += 1
+                continue
+            depth -= 1
+            if not depth:
+                self.evaluate_block(text[index:m.start(0)])
+                return m.end(0)
+        # Comments that are not closed run to the end.
+        self.evaluate_block(text[index:])
+        return len(text)
+
+    def evaluate_heredocs(self, text, index, heredocs):
+        """Evaluate the heredocs started on a line, their content starts at `index`, and return the index after them."""
+
+        for delim in heredocs:
+            m = re.compile(r'^[ \t]*{}\b'.format(re.escape(delim)), re.MULTILINE).search(text, index)
+            end = len(text) if m is None else m.start(0)
+            self.evaluate_string(text[index:end])
+            self.line_num += text.count('\n', index, end)
+            index = len(text) if m is None else m.end(0)
+        return index
+
+    def match_candidate(self, text, start, pos):
+        """
+        Match the token at `start`, and return its kind, match, and the close marker it doubles to escape.
+
+        Returns `None` if no token matches.
+        """
+
+        for opener, kind, pattern, doubled in self.tokens[text[start]]:
+            if text.startswith(opener, start):
+                if kind == STRING and self.string_boundary is not None and not self.string_boundary.search(
+                    text, text.rfind('\n', 0, start) + 1, start
+                ):
+                    continue
+                m = pattern.match(text, start)
+                if m is not None:
+                    return kind, m, doubled
+        return None
+
+    def find_content(self, text):
+        """
+        Find comments and strings.
+
+        Tokens are found with `next_token`, and the lines of the code in between are counted at once.
+        Heredocs start on the line after the one that opens them, so the rest of that line is scanned
+        before their content is evaluated.
+        """
+
+        index = pos = 0
+        heredocs = []
+        eol = 0
+        while True:
+            token = self.next_token(text, pos)
+            if heredocs and (token is None or token[1].start(0) > eol):
+                self.line_num += text.count('\n', index, eol + 1)
+                index = pos = self.evaluate_heredocs(text, min(eol + 1, len(text)), heredocs)
+                heredocs = []
+                continue
+            if token is None:
+                break
+
+            kind, m, doubled = token
+            start = m.start(0)
+            self.line_num += text.count('\n', index, start)
+            end = m.end(0)
+            if kind == LINE:
+                self.evaluate_line(text, start, index, m.group('content'))
+            elif kind == BLOCK:
+                self.evaluate_block(m.group('content'))
+            elif kind == NESTED:
+                end = self.evaluate_nested(text, end)
+            elif kind == STRING:
+                content = m.group('content')
+                self.evaluate_string(content.replace(doubled * 2, doubled) if doubled else content)
+            elif kind == HEREDOC:
+                heredocs.append(m.group('delim'))
+            self.line_num += text.count('\n', start, end)
+            index = pos = end
+
+            # Heredocs start after the line that opened them ends, even if it ends after a multiline token.
+            if heredocs and end > eol:
+                eol = text.find('\n', end)
+                if eol == -1:
+                    eol = len(text)
+
+        self.line_num += text.count('\n', index)
+
+    def extend_src_text(self, content, context, text_list, category):
+        """Extend the source text list with the gathered text data."""
+
+        prefix = self.prefix + '-' if self.prefix else ''
+
+        for comment, line, encoding in text_list:
+            content.append(
+                filters.SourceText(
+                    textwrap.dedent(comment),
+                    filters.LazyContext("%s (%d)", context, line),
+                    encoding,
+                    prefix + category
+                )
+            )
+
+    def extend_src(self, content, context):
+        """Extend source list."""
+
+        self.extend_src_text(content, context, self.block_comments, 'block-comment')
+        self.extend_src_text(content, context, self.line_comments, 'line-comment')
+        self.extend_src_text(content, context, self.quoted_strings, 'string')
+
+    def _filter(self, text, context, encoding):
+        """Filter comments and strings."""
+
+        content = []
+        self.current_encoding = encoding
+        self.line_num = 1
+        self.prev_line = -1
+        self.leading = ''
+        self.block_comments = []
+        self.line_comments = []
+        self.quoted_strings = []
+
+        self.find_content(self.norm_nl(text))
+        self.extend_src(content, context)
+
+        return content
+
+    def filter(self, source_file, encoding):  # noqa A001
+        """Parse the source file."""
+
+        text = self.read_text(source_file, encoding)
+
+        return self._filter(text, source_file, encoding)
+
+    def sfilter(self, source):
+        """Filter."""
+
+        return self._filter(source.text, source.lazy_context, source.encoding)
+
+
+def get_plugin():
+    """Get filter."""
+
+    return CommentsFilter
@@ -6,10 +6,31 @@ from collections import OrderedDict
 
 DEFAULT_CONTENT = '.*?'
 
+# Tokens of a regular expression pattern that matter when patterns are combined: group names and references,
+# numbered references, and global flags. Escapes, character sets, and comments are matched so they are skipped.
+RE_PATTERN_TOKENS = re.compile(
+    r'''(?x)
+    (?P<escape>\\(?:[0-7]{3}|0[0-7]{0,2}|(?P<number>[1-9][0-9]?)|.)) |
+    (?P<set>\[\^?\]?(?:\\.|[^\]\\])*\]) |
+    (?P<flags>\(\?[aiLmsux]+\)) |
+    (?P<name>\(\?P<\w+>) |
+    (?P<ref>\(\?P=\w+\)) |
+    (?P<cond>\(\?\(\w+\)) |
+    (?P<comment>\#[^\n]*) |
+    [^\\\[(#]+ | .
+    ''',
+    re.DOTALL
+)
+
+INLINE_FLAGS = (('a', re.A), ('i', re.I), ('L', re.L), ('m', re.M), ('s', re.S), ('x', re.X))
+SCOPED_FLAGS = (('i', re.I), ('m', re.M), ('s', re.S), ('x', re.X))
+
 
 class ContextFilter(filters.Filter):
     """Context filter."""
 
+    SPLIT_SAFE = True
+
     def __init__(self, options, default_encoding='utf-8'):
         """Initialization."""
 
@@ -72,54 +93,209 @@ class ContextFilter(filters.Filter):
         escapes = self.config['escapes']
         if escapes:
             self.escapes = re.compile(escapes)
+        self.pattern = self.combine()
+
+    def combine(self):
+        """
+        Combine the escapes and delimiters into one pattern that finds the next of any of them.
+
+        Each pattern is an alternative, in order, so the first pattern that matches at a position wins.
+        Alternatives are wrapped in groups with random names that tell which pattern matched. Group names
+        are made unique to each alternative, numbered references are shifted past the groups before them,
+        and global flags are applied to their own alternative only. If the patterns can't be combined,
+        `None` is returned and each pattern is tried in turn.
+        """
+
+        patterns = [(self.escapes, None)] if self.escapes else []
+        patterns.extend(self.delimiters)
+        used = ''.join(p.pattern for p, _ in patterns) + ''.join(g for _, g in patterns if g)
+        alternatives = []
+        self.groups = {}
+        index = 1
+        for pattern, group in patterns:
+            name = util.random_name_gen()
+            while name in used:
+                name = util.random_name_gen()
+            used += name
+            self.groups[name] = f'{name}_{group}' if group else None
+            try:
+                alternative = self.rename_groups(pattern, name, index)
+            except ValueError:
+                return None
+            # A comment at the end of a verbose pattern must not swallow the end of the group.
+            end = '\n)' if pattern.flags & re.X else ')'
+            alternatives.append(f'(?P<{name}>{self.scope_flags(pattern.flags)}{alternative}{end})')
+            index += pattern.groups + 1
+        if not alternatives:
+            return None
+        try:
+            return re.compile('|'.join(alternatives))
+        except re.error:
+            return None
+
+    @staticmethod
+    def scope_flags(flags):
+        """Get the scoped group that applies the given flags, and only those, to an alternative."""
+
+        enabled = ''.join(c for c, f in INLINE_FLAGS if flags & f)
+        disabled = ''.join(c for c, f in SCOPED_FLAGS if not flags & f)
+        return f'(?{enabled}-{disabled}:' if disabled else f'(?{enabled}:'
+
+    @staticmethod
+    def rename_groups(pattern, prefix, index):
+        """
+        Rewrite a pattern so it can be an alternative whose first group is group `index` of a combined pattern.
+
+        Group names are prefixed, numbered references are shifted, and global flags are removed.
+        """
+
+        verbose = pattern.flags & re.X
+        text = pattern.pattern
+        rewritten = []
+        pos = 0
+        while pos < len(text):
+            m = RE_PATTERN_TOKENS.match(text, pos)
+            token = m.group(0)
+            pos = m.end(0)
+            kind = m.lastgroup
+            if m.group('number'):
+                number = int(m.group('number')) + index
+                if number > 99:
+                    raise ValueError('Too many groups to refer to by number')
+                token = f'(?:\\{number})'
+            elif kind == 'flags':
+                token = ''
+            elif kind == 'name':
+                token = f'(?P<{prefix}_{token[4:]}'
+            elif kind == 'ref':
+                token = f'(?P={prefix}_{token[4:]}'
+            elif kind == 'cond':
+                ref = token[3:-1]
+                if ref.isdigit():
+                    ref = str(int(ref) + index)
+                else:
+                    ref = f'{prefix}_{ref}'
+                token = f'(?({ref})'
+            elif kind == 'comment' and not verbose:
+                token = '#'
+                pos = m.start(0) + 1
+            rewritten.append(token)
+        return ''.join(rewritten)
+
+    def search(self, text, index):
+        """Find the next escape or delimiter, returning the match and the content group of delimiters."""
+
+        if self.pattern is not None:
+            m = self.pattern.search(text, index)
+            return (m, self.groups[m.lastgroup]) if m is not None else (None, None)
+
+        while index < len(text):
+            m = self.escapes.match(text, pos=index) if self.escapes else None
+            if m:
+                return m, None
+            for pattern, group in self.delimiters:
+                m = pattern.match(text, pos=index)
+                if m:
+                    return m, group
+            index += 1
+        return None, None
 
     def filter(self, source_file, encoding):  # noqa A001
         """Parse file."""
 
-        with open(source_file, 'r', encoding=encoding, errors='strict') as f:
-            text = f.read()
+        if self.is_very_large_file(source_file):
+            return self.stream(source_file, encoding)
+
+        text = self.read_text(source_file, encoding)
 
         return [filters.SourceText(self._filter(text), source_file, encoding, 'context')]
 
     def sfilter(self, source):
         """Filter."""
 
-        return [filters.SourceText(self._filter(source.text), source.context, source.encoding, 'context')]
+        return [filters.SourceText(self._filter(source.text), source.lazy_context, source.encoding, 'context')]
 
-    def _filter(self, text):
-        """Context delimiter filter."""
+    def stream(self, source_file, encoding):
+        """Filter a very large file one chunk at a time."""
 
-        if self.line_endings:
-            text = self.norm_nl(text)
+        text = ''
+        pos = last = 0
+        # Line number at the start of `text`.
+        line = 1
+        for chunk in self.stream_text(source_file, encoding):
+            text += chunk
+            begin = min(pos, last)
+            new_text, pos, last = self._scan(text, pos, last, False)
+            if new_text:
+                context = self.line_context(
+                    source_file, line + text.count('\n', 0, begin), line + text.count('\n', 0, max(pos - 1, begin))
+                )
+                yield filters.SourceText(' '.join(new_text), context, encoding, 'context')
+            # Keep the character before the unprocessed text so that anchors and look behinds still work.
+            start = max(min(pos, last) - 1, 0)
+            line += text.count('\n', 0, start)
+            text = text[start:]
+            pos -= start
+            last -= start
+
+        begin = min(pos, last)
+        new_text = self._scan(text, pos, last, True)[0]
+        if new_text:
+            context = self.line_context(
+                source_file, line + text.count('\n', 0, begin), line + text.count('\n', 0, max(len(text) - 1, begin))
+            )
+            yield filters.SourceText(' '.join(new_text), context, encoding, 'context')
+
+    def _scan(self, text, index, last, final):
+        """
+        Scan the text for escapes and delimiters starting at `index`.
+
+        If the text is not `final`, scanning stops at the first escape or delimiter that
+        reaches the end of the text, as it may continue in text that hasn't been read yet.
+        The extracted text is returned along with the index where scanning stopped and
+        the start of any visible text that has not been extracted yet.
+        """
 
         new_text = []
-        index = 0
-        last = 0
         end = len(text)
         while index < end:
-            m = self.escapes.match(text, pos=index) if self.escapes else None
-            if m:
-                index = m.end(0)
-                continue
-            handled = False
-            for delimiter in self.delimiters:
-                m = delimiter[0].match(text, pos=index)
-                if m:
-                    if self.context_visible_first is True:
-                        new_text.append(text[last:m.start(0)])
-                    else:
-                        new_text.append(m.group(delimiter[1]))
-                    index = m.end(0)
-                    last = index
-                    handled = True
-                    break
-            if handled:
-                continue
-            index += 1
-        if last < end and self.context_visible_first is True:
-            new_text.append(text[last:end])
+            m, group = self.search(text, index)
+            if m is None or m.start(0) >= end:
+                index = end
+                break
+            if not final and m.end(0) == end:
+                index = m.start(0)
+                break
+            if group is not None:
+                if self.context_visible_first is True:
+                    new_text.append(text[last:m.start(0)])
+                else:
+                    new_text.append(m.group(group))
+                last = m.end(0)
+            # Patterns that match nothing are stepped over.
+            index = max(m.end(0), m.start(0) + 1)
+        if self.context_visible_first is True:
+            if final:
+                if last < end:
+                    new_text.append(text[last:end])
+            else:
+                # Visible text can be extracted up to the last line break, as words can't span lines.
+                cut = text.rfind('\n', last, index) + 1
+                if cut > last:
+                    new_text.append(text[last:cut])
+                    last = cut
+        else:
+            last = index
+
+        return new_text, index, last
+
+    def _filter(self, text):
+        """Context delimiter filter."""
+
+        if self.line_endings:
+            text = self.norm_nl(text)
 
-        return ' '.join(new_text)
+        return ' '.join(self._scan(text, 0, 0, True)[0])
 
 
 def get_plugin():
@@ -15,9 +15,6 @@ TARGETS = r'''(?x)
     {}
     "(?:\\.|[^"\\\n])*" |                                         # double quotes
     '(?:\\.|[^'\\\n])*'                                           # single quotes
-) |
-(?P<code>
-    .[^/"' \t{}]*?                                               # everything else
 )
 '''
 
@@ -27,9 +24,25 @@ CPP_STRING = r'''
 (?:L|u8?|U)'(?:\\.|[^'\\])*' |
 '''
 
-RE_CPP = re.compile(TARGETS.format(r'\\.|[^\\\n]+', CPP_STRING, 'RLuU'), re.DOTALL | re.MULTILINE)
+RE_CPP = re.compile(TARGETS.format(r'\\.|[^\\\n]+', CPP_STRING), re.DOTALL | re.MULTILINE)
+
+RE_GENERIC = re.compile(TARGETS.format('[^\n]', ''), re.DOTALL | re.MULTILINE)
+
+# Where comments and strings can start (before leading whitespace and string prefixes).
+RE_CANDIDATES = re.compile(r'''//|/\*|["']''')
+
+RE_STRING_PREFIX = re.compile(r'(?:L|u8?|U)?R?')
+
+# Comments and strings that are not terminated before the end of the text (used to detect comments
+# and strings that are cut off when streaming): block comments, strings that run to the end of the text
+# (prefixed strings can span lines), and the start of raw strings.
+RE_OPEN = re.compile(
+    r'''/\*|(?:L|u8?|U)(?:"(?=(?:\\.|[^"\\])*\Z)|'(?=(?:\\.|[^'\\])*\Z))|'''
+    r'''["'](?=(?:\\.|[^\\\n])*\Z)|(?:L|u8?|U)?R"[^\n ()\t]*\(''',
+    re.DOTALL
+)
 
-RE_GENERIC = re.compile(TARGETS.format('[^\n]', '', ''), re.DOTALL | re.MULTILINE)
+RE_GENERIC_OPEN = re.compile(r'''/\*|["'](?=(?:\\.|[^\\\n])*\Z)''', re.DOTALL)
 
 TRIGRAPHS = {
     '??=': '#',
@@ -98,13 +111,16 @@ BYTE_STORE = {
 }
 
 
-class CppFilter(filters.Filter):
+class CppFilter(filters.CodeFilter):
     """C++ style comment filter."""
 
     def __init__(self, options, default_encoding='utf-8'):
         """Initialization."""
 
         self.pattern = RE_GENERIC
+        self.open_pattern = RE_GENERIC_OPEN
+        self.candidates = RE_CANDIDATES
+        self.prefixed = False
         self.trigraphs = False
         super().__init__(options, default_encoding)
 
@@ -212,6 +228,8 @@ class CppFilter(filters.Filter):
         self.string_types, self.wild_string_types = self.eval_string_type(self.config['string_types'])
         if not self.generic_mode:
             self.pattern = RE_CPP
+            self.open_pattern = RE_OPEN
+            self.prefixed = True
 
     def evaluate_block(self, groups):
         """Evaluate block comments."""
@@ -378,8 +396,6 @@ class CppFilter(filters.Filter):
         if g["strings"]:
             self.evaluate_strings(g)
             self.line_num += g['strings'].count('\n')
-        elif g["code"]:
-            self.line_num += g["code"].count('\n')
         else:
             if g['block']:
                 self.evaluate_block(g)
@@ -398,7 +414,7 @@ class CppFilter(filters.Filter):
             content.append(
                 filters.SourceText(
                     textwrap.dedent(comment),
-                    "%s (%d)" % (context, line),
+                    filters.LazyContext("%s (%d)", context, line),
                     encoding,
                     prefix + category
                 )
@@ -416,19 +432,27 @@ class CppFilter(filters.Filter):
 
         return TRIGRAPHS[m.group(0)]
 
-    def find_content(self, text):
-        """Find content."""
+    def prepare(self, text):
+        """Replace trigraphs if enabled."""
 
         if self.trigraphs:
             text = RE_TRIGRAPHS.sub(self.process_trigraphs, text)
+        return text
 
-        for m in self.pattern.finditer(self.norm_nl(text)):
-            self.evaluate(m)
+    def match_candidate(self, text, index, pos):
+        """Match a comment or string at the candidate found at `index`, trying string prefixes before quotes."""
+
+        if self.prefixed and text[index] != '/':
+            for start in range(max(pos, index - 3), index):
+                if RE_STRING_PREFIX.fullmatch(text, start, index):
+                    m = self.pattern.match(text, start)
+                    if m is not None:
+                        return m
+        return super().match_candidate(text, index, pos)
 
     def _filter(self, text, context, encoding):
         """Filter JavaScript comments."""
 
-        content = []
         self.current_encoding = encoding
         self.line_num = 1
         self.prev_line = -1
@@ -437,6 +461,11 @@ class CppFilter(filters.Filter):
         self.line_comments = []
         self.quoted_strings = []
 
+        if not isinstance(text, str):
+            # Sources are yielded as the chunks are read.
+            return self.find_content_stream(text, context)
+
+        content = []
         self.find_content(text)
         self.extend_src(content, context)
 
@@ -445,15 +474,18 @@ class CppFilter(filters.Filter):
     def filter(self, source_file, encoding):  # noqa A001
         """Parse CPP file."""
 
-        with open(source_file, 'r', encoding=encoding, errors='strict') as f:
-            text = f.read()
+        if self.is_very_large_file(source_file):
+            # Comments are gathered and sent one chunk at a time.
+            return self._filter(self.stream_text(source_file, encoding), source_file, encoding)
+
+        text = self.read_text(source_file, encoding)
 
         return self._filter(text, source_file, encoding)
 
     def sfilter(self, source):
         """Filter."""
 
-        return self._filter(source.text, source.context, source.encoding)
+        return self._filter(source.text, source.lazy_context, source.encoding)
 
 
 def get_plugin():
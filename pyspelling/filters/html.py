@@ -8,7 +8,6 @@ import re
 import codecs
 import soupsieve as sv
 from . import xml
-from collections import deque
 
 RE_HTML_ENCODE = re.compile(
     br'''(?xi)
@@ -50,7 +49,8 @@ class HtmlFilter(xml.XmlFilter):
             "break_tags": [],
             "ignores": [],
             "captures": self.default_capture,
-            "namespaces": {}
+            "namespaces": {},
+            "engine": "bs4"
         }
 
     def validate_options(self, k, v):
@@ -74,6 +74,7 @@ class HtmlFilter(xml.XmlFilter):
         self.ignores = sv.compile(ignores, self.config['namespaces']) if ignores.strip() else None
         captures = ','.join(self.config['captures'])
         self.captures = sv.compile(captures, self.config['namespaces']) if captures.strip() else None
+        self.setup_engine()
 
     def header_check(self, content):
         """Special HTML encoding check."""
@@ -108,42 +109,27 @@ class HtmlFilter(xml.XmlFilter):
         else:
             return [c for c in el.attrs.get('class', '').strip().split(' ') if c]
 
-    def format_blocks(self):
-        """Format the text as for a block."""
-
-        block_text = []
-        for el, text in self._block_text.items():
-            content = ''.join(text)
-            if content:
-                block_text.append((content, self.construct_selector(el)))
-        return block_text
-
     def construct_selector(self, el, attr=''):
         """Construct an selector for context."""
 
-        selector = deque()
-        ancestor = el
-        while ancestor and ancestor.parent:
-            if ancestor is not el:
-                selector.appendleft(ancestor.name)
-            else:
-                tag = ancestor.name
-                prefix = ancestor.prefix
-                classes = self.get_classes(ancestor)
-                tag_id = ancestor.attrs.get('id', '').strip()
-                sel = ''
-                if prefix:
-                    sel += prefix + '|'
-                sel += tag
-                if tag_id:
-                    sel += '#' + tag_id
-                if classes:
-                    sel += '.' + '.'.join(classes)
-                if attr:
-                    sel += '[%s]' % attr
-                selector.appendleft(sel)
-            ancestor = ancestor.parent
-        return '>'.join(selector)
+        if el.parent is None:
+            return ''
+
+        tag = el.name
+        prefix = el.prefix
+        classes = self.get_classes(el)
+        tag_id = el.attrs.get('id', '').strip()
+        sel = ''
+        if prefix:
+            sel += prefix + '|'
+        sel += tag
+        if tag_id:
+            sel += '#' + tag_id
+        if classes:
+            sel += '.' + '.'.join(classes)
+        if attr:
+            sel += '[%s]' % attr
+        return self.get_ancestry(el) + sel
 
 
 def get_plugin():
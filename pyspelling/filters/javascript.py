@@ -5,9 +5,24 @@ from .. import filters
 
 RE_JSDOC = re.compile(r"(?s)^/\*\*$(.*?)[ \t]*\*/", re.MULTILINE)
 
-RE_BLOCK_COMMENT = re.compile(r'/\*[^*]*\*+(?:[^/*][^*]*\*+)*/', re.DOTALL | re.MULTILINE)
-RE_COMMENT = re.compile(r'(?P<start>^)?(?P<leading_space>[ \t]*)?(?P<line>//(?:[^\n])*)', re.DOTALL | re.MULTILINE)
-RE_STRING = re.compile(r'''"(?:\\.|[^"\\\n])*"|(?:\\.|[^'\\\n])*''', re.DOTALL | re.MULTILINE)
+# Comments, strings, and templates. Only the opening quote of single quoted strings is matched, so the
+# content of single quoted strings is scanned as code, and double quoted strings that are not terminated
+# run to the next single quote or the end of the line.
+TOKENS = r'''(?x)
+(?P<line>//[^\n]*) |                                        # line comments
+(?P<block>/\*[^*]*\*+(?:[^/*][^*]*\*+)*/) |                 # block comments
+(?P<string>"(?:\\.|[^"\\\n])*"|"(?:\\.|[^'\\\n])*|') |      # strings
+(?P<template>`)                                             # templates
+{}
+'''
+
+RE_TOKENS = re.compile(TOKENS.format(''), re.DOTALL)
+# In the substitutions of templates, braces are matched as well to find where substitutions end.
+RE_TEMPLATE_TOKENS = re.compile(TOKENS.format('| (?P<brace>[{}])'), re.DOTALL)
+
+# Where tokens can start.
+RE_CANDIDATES = re.compile(r'''[/"'`]''')
+RE_TEMPLATE_CANDIDATES = re.compile(r'''[/"'`{}]''')
 RE_TEMPLATE_START = re.compile(r'`((?:\\.|\$(?!\{)|[^`\\$])*)(`|\$\{)', re.DOTALL | re.MULTILINE)
 RE_TEMPLATE_MIDDLE_END = re.compile(r'((?:\\.|\$(?!\{)|[^`\\$])*)(`|\$\{)', re.DOTALL | re.MULTILINE)
 
@@ -178,7 +193,7 @@ class JavaScriptFilter(filters.Filter):
             content.append(
                 filters.SourceText(
                     textwrap.dedent(comment),
-                    "%s (%d)" % (context, line),
+                    filters.LazyContext("%s (%d)", context, line),
                     encoding,
                     prefix + category
                 )
@@ -192,73 +207,89 @@ class JavaScriptFilter(filters.Filter):
         self.extend_src_text(content, context, self.jsdoc_comments, 'docs')
         self.extend_src_text(content, context, self.quoted_strings, 'strings')
 
-    def find_content(self, text, index=0, backtick=False):
-        """Find content."""
+    def evaluate_comment(self, text, start, index, line):
+        """Evaluate a line comment at `start`, `index` is where the search for it began."""
+
+        # Comments with only whitespace before them on their line are inline comments.
+        begin = start
+        while begin > index and text[begin - 1] in ' \t':
+            begin -= 1
+        if begin == 0 or text[begin - 1] == '\n':
+            self.evaluate_inline({'line': line, 'leading_space': text[begin:start]})
+        else:
+            self.evaluate_inline_tail({'line': line})
+
+    def evaluate_template(self, text, index):
+        """Evaluate a template and the code in its substitutions, and return the index after it."""
+
+        m = RE_TEMPLATE_START.match(text, index)
+        if m is None:
+            # Only the backtick of templates that are not terminated is skipped.
+            return index + 1
+
+        backtick_content = []
+        while m:
+            self.line_num += m.group(0).count('\n')
+            content = self.evaluate_strings(m.group(1), True)
+            if content:
+                backtick_content.append(content)
+            index = m.end(0)
+            if m.group(2) != '${':
+                break
+            index = self.find_content(text, index, True)
+            m = RE_TEMPLATE_MIDDLE_END.match(text, index)
+        if backtick_content:
+            self.quoted_strings.append([' '.join(backtick_content), self.line_num, 'utf-8'])
+        return index
 
+    def find_content(self, text, index=0, backtick=False):
+        """
+        Find content.
+
+        The text is searched for where the next comment, string, or template can start, and the lines
+        of the code in between are counted at once. In the substitution of a template (`backtick`), the index
+        after the brace that closes the substitution is returned.
+        """
+
+        if backtick:
+            candidates, pattern = RE_TEMPLATE_CANDIDATES, RE_TEMPLATE_TOKENS
+        else:
+            candidates, pattern = RE_CANDIDATES, RE_TOKENS
         curly_count = 0
-        last = '\n'
-        self.lines_num = 1
-        length = len(text)
-        while index < length:
-            start_index = index
-            c = text[index]
-            if c == '{' and backtick:
-                curly_count += 1
-            elif c == '}' and backtick:
-                if curly_count:
+        pos = index
+        while True:
+            c = candidates.search(text, pos)
+            if c is None:
+                break
+            start = c.start(0)
+            m = pattern.match(text, start)
+            if m is None:
+                pos = start + 1
+                continue
+            self.line_num += text.count('\n', index, start)
+            kind = m.lastgroup
+            if kind == 'brace':
+                if m.group(0) == '{':
+                    curly_count += 1
+                elif curly_count:
                     curly_count -= 1
                 else:
-                    index += 1
-                    return index
-            elif c == '`':
-                done = False
-                first = True
-                backtick_content = []
-                start_index = index
-                while not done:
-                    m = (RE_TEMPLATE_START if first else RE_TEMPLATE_MIDDLE_END).match(text, index)
-                    first = False
-                    if m:
-                        self.line_num += m.group(0).count('\n')
-                        content = self.evaluate_strings(m.group(1), True)
-                        if content:
-                            backtick_content.append(content)
-                        index = m.end(0)
-                        if m.group(2) == '${':
-                            index = self.find_content(text, index, True)
-                        else:
-                            done = True
-                    else:
-                        done = True
-                if backtick_content:
-                    self.quoted_strings.append([' '.join(backtick_content), self.line_num, 'utf-8'])
-            elif c in ('\'', '"'):
-                m = RE_STRING.match(text, index)
-                if m:
-                    self.evaluate_strings(m.group(0)[1:-1])
-                    self.line_num += m.group(0).count('\n')
-                    index = m.end(0)
-            elif c == '\n':
-                self.line_num += 1
-            elif last == '\n' or c == '/':
-                m = RE_COMMENT.match(text, index)
-                if m:
-                    g = m.groupdict()
-                    if g['start'] is None:
-                        self.evaluate_inline_tail(g)
-                    else:
-                        self.evaluate_inline(g)
-                    index = m.end(0)
-                elif c == '/':
-                    m = RE_BLOCK_COMMENT.match(text, index)
-                    if m:
-                        self.evaluate_block(m.group(0))
-                        self.line_num += m.group(0).count('\n')
-                        index = m.end(0)
-
-            if index == start_index:
-                index += 1
-            last = text[index - 1]
+                    return m.end(0)
+            elif kind == 'template':
+                pos = index = self.evaluate_template(text, start)
+                continue
+            elif kind == 'string':
+                self.evaluate_strings(m.group(0)[1:-1])
+                self.line_num += m.group(0).count('\n')
+            elif kind == 'line':
+                self.evaluate_comment(text, start, index, m.group(0))
+            else:
+                self.evaluate_block(m.group(0))
+                self.line_num += m.group(0).count('\n')
+            pos = index = m.end(0)
+
+        self.line_num += text.count('\n', index)
+        return len(text)
 
     def _filter(self, text, context, encoding):
         """Filter JavaScript comments."""
@@ -281,15 +312,14 @@ class JavaScriptFilter(filters.Filter):
     def filter(self, source_file, encoding):  # noqa A001
         """Parse JavaScript file."""
 
-        with open(source_file, 'r', encoding=encoding, errors='strict') as f:
-            text = f.read()
+        text = self.read_text(source_file, encoding)
 
         return self._filter(text, source_file, encoding)
 
     def sfilter(self, source):
         """Filter."""
 
-        return self._filter(source.text, source.context, source.encoding)
+        return self._filter(source.text, source.lazy_context, source.encoding)
 
 
 def get_plugin():
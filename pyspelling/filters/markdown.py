@@ -1,6 +1,53 @@
 """Markdown filter."""
+import itertools
+import re
+import xml.etree.ElementTree as ElementTree
+from html import unescape
 from .. import filters
+from .. import tree
+from . import html
+from lxml import etree
 import markdown
+from markdown import util as md_util
+from markdown.treeprocessors import Treeprocessor
+
+# Fenced code starts with three or more backticks or tildes, the info string of backtick fences can't hold backticks.
+RE_FENCE = re.compile(r'^[ \t]*(?:(`{3,})[^`\n]*|(~{3,}).*)$')
+RE_FRONT_MATTER_END = re.compile(r'^(?:---|\.\.\.)[ \t]*$')
+RE_INDENTED = re.compile(r'^(?: {4}|[ ]{0,3}\t)')
+# Blocks whose indented blocks are continuations, not code: lists, raw HTML, footnotes, definitions, and admonitions.
+RE_CONTAINER = re.compile(r'^[ ]{0,3}(?:[*+-][ \t]|[0-9]+[.)][ \t]|<|\[\^|:[ \t]|!!!|\?\?\?)')
+
+# Options that are passed to the HTML filter when text is extracted from the element tree.
+HTML_OPTIONS = ('comments', 'attributes', 'break_tags', 'ignores', 'captures', 'namespaces')
+
+# Elements whose text is serialized as is.
+RAW_TEXT = ('script', 'style')
+
+# Elements that are placed in the head when they start an HTML document.
+HEAD_TAGS = ('base', 'link', 'meta', 'noscript', 'script', 'style', 'title')
+
+# Entities that are left as is when Markdown serializes text, so they are decoded when the HTML is parsed.
+RE_ENTITY = re.compile(r'&(?:\#[0-9]+|\#x[0-9a-f]+|[0-9a-z]+);', re.I)
+
+
+class TreeCapture(Treeprocessor):
+    """Capture the element tree so that text can be extracted from it directly."""
+
+    def __init__(self, md):
+        """Initialize."""
+
+        super().__init__(md)
+        self.enabled = True
+        self.root = None
+
+    def run(self, root):
+        """Capture the tree and replace it with an empty one, so nothing is serialized."""
+
+        if not self.enabled:
+            return None
+        self.root = root
+        return ElementTree.Element(self.md.doc_tag)
 
 
 class MarkdownFilter(filters.Filter):
@@ -15,12 +62,25 @@ class MarkdownFilter(filters.Filter):
         """Get default configuration."""
 
         return {
-            "markdown_extensions": []
+            "markdown_extensions": [],
+            "strip_front_matter": False,
+            "strip_fenced_code": False,
+            "strip_indented_code": False,
+            "extract_text": False,
+            "comments": True,
+            "attributes": [],
+            "break_tags": [],
+            "ignores": [],
+            "captures": html.HtmlFilter.default_capture,
+            "namespaces": {}
         }
 
     def setup(self):
         """Setup."""
 
+        self.strip_front_matter = self.config['strip_front_matter']
+        self.strip_fenced_code = self.config['strip_fenced_code']
+        self.strip_indented_code = self.config['strip_indented_code']
         extensions = []
         extension_configs = {}
         for item in self.config['markdown_extensions']:
@@ -33,23 +93,269 @@ class MarkdownFilter(filters.Filter):
                     extension_configs[k] = v
         self.markdown = markdown.Markdown(extensions=extensions, extension_configs=extension_configs)
 
+        # When extracting text, the HTML filter does the work. Unless it has to fall back to BeautifulSoup
+        # for the selectors, the element tree is captured after all other tree processors have run and
+        # is handed to the HTML filter's `lxml` engine, so the HTML is never serialized and parsed again.
+        self.html = None
+        self.capture = None
+        if self.config['extract_text']:
+            options = {k: self.config[k] for k in HTML_OPTIONS}
+            options['engine'] = 'lxml'
+            self.html = html.HtmlFilter(options, self.default_encoding)
+            if self.html.engine == 'lxml':
+                self.capture = TreeCapture(self.markdown)
+                self.markdown.treeprocessors.register(self.capture, 'pyspelling_capture', -1000)
+
     def filter(self, source_file, encoding):  # noqa A001
         """Parse Markdown file."""
 
-        with open(source_file, 'r', encoding=encoding, errors='strict') as f:
-            text = f.read()
+        text = self.read_text(source_file, encoding)
+        if self.html is not None:
+            return self.extract(text, source_file, encoding)
         return [filters.SourceText(self._filter(text), source_file, encoding, 'markdown')]
 
     def _filter(self, text):
         """Filter markdown."""
 
         self.markdown.reset()
+        if self.strip_front_matter or self.strip_fenced_code or self.strip_indented_code:
+            text = self.strip_code(text)
         return self.markdown.convert(text)
 
+    def strip_code(self, text):
+        """
+        Blank out the lines of front matter and code blocks before the Markdown is converted.
+
+        Lines are scanned once. Stripped lines are left empty, so the remaining lines don't move.
+        Fences that are never closed are not code, and indented blocks are only code if they follow
+        a blank line and don't continue a list or other container.
+        """
+
+        lines = text.split('\n')
+        start = 0
+        if self.strip_front_matter and lines[0].rstrip() in ('---', '\ufeff---'):
+            for i in range(1, len(lines)):
+                if RE_FRONT_MATTER_END.match(lines[i]):
+                    lines[:i + 1] = [''] * (i + 1)
+                    start = i + 1
+                    break
+
+        fence = None
+        fence_start = 0
+        blank = True
+        container = False
+        code = False
+        for i in range(start, len(lines)):
+            line = lines[i]
+            if fence is not None:
+                # Closing fences use the same character, and are at least as long.
+                stripped = line.strip()
+                if stripped.startswith(fence) and not stripped.strip(fence[0]):
+                    lines[fence_start:i + 1] = [''] * (i + 1 - fence_start)
+                    fence = None
+                    blank = False
+                continue
+
+            if not line.strip():
+                blank = True
+                continue
+
+            if self.strip_indented_code and RE_INDENTED.match(line) and (code or (blank and not container)):
+                lines[i] = ''
+                code = True
+                blank = False
+                continue
+            code = False
+
+            if self.strip_fenced_code:
+                m = RE_FENCE.match(line)
+                if m:
+                    fence = m.group(1) or m.group(2)
+                    fence_start = i
+                    continue
+
+            # Lines indented less than code can start a container, but only unindented lines end one,
+            # as indented lines within a container continue it.
+            if line[0] not in ' \t':
+                container = RE_CONTAINER.match(line) is not None
+            elif not container and not RE_INDENTED.match(line):
+                container = RE_CONTAINER.match(line) is not None
+            blank = False
+        return '\n'.join(lines)
+
+    def extract(self, text, context, encoding):
+        """Extract text from the Markdown like the HTML filter extracts it from the converted HTML."""
+
+        self.html.reset()
+        output = self._filter(text)
+        if self.capture is None:
+            return self.html._filter(output, context, encoding)
+
+        root = self.capture.root
+        self.capture.root = None
+        if root is None:
+            # Markdown doesn't build a tree for empty documents.
+            return self.html._filter(output, context, encoding)
+        try:
+            doc = self.to_document(root)
+        except ValueError:
+            # Text that `lxml` doesn't accept in a tree, such as control characters.
+            doc = None
+        if doc is None:
+            # Only parsing the HTML can tell how it is parsed.
+            self.capture.enabled = False
+            try:
+                output = self._filter(text)
+            finally:
+                self.capture.enabled = True
+            return self.html._filter(output, context, encoding)
+        return self.html.get_sources(*self.html.to_text_lxml(doc), context, encoding)
+
+    def to_document(self, root):
+        """
+        Build the `lxml` document that parsing the serialized HTML would give, or `None` if it can't be built.
+
+        Elements holding placeholders, such as those of stashed raw HTML, are serialized and parsed
+        on their own, see `serialize`.
+        """
+
+        el = etree.Element('html')
+        body = etree.SubElement(el, 'body')
+        self.copy_content(root, body)
+
+        # The serialized HTML is stripped of surrounding whitespace.
+        if body.text:
+            body.text = body.text.lstrip() or None
+        last = body[-1] if len(body) else None
+        if last is not None and last.tail:
+            last.tail = last.tail.rstrip() or None
+        elif last is None and body.text:
+            body.text = body.text.rstrip() or None
+
+        # Comments that start the HTML are placed before the `html` element.
+        while not body.text and len(body) and body[0].tag is etree.Comment:
+            comment = body[0]
+            body.text = comment.tail.lstrip() or None if comment.tail else None
+            comment.tail = None
+            el.addprevious(comment)
+
+        # Elements that can start the HTML in the head are left to the parser.
+        if not body.text and len(body) and body[0].tag in HEAD_TAGS:
+            return None
+        return tree.Document(el, False)
+
+    def copy_content(self, src, dst):
+        """Copy the text and children of a Markdown element to an `lxml` element."""
+
+        self.add_text(dst, src.text, src.tag not in RAW_TEXT)
+        for child in src:
+            tag = child.tag
+            if tag is ElementTree.Comment:
+                dst.append(etree.Comment(child.text))
+            elif tag is ElementTree.ProcessingInstruction:
+                # HTML parsers treat processing instructions as comments.
+                dst.append(etree.Comment(f'?{child.text}?'))
+            elif tag is None:
+                self.copy_content(child, dst)
+            elif self.has_placeholders(child):
+                self.add_html(dst, self.serialize(child))
+            else:
+                # Boolean attributes are serialized without a value in HTML.
+                boolean = self.markdown.output_format == 'html'
+                attrs = {k: '' if boolean and k == v else self.decode(v) for k, v in child.attrib.items()}
+                self.copy_content(child, etree.SubElement(dst, tag, attrs))
+            self.add_text(dst, child.tail)
+
+    @staticmethod
+    def has_placeholders(el):
+        """Check if the text or attributes of an element, or the text after its children, hold placeholders."""
+
+        for text in itertools.chain((el.text,), el.attrib.values(), (child.tail for child in el)):
+            if text and md_util.STX in text:
+                return True
+        return False
+
+    def serialize(self, el):
+        """
+        Serialize an element and run the post processors on it, like Markdown does for the whole document.
+
+        Post processors replace placeholders in the HTML, such as the placeholders of stashed raw HTML.
+        Inline tags of raw HTML are stashed one by one, so they only make sense when they are parsed
+        together with the text around them.
+        """
+
+        tail = el.tail
+        el.tail = None
+        try:
+            output = self.markdown.serializer(el)
+        finally:
+            el.tail = tail
+        for processor in self.markdown.postprocessors:
+            output = processor.run(output)
+        return output
+
+    def get_stash(self, key):
+        """Get stashed raw HTML as a string, with the raw HTML nested in it restored, or `None` if there is none."""
+
+        stash = self.markdown.htmlStash
+        if key >= stash.html_counter or 'raw_html' not in self.markdown.postprocessors:
+            return None
+        processor = self.markdown.postprocessors['raw_html']
+        return processor.run(processor.stash_to_string(stash.rawHtmlBlocks[key]))
+
+    def add_text(self, dst, text, decode=True):
+        """Add text to the end of an element, restoring stashed raw HTML."""
+
+        if not text:
+            return
+        index = 0
+        for m in md_util.HTML_PLACEHOLDER_RE.finditer(text):
+            stashed = self.get_stash(int(m.group(1)))
+            if stashed is not None:
+                self.append_text(dst, self.decode(text[index:m.start()]) if decode else text[index:m.start()])
+                self.add_html(dst, stashed)
+                index = m.end()
+        self.append_text(dst, self.decode(text[index:]) if decode else text[index:])
+
+    def append_text(self, dst, text):
+        """Append text to the end of an element."""
+
+        if not text:
+            return
+        last = dst[-1] if len(dst) else None
+        if last is None:
+            dst.text = (dst.text or '') + text
+        else:
+            last.tail = (last.tail or '') + text
+
+    def add_html(self, dst, raw):
+        """Parse raw HTML and add it to the end of an element."""
+
+        parser = etree.HTMLParser(recover=True, huge_tree=True)
+        try:
+            body = etree.fromstring(f'<html><body>{raw}</body></html>', parser).find('body')
+        except (etree.LxmlError, ValueError):
+            body = None
+        if body is None:
+            return
+        self.append_text(dst, body.text)
+        for child in list(body):
+            dst.append(child)
+
+    @staticmethod
+    def decode(text):
+        """Decode text like it is decoded when the serialized HTML is parsed."""
+
+        if '&' in text:
+            text = RE_ENTITY.sub(lambda m: unescape(m.group(0)), text)
+        return text
+
     def sfilter(self, source):
         """Filter."""
 
-        return [filters.SourceText(self._filter(source.text), source.context, source.encoding, 'markdown')]
+        if self.html is not None:
+            return self.extract(source.text, source.lazy_context, source.encoding)
+        return [filters.SourceText(self._filter(source.text), source.lazy_context, source.encoding, 'markdown')]
 
 
 def get_plugin():
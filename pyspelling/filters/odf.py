@@ -6,7 +6,6 @@ Parse the `text` namespace in `content.xml` in ODF zip files.
 import zipfile
 import io
 import bs4
-import codecs
 from .. import filters
 from . import xml
 from wcmatch import glob
@@ -23,6 +22,8 @@ class OdfFilter(xml.XmlFilter):
     """Spelling Python."""
 
     FLAGS = glob.G | glob.N | glob.B | glob.S | glob.O
+    SKIP_BINARY = False
+    ACCEPTS_BINARY = True
 
     default_capture = ['text|*']
 
@@ -51,6 +52,7 @@ class OdfFilter(xml.XmlFilter):
         }
         self.ignores = None
         self.captures = sv.compile(','.join(self.default_capture), self.namespaces)
+        self.setup_indexes()
 
     def has_bom(self, filestream):
         """Check if has BOM."""
@@ -68,28 +70,52 @@ class OdfFilter(xml.XmlFilter):
         """Determine file type."""
 
         mimetype = z.read('mimetype').decode('utf-8').strip()
-        self.type = MIMEMAP[mimetype]
+        self.set_file_type(MIMEMAP[mimetype])
+
+    def set_file_type(self, file_type):
+        """Set the file type."""
+
+        self.type = file_type
 
     def get_zip_content(self, filename):
-        """Get zip content."""
+        """
+        Get zip content.
+
+        Very large parts are not read at once, but opened, so they can be streamed.
+        """
 
         with zipfile.ZipFile(filename, 'r') as z:
             self.determine_file_type(z)
+            stream = self.can_stream()
             for item in z.infolist():
                 if glob.globmatch(item.filename, self.filepattern, flags=self.FLAGS):
-                    yield z.read(item.filename), item.filename
+                    if stream and self._is_very_large(item.file_size):
+                        with z.open(item) as f:
+                            yield f, item.filename
+                    else:
+                        yield z.read(item.filename), item.filename
 
     def get_content(self, zipbundle):
-        """Get content."""
+        """
+        Get content.
+
+        The content of very large parts is an iterator of decoded chunks of text.
+        """
 
         for content, filename in self.get_zip_content(zipbundle):
-            with io.BytesIO(content) as b:
-                encoding = self._analyze_file(b)
+            if not isinstance(content, bytes):
+                encoding = self._analyze_file(content)
                 if encoding is None:
                     encoding = self.default_encoding
-                b.seek(0)
-                text = b.read().decode(encoding)
-            yield text, filename, encoding
+                chunks = self.stream_decode(content, encoding, normalize_newlines=False, split_lines=False)
+                yield chunks, filename, encoding
+                continue
+
+            with io.BytesIO(content) as b:
+                encoding = self._analyze_file(b)
+            if encoding is None:
+                encoding = self.default_encoding
+            yield str(content, encoding), filename, encoding
 
     def is_break_tag(self, el):
         """Break on specified boundaries."""
@@ -106,16 +132,12 @@ class OdfFilter(xml.XmlFilter):
         if el.name == 'p' and el.namespace and el.namespace == self.namespaces["text"]:
             text.append('\n')
 
-    def format_blocks(self):
+    def format_block(self, el, text):
         """Format the text as for a block."""
 
-        block_text = []
-        for el, text in self._block_text.items():
-            self.soft_break(el, text)
-            content = ''.join(text)
-            if content:
-                block_text.append((content, self.additional_context + self.construct_selector(el)))
-        return block_text
+        self.soft_break(el, text)
+        content = ''.join(text)
+        return (content, self.additional_context + self.construct_selector(el)) if content else None
 
     def extract_tag_metadata(self, el):
         """Extract meta data."""
@@ -146,42 +168,60 @@ class OdfFilter(xml.XmlFilter):
     def _filter(self, text, context, encoding):
         """Filter the source text."""
 
-        content = []
+        if not isinstance(text, str):
+            return self.stream(text, context, encoding)
+
         soup = bs4.BeautifulSoup(text, self.parser)
         soup = self.get_sub_node(soup)
         blocks, attributes, comments = self.to_text(soup)
-        if self.comments:
-            for c, desc in comments:
-                content.append(filters.SourceText(c, context + ': ' + desc, encoding, self.type + 'comment'))
-        if self.attributes:
-            for a, desc in attributes:
-                content.append(filters.SourceText(a, context + ': ' + desc, encoding, self.type + 'attribute'))
-        for b, desc in blocks:
-            content.append(filters.SourceText(b, context + ': ' + desc, encoding, self.type + 'content'))
-        return content
+        return self.get_sources(blocks, attributes, comments, context, encoding)
 
     def filter(self, source_file, encoding):  # noqa A001
         """Parse XML file."""
 
-        sources = []
-        if encoding:
-            with codecs.open(source_file, 'r', encoding=encoding) as f:
-                src = f.read()
-            sources.extend(self._filter(src, source_file, encoding))
-        else:
-            for content, _filename, enc in self.get_content(source_file):
-                sources.extend(self._filter(content, source_file, enc))
-        return sources
+        # Very large zip files are not detected as such, so they are given the default encoding.
+        if encoding and not (self.is_very_large_file(source_file) and zipfile.is_zipfile(source_file)):
+            src = self.read_text(source_file, encoding, normalize_newlines=False)
+            return self._filter(src, source_file, encoding)
+        return self.filter_zip(source_file)
+
+    def filter_zip(self, source_file):
+        """Filter the parts of a zip file, lazily so very large parts can be streamed."""
+
+        yield from self.filter_parts(source_file, source_file)
+
+    def filter_part(self, content, filename, context, encoding):
+        """Filter a part of the package."""
+
+        return self._filter(content, context, encoding)
+
+    def filter_parts(self, zipbundle, context):
+        """Filter the parts of a package in order."""
+
+        for content, filename, enc in self.get_content(zipbundle):
+            yield from self.filter_part(content, filename, context, enc)
 
     def sfilter(self, source):
         """Filter."""
 
         sources = []
-        if source.text[:4].encode(source.encoding) != b'PK\x03\x04':
-            sources.extend(self._filter(source.text, source.context, source.encoding))
+        text = source.text
+        if source._is_bytes():
+            header = bytes(text[:4])
+        else:
+            header = text[:4].encode(source.encoding)
+        if header != b'PK\x03\x04':
+            encoding = source.encoding
+            if not isinstance(text, str):
+                if not encoding:
+                    with filters.BufferReader(text) as b:
+                        encoding = self._analyze_file(b) or self.default_encoding
+                text = str(text, encoding)
+            sources.extend(self._filter(text, source.lazy_context, encoding))
         else:
-            for content, _filename, enc in self.get_content(io.BytesIO(source.text.encode(source.encoding))):
-                sources.extend(self._filter(content, source.context, enc))
+            # Binary content is opened in place, and parts are only read as they are filtered.
+            with self.binary_stream(source) as f:
+                sources.extend(self.filter_parts(f, source.lazy_context))
         return sources
 
 
@@ -5,12 +5,16 @@ Extract text from `docx`, `pptx`, and `xlsx` files.
 
 Specification: http://officeopenxml.com
 """
-import io
-import bs4
 from . import odf
+import os
 import re
+import multiprocessing
+import weakref
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from .. import filters
 import soupsieve as sv
+from lxml import etree
 
 DOC_PARAMS = {
     'docx': {
@@ -33,12 +37,33 @@ DOC_PARAMS = {
 RE_SLIDE = re.compile(r'ppt/(?:slides|slideMasters)/(slide(?:Master)?\d+)\.xml', re.I)
 RE_DOCS = re.compile(r'word/(document|header\d+|footer\d+|footnotes|endnotes)\.xml')
 
+# `[Content_Types].xml` only needs its `Override` elements, so it is parsed without building a soup.
+CONTENT_TYPES_PARSER = etree.XMLParser(recover=True, resolve_entities=False, no_network=True)
+
 MIMEMAP = {
     'word': 'docx',
     'xl': 'xlsx',
     'ppt': 'pptx'
 }
 
+# The filter that parses parts in a worker process.
+_part_filter = None
+
+
+def _init_part_worker(plugin, options, default_encoding):
+    """Create the filter that parses parts in a worker process."""
+
+    global _part_filter
+    _part_filter = plugin(options, default_encoding)
+
+
+def _filter_part(file_type, content, filename, context, encoding):
+    """Filter a part of a package in a worker process."""
+
+    _part_filter.reset()
+    _part_filter.set_file_type(file_type)
+    return list(_part_filter.filter_part(content, filename, context, encoding))
+
 
 class OoxmlFilter(odf.OdfFilter):
     """Spelling Python."""
@@ -51,11 +76,22 @@ class OoxmlFilter(odf.OdfFilter):
     def get_default_config(self):
         """Get default configuration."""
 
-        return {}
+        return {
+            'jobs': 1
+        }
+
+    def validate_options(self, k, v):
+        """Validate options."""
+
+        super().validate_options(k, v)
+        if k == 'jobs' and v < 0:
+            raise ValueError(f"{self.__class__.__name__}: '{v}' is not a valid value for '{k}'")
 
     def setup(self):
         """Setup."""
 
+        self.jobs = int(self.config['jobs']) or os.cpu_count() or 1
+        self.pool = None
         self.additional_context = ''
         self.comments = False
         self.attributes = []
@@ -92,25 +128,27 @@ class OoxmlFilter(odf.OdfFilter):
     def determine_file_type(self, z):
         """Determine file type."""
 
-        content = z.read('[Content_Types].xml')
-        with io.BytesIO(content) as b:
-            encoding = self._analyze_file(b)
-            if encoding is None:
-                encoding = 'utf-8'
-            b.seek(0)
-            text = b.read().decode(encoding)
-            soup = bs4.BeautifulSoup(text, 'xml')
-            for o in soup.find_all('Override'):
-                name = o.attrs.get('PartName')
+        file_type = None
+        root = etree.fromstring(z.read('[Content_Types].xml'), CONTENT_TYPES_PARSER)
+        if root is not None:
+            for o in root.iter('{*}Override'):
+                name = o.get('PartName', '')
                 for k, v in MIMEMAP.items():
                     if name.startswith(f'/{k}/'):
-                        self.type = v
+                        file_type = v
                         break
-                if self.type:
+                if file_type:
                     break
+        self.set_file_type(file_type)
+
+    def set_file_type(self, file_type):
+        """Set the file type."""
+
+        self.type = file_type
         self.filepattern = DOC_PARAMS[self.type]['filepattern']
         self.namespaces = DOC_PARAMS[self.type]['namespaces']
         self.captures = sv.compile(DOC_PARAMS[self.type]['captures'], DOC_PARAMS[self.type]['namespaces'])
+        self.setup_indexes()
 
     def soft_break(self, el, text):
         """Apply soft break."""
@@ -147,19 +185,84 @@ class OoxmlFilter(odf.OdfFilter):
     def filter(self, source_file, encoding):  # noqa A001
         """Parse XML file."""
 
-        sources = []
-        for content, filename, enc in self.get_content(source_file):
-            self.additional_context = self.get_context(filename)
-            sources.extend(self._filter(content, source_file, enc))
-        return sources
+        return self.filter_zip(source_file)
+
+    def filter_part(self, content, filename, context, encoding):
+        """Filter a part of the package."""
+
+        self.additional_context = self.get_context(filename)
+        return self._filter(content, context, encoding)
+
+    def get_pool(self):
+        """
+        Get the pool of worker processes that parse parts.
+
+        The pool is created the first time a package has more than one part, and is reused for
+        every package after that. It is shut down once the filter is discarded.
+        """
+
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.jobs,
+                initializer=_init_part_worker,
+                initargs=(type(self), self.config, self.default_encoding)
+            )
+            weakref.finalize(self, self.pool.shutdown, cancel_futures=True)
+        return self.pool
+
+    def filter_parts(self, zipbundle, context):
+        """
+        Filter the parts of a package in order.
+
+        If `jobs` is greater than one, parts are parsed by the filter's pool of worker processes once a
+        package has more than one part. Streamed parts are always filtered here. Files that are already
+        checked in a worker process of parallel jobs are filtered here as well.
+        """
+
+        if self.jobs == 1 or multiprocessing.parent_process() is not None:
+            yield from super().filter_parts(zipbundle, context)
+            return
+
+        pool = None
+        pending = deque()
+        try:
+            for content, filename, enc in self.get_content(zipbundle):
+                if not isinstance(content, str):
+                    while pending:
+                        yield from self.get_part_result(pending.popleft())
+                    yield from self.filter_part(content, filename, context, enc)
+                    continue
+
+                pending.append((self.type, content, filename, context, enc))
+                if pool is None and len(pending) > 1:
+                    pool = self.get_pool()
+                    pending = deque(pool.submit(_filter_part, *part) for part in pending)
+                elif pool is not None:
+                    pending[-1] = pool.submit(_filter_part, *pending[-1])
+                    if len(pending) > self.jobs * 2:
+                        yield from self.get_part_result(pending.popleft())
+            while pending:
+                yield from self.get_part_result(pending.popleft())
+        finally:
+            # The pool outlives the package, so don't leave parts of an abandoned package queued.
+            for part in pending:
+                if not isinstance(part, tuple):
+                    part.cancel()
+
+    def get_part_result(self, part):
+        """Get the sources of a part that was submitted to the pool, or filter it here if it was not."""
+
+        if isinstance(part, tuple):
+            return self.filter_part(*part[1:])
+        return part.result()
 
     def sfilter(self, source):
         """Filter."""
 
         sources = []
-        for content, filename, enc in self.get_content(io.BytesIO(source.text.encode(source.encoding))):
-            self.additional_context = self.get_context(filename)
-            sources.extend(self._filter(content, source.context, enc))
+        # Binary content is opened in place, and parts are only read as they are filtered.
+        with self.binary_stream(source) as f:
+            sources.extend(self.filter_parts(f, source.lazy_context))
         return sources
 
 
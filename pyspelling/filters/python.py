@@ -4,12 +4,14 @@ Python filter.
 Parse Python docstrings.
 """
 from .. import filters
+import ast
 import re
 import textwrap
 import tokenize
 import io
 import unicodedata
 import sys
+import warnings
 
 FSTR_TOKENIZE = (3, 12) <= sys.version_info
 TSTR_TOKENIZE = (3, 14) <= sys.version_info
@@ -78,6 +80,22 @@ RE_VALID_STRING_TYPES = re.compile(r'^(?:\*|(?:[rubft]\*?)+)$', re.I)
 
 RE_ITER_STRING_TYPES = re.compile(r'(\*|[rubft]\*?)', re.I)
 
+# A string token at the start of a statement, and the full token.
+RE_STRING_START = re.compile(r'''[rbuftRBUFT]{0,2}['"]''')
+RE_STRING_TOKEN = re.compile(r'''[rbuftRBUFT]{0,2}(\'\'\'|"""|'|")(?:\\.|[^\\])*?\1''', re.S)
+
+# Line breaks the tokenizer and the parser count differently.
+RE_ODD_BREAKS = re.compile(r'\r(?!\n)|[\f\v]')
+
+STRING_NODES = (ast.JoinedStr, ast.TemplateStr) if hasattr(ast, 'TemplateStr') else (ast.JoinedStr,)
+DEF_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+TRY_NODES = (ast.Try, ast.TryStar) if hasattr(ast, 'TryStar') else (ast.Try,)
+
+
+class Fallback(Exception):
+    """Raised when the fast path for docstrings can't be sure to find what the tokenizer would find."""
+
+
 FMT_STR = (
     'f', 'F',
     'fr', 'rf',
@@ -264,9 +282,198 @@ class PythonFilter(filters.Filter):
                 same_level = True
         return same_level
 
+    def find_docstrings(self, text, context):
+        """
+        Find docstrings from the syntax tree instead of the tokens, or return `None` if the tokens are needed.
+
+        The tokenizer treats a string at the start of a logical line as a docstring when it follows a `NEWLINE`,
+        `INDENT`, or `DEDENT`, and the function and class ancestry is tracked by indentation. The syntax tree gives
+        the same results as long as blocks are indented by four more characters than their header, functions and
+        classes don't start their body on the line of their header, and statements don't start on continued lines,
+        so the tree is only used then.
+        """
+
+        if RE_ODD_BREAKS.search(text) is not None:
+            return None
+        try:
+            # Invalid escapes and the like are reported as warnings, which the tokenizer never did.
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                tree = ast.parse(text)
+        except (SyntaxError, ValueError, RecursionError):
+            return None
+
+        self.text = text
+        self.lines = text.split('\n')
+        self.offsets = [0]
+        for line in self.lines:
+            self.offsets.append(self.offsets[-1] + len(line) + 1)
+
+        docstrings = []
+        try:
+            self.walk_block(tree.body, context, '', self.MODULE, None, docstrings)
+        except (Fallback, RecursionError):
+            return None
+        return docstrings
+
+    def starts_line(self, node):
+        """Check if a statement is the first thing on its line."""
+
+        if self.lines[node.lineno - 1][:node.col_offset].strip():
+            return False
+        if node.lineno > 1 and self.lines[node.lineno - 2].rstrip('\r').endswith('\\'):
+            # The statement may be on a continued line.
+            raise Fallback
+        return True
+
+    def follows_newline(self, node, previous):
+        """
+        Check if a statement follows a `NEWLINE` and not an `NL`.
+
+        Blank lines after the previous logical line give an `NL`, unless a comment comes first.
+        Only comments and blank lines, or the end of the previous statement, can come after the
+        line the previous statement ends on.
+        """
+
+        first = None
+        line_num = node.lineno - 1
+        stop = previous.end_lineno if previous is not None else 0
+        while line_num > stop:
+            line = self.lines[line_num - 1].strip()
+            if line and not line.startswith('#'):
+                break
+            first = line
+            line_num -= 1
+        return first is None or first != ''
+
+    def ends_deeper(self, node):
+        """Check if a statement ends with an indented block, so a `DEDENT` follows it."""
+
+        blocks = self.get_blocks(node)
+        if not blocks:
+            return False
+        block = blocks[-1][0]
+        if self.is_elif(node, block):
+            return self.ends_deeper(block[0])
+        return self.starts_line(block[0])
+
+    @staticmethod
+    def is_elif(node, block):
+        """Check if a block is an `elif` of an `if` statement."""
+
+        return (
+            isinstance(node, ast.If) and block is node.orelse and
+            isinstance(block[0], ast.If) and block[0].col_offset == node.col_offset
+        )
+
+    @staticmethod
+    def get_blocks(node):
+        """Get the non-empty blocks of a statement, in order, with the node of their header."""
+
+        if not hasattr(node, 'body'):
+            return []
+        if isinstance(node, (ast.If, ast.For, ast.AsyncFor, ast.While)):
+            blocks = [(node.body, node), (node.orelse, node)]
+        elif isinstance(node, (ast.With, ast.AsyncWith) + DEF_NODES):
+            blocks = [(node.body, node)]
+        elif isinstance(node, TRY_NODES):
+            blocks = [(node.body, node)]
+            blocks.extend((handler.body, handler) for handler in node.handlers)
+            blocks.extend([(node.orelse, node), (node.finalbody, node)])
+        else:
+            # Statements that have blocks that can't be followed, such as `match`.
+            raise Fallback
+        return [block for block in blocks if block[0]]
+
+    def walk_block(self, block, context, crumbs, parent, indent, docstrings):
+        """Find the docstrings in a block of statements, whose first statement follows an `INDENT` if indented."""
+
+        for index, node in enumerate(block):
+            if (
+                RE_STRING_START.match(self.lines[node.lineno - 1], node.col_offset) is not None and
+                self.starts_line(node)
+            ):
+                if index:
+                    previous = block[index - 1]
+                    is_doc = self.ends_deeper(previous) or self.follows_newline(node, previous)
+                else:
+                    is_doc = indent is not None or self.follows_newline(node, None)
+                if is_doc:
+                    self.add_docstring(node, context, crumbs, docstrings)
+
+            if isinstance(node, DEF_NODES):
+                if self.check_header(node):
+                    self.walk_block(node.body, context, crumbs, parent, node.col_offset, docstrings)
+                    continue
+                prefix = ''
+                if parent != self.MODULE:
+                    prefix = '.' if parent == self.CLASS else ', '
+                if isinstance(node, ast.ClassDef):
+                    crumb, kind = f'{prefix}{node.name}', self.CLASS
+                else:
+                    crumb, kind = f'{prefix}{node.name}()', self.FUNCTION
+                self.walk_block(node.body, context, crumbs + crumb, kind, node.col_offset, docstrings)
+                continue
+
+            for body, header in self.get_blocks(node):
+                if self.is_elif(node, body):
+                    # `elif` is not indented, so it is walked like a statement at the level of the `if`.
+                    self.walk_block(body, context, crumbs, parent, indent, docstrings)
+                elif self.starts_line(body[0]):
+                    if body[0].col_offset != header.col_offset + 4:
+                        raise Fallback
+                    self.walk_block(body, context, crumbs, parent, header.col_offset, docstrings)
+
+    def check_header(self, node):
+        """
+        Check that a function or class starts its body on a new line, indented by four, and if its header has strings.
+
+        A string in the header is on the same level as the function or class, which drops it from the ancestry.
+        """
+
+        body = node.body[0]
+        if not self.starts_line(body) or body.col_offset != node.col_offset + 4:
+            raise Fallback
+        start = self.offsets[node.lineno - 1] + node.col_offset
+        end = self.offsets[body.lineno - 1]
+        if self.text.find('"', start, end) == -1 and self.text.find("'", start, end) == -1:
+            return False
+        header = [node.returns, node.args] if not isinstance(node, ast.ClassDef) else node.bases + node.keywords
+        header.extend(getattr(node, 'type_params', []))
+        for child in header:
+            if child is None:
+                continue
+            for item in ast.walk(child):
+                if (
+                    isinstance(item, STRING_NODES) or
+                    (isinstance(item, ast.Constant) and isinstance(item.value, (str, bytes)))
+                ):
+                    return True
+        return False
+
+    def add_docstring(self, node, context, crumbs, docstrings):
+        """Add the string that starts a statement as a docstring."""
+
+        m = RE_STRING_TOKEN.match(self.text, self.offsets[node.lineno - 1] + node.col_offset)
+        if m is None:
+            raise Fallback
+        value = m.group(0)
+        if (FSTR_TOKENIZE or TSTR_TOKENIZE) and self.get_string_type(value[:m.start(1) - m.start(0)]) & {'f', 't'}:
+            # Formatted docstrings are split into several tokens.
+            raise Fallback
+        string, _is_bytes = self.process_strings(value, docstrings=True)
+        if string:
+            loc = filters.LazyContext("%s(%s): %s", context, str(node.lineno), crumbs)
+            docstrings.append(filters.SourceText(string, loc, 'utf-8', 'py-docstring'))
+
     def _filter(self, text, context, encoding):
         """Retrieve the Python docstrings."""
 
+        if self.docstrings and not self.comments and not self.strings:
+            docstrings = self.find_docstrings(text, context)
+            if docstrings is not None:
+                return docstrings
+
         docstrings = []
         strings = []
         comments = []
@@ -325,9 +532,11 @@ class PythonFilter(filters.Filter):
                     comments[-1][2] = line_num
                 else:
                     if len(stack) > 1:
-                        loc = "{}({}): {}".format(stack[0][0], line, ''.join([crumb[0] for crumb in stack[1:]]))
+                        loc = filters.LazyContext(
+                            "%s(%s): %s", stack[0][0], line, ''.join([crumb[0] for crumb in stack[1:]])
+                        )
                     else:
-                        loc = f"{stack[0][0]}({line})"
+                        loc = filters.LazyContext("%s(%s)", stack[0][0], line)
                     comments.append([value[1:], loc, line_num])
 
             if (
@@ -345,7 +554,9 @@ class PythonFilter(filters.Filter):
                         docstrings=dstr
                     )
                     if string:
-                        loc = "{}({}): {}".format(stack[0][0], line, ''.join([crumb[0] for crumb in stack[1:]]))
+                        loc = filters.LazyContext(
+                            "%s(%s): %s", stack[0][0], line, ''.join([crumb[0] for crumb in stack[1:]])
+                        )
                         strings.append(filters.SourceText(string, loc, 'utf-8', 'py-string'))
 
             if token_type == tokenize.STRING:
@@ -359,7 +570,9 @@ class PythonFilter(filters.Filter):
                         value = value.strip()
                         string, _is_bytes = self.process_strings(value, docstrings=True)
                         if string:
-                            loc = "{}({}): {}".format(stack[0][0], line, ''.join([crumb[0] for crumb in stack[1:]]))
+                            loc = filters.LazyContext(
+                                "%s(%s): %s", stack[0][0], line, ''.join([crumb[0] for crumb in stack[1:]])
+                            )
                             docstrings.append(
                                 filters.SourceText(string, loc, 'utf-8', 'py-docstring')
                             )
@@ -367,7 +580,9 @@ class PythonFilter(filters.Filter):
                     value = value.strip()
                     string, _is_bytes = self.process_strings(value)
                     if string:
-                        loc = "{}({}): {}".format(stack[0][0], line, ''.join([crumb[0] for crumb in stack[1:]]))
+                        loc = filters.LazyContext(
+                            "%s(%s): %s", stack[0][0], line, ''.join([crumb[0] for crumb in stack[1:]])
+                        )
                         strings.append(filters.SourceText(string, loc, 'utf-8', 'py-string'))
 
             if token_type == tokenize.INDENT:
@@ -396,13 +611,12 @@ class PythonFilter(filters.Filter):
     def filter(self, source_file, encoding):  # noqa A001
         """Parse Python file returning content."""
 
-        with open(source_file, 'r', encoding=encoding, errors='strict') as f:
-            return self._filter(f.read(), source_file, encoding)
+        return self._filter(self.read_text(source_file, encoding), source_file, encoding)
 
     def sfilter(self, source):
         """Filter."""
 
-        return self._filter(source.text, source.context, source.encoding)
+        return self._filter(source.text, source.lazy_context, source.encoding)
 
 
 def get_plugin():
@@ -11,9 +11,6 @@ TARGETS = r'''(?x)
 (?P<strings>
     "(?:\\.|[^"\\\n])*" |                     # double quotes
     '(?:\\.|[^'\\\n])*'                       # single quotes
-) |
-(?P<code>
-    .[^/"' \t\n]*?                            # everything else
 )
 '''
 
@@ -22,6 +19,13 @@ INLINE_COMMENTS = r'| (?P<start>^)?(?P<leading_space>[ \t]*)?(?P<line>//(?:[^\n]
 RE_CSS = re.compile(TARGETS.format(''), re.DOTALL | re.MULTILINE)
 RE_SCSS = re.compile(TARGETS.format(INLINE_COMMENTS), re.DOTALL | re.MULTILINE)
 
+# Where comments and strings can start (before leading whitespace).
+RE_CANDIDATES = re.compile(r'''//|/\*|["']''')
+
+# Comments and strings that are not terminated before the end of the text (used to detect comments
+# and strings that are cut off when streaming): block comments and strings that run to the end of the text.
+RE_OPEN = re.compile(r'''/\*|["'](?=(?:\\.|[^\\\n])*\Z)''', re.DOTALL)
+
 CSS = 0
 SASS = 1
 SCSS = 2
@@ -33,7 +37,7 @@ STYLESHEET_TYPE = {
 }
 
 
-class StylesheetsFilter(filters.Filter):
+class StylesheetsFilter(filters.CodeFilter):
     """Stylesheets filter."""
 
     def __init__(self, options, default_encoding='utf-8'):
@@ -68,6 +72,8 @@ class StylesheetsFilter(filters.Filter):
         self.stylesheets = STYLESHEET_TYPE.get(self.config['stylesheets'].lower(), CSS)
         self.prefix = next(k for k, v in STYLESHEET_TYPE.items() if v == SASS)
         self.pattern = RE_CSS if self.stylesheets == CSS else RE_SCSS
+        self.open_pattern = RE_OPEN
+        self.candidates = RE_CANDIDATES
 
     def evaluate_block(self, groups):
         """Evaluate block comments."""
@@ -106,8 +112,6 @@ class StylesheetsFilter(filters.Filter):
         g = m.groupdict()
         if g["strings"]:
             self.line_num += g['strings'].count('\n')
-        elif g["code"]:
-            self.line_num += g["code"].count('\n')
         else:
             if g['block']:
                 self.evaluate_block(g)
@@ -127,7 +131,7 @@ class StylesheetsFilter(filters.Filter):
             content.append(
                 filters.SourceText(
                     textwrap.dedent(comment),
-                    "%s (%d)" % (context, line),
+                    filters.LazyContext("%s (%d)", context, line),
                     encoding,
                     prefix + category
                 )
@@ -139,23 +143,23 @@ class StylesheetsFilter(filters.Filter):
         self.extend_src_text(content, context, self.block_comments, 'block-comment')
         self.extend_src_text(content, context, self.line_comments, 'line-comment')
 
-    def find_content(self, text):
-        """Find content."""
-
-        for m in self.pattern.finditer(self.norm_nl(text)):
-            self.evaluate(m)
-
     def _filter(self, text, context, encoding):
         """Filter JavaScript comments."""
 
-        content = []
         self.current_encoding = encoding
         self.line_num = 1
         self.prev_line = -1
         self.leading = ''
         self.block_comments = []
         self.line_comments = []
+        # Strings are skipped, so none are ever found.
+        self.quoted_strings = []
+
+        if not isinstance(text, str):
+            # Sources are yielded as the chunks are read.
+            return self.find_content_stream(text, context)
 
+        content = []
         self.find_content(text)
         self.extend_src(content, context)
 
@@ -164,15 +168,18 @@ class StylesheetsFilter(filters.Filter):
     def filter(self, source_file, encoding):  # noqa A001
         """Parse stylesheet file."""
 
-        with open(source_file, 'r', encoding=encoding, errors='strict') as f:
-            text = f.read()
+        if self.is_very_large_file(source_file):
+            # Comments are gathered and sent one chunk at a time.
+            return self._filter(self.stream_text(source_file, encoding), source_file, encoding)
+
+        text = self.read_text(source_file, encoding)
 
         return self._filter(text, source_file, encoding)
 
     def sfilter(self, source):
         """Filter."""
 
-        return self._filter(source.text, source.context, source.encoding)
+        return self._filter(source.text, source.lazy_context, source.encoding)
 
 
 def get_plugin():
@@ -7,6 +7,8 @@ import unicodedata
 class TextFilter(filters.Filter):
     """Spelling Text."""
 
+    SPLIT_SAFE = True
+
     def __init__(self, options, default_encoding='utf-8'):
         """Initialization."""
 
@@ -65,19 +67,28 @@ class TextFilter(filters.Filter):
     def filter(self, source_file, encoding):  # noqa A001
         """Open and filter the file from disk."""
 
-        with codecs.open(source_file, 'r', encoding=encoding, errors='strict') as f:
-            text = f.read()
+        if self.is_very_large_file(source_file):
+            return self.stream(source_file, encoding)
+
+        text = self.read_text(source_file, encoding, normalize_newlines=False)
 
         text, encoding = self.convert(text, encoding)
 
         return [filters.SourceText(text, source_file, encoding, 'text')]
 
+    def stream(self, source_file, encoding):
+        """Filter a very large file one chunk at a time."""
+
+        for text, context in self.stream_lines(source_file, encoding, normalize_newlines=False):
+            text, enc = self.convert(text, encoding)
+            yield filters.SourceText(text, context, enc, 'text')
+
     def sfilter(self, source):
         """Execute filter."""
 
         text, encoding = self.convert(source.text, source.encoding)
 
-        return [filters.SourceText(text, source.context, encoding, 'text')]
+        return [filters.SourceText(text, source.lazy_context, encoding, 'text')]
 
 
 def get_plugin():
@@ -27,10 +27,16 @@ RE_LINK = re.compile(
     '''
 )
 
+# Links can't be found without `://` or `www.`, and emails can't be found without `@`.
+RE_LINK_HINT = re.compile(r'://|[wW]{3}\.')
+RE_MAIL_HINT = re.compile(r'@')
+
 
 class URLFilter(filters.Filter):
     """URL filter."""
 
+    SPLIT_SAFE = True
+
     def __init__(self, options, default_encoding='utf-8'):
         """Initialization."""
 
@@ -54,23 +60,59 @@ class URLFilter(filters.Filter):
         """Filter out the URL and email addresses."""
 
         if self.urls:
-            text = RE_LINK.sub('', text)
+            text = self.remove(RE_LINK, RE_LINK_HINT, text)
         if self.emails:
-            text = RE_MAIL.sub('', text)
+            text = self.remove(RE_MAIL, RE_MAIL_HINT, text)
         return text
 
+    @staticmethod
+    def remove(pattern, hint, text):
+        """
+        Remove the matches of a pattern from the lines where its hint is found.
+
+        Links and emails can't span lines, so lines without the hint are left as they are and
+        the pattern is only applied to the lines with it.
+        """
+
+        m = hint.search(text)
+        if m is None:
+            return text
+
+        parts = []
+        last = 0
+        while m is not None:
+            start = text.rfind('\n', last, m.start(0)) + 1
+            end = text.find('\n', m.end(0))
+            if end == -1:
+                end = len(text)
+            parts.append(text[last:start])
+            parts.append(pattern.sub('', text[start:end]))
+            last = end
+            m = hint.search(text, end)
+        parts.append(text[last:])
+        return ''.join(parts)
+
     def filter(self, source_file, encoding):  # noqa A001
         """Open and filter the file from disk."""
 
-        with open(source_file, 'r', encoding=encoding, errors='strict') as f:
-            text = f.read()
+        if self.is_very_large_file(source_file):
+            return self.stream(source_file, encoding)
+
+        text = self.read_text(source_file, encoding)
 
         return [filters.SourceText(self._filter(text), source_file, encoding, 'url-free')]
 
+    def stream(self, source_file, encoding):
+        """Filter a very large file one chunk at a time."""
+
+        # Neither links nor emails can span lines, so chunks that end on line boundaries are safe.
+        for text, context in self.stream_lines(source_file, encoding):
+            yield filters.SourceText(self._filter(text), context, encoding, 'url-free')
+
     def sfilter(self, source):
         """Execute filter."""
 
-        return [filters.SourceText(self._filter(source.text), source.context, source.encoding, 'url-free')]
+        return [filters.SourceText(self._filter(source.text), source.lazy_context, source.encoding, 'url-free')]
 
 
 def get_plugin():
@@ -5,11 +5,14 @@ XML filter.
 Detect encoding from XML header.
 """
 from .. import filters
+from .. import tree
 import re
 import codecs
 import bs4
 import soupsieve as sv
-from collections import deque, OrderedDict
+from collections import OrderedDict
+from lxml import etree
+from soupsieve import css_types as ct
 
 NON_CONTENT = (bs4.Doctype, bs4.Declaration, bs4.CData, bs4.ProcessingInstruction)
 
@@ -30,6 +33,89 @@ RE_XML_START = re.compile(
 RE_XML_ENCODE = re.compile(br'''(?i)^<\?xml[^>]*encoding=(['"])(.*?)\1[^>]*\?>''')
 RE_XML_ENCODE_U = re.compile(r'''(?i)^<\?xml[^>]*encoding=(['"])(.*?)\1[^>]*\?>''')
 
+ENGINES = ('bs4', 'lxml')
+
+
+class SelectorIndex:
+    """
+    Index the tag names, IDs, and classes that elements need to possibly match compiled selectors.
+
+    Every selector requires its tag name, ID, or class (or, for `:is()`, one of those of its selectors),
+    so an element that has none of the indexed ones can't match and is rejected without evaluating
+    the selectors. Tag names are compared in lowercase, which only ever lets more elements through.
+    If any selector requires none of them, e.g. `*` or `[title]`, nothing can be rejected.
+    """
+
+    __slots__ = ('classes', 'ids', 'indexed', 'names')
+
+    def __init__(self, selectors):
+        """Initialize."""
+
+        self.names = set()
+        self.ids = set()
+        self.classes = set()
+        self.indexed = self.add(selectors)
+
+    def add(self, selectors):
+        """Index the selectors, returning `False` if any of them can't be indexed."""
+
+        for sel in selectors:
+            if sel is ct.Null:
+                # Never matches.
+                continue
+            if sel.tag is not None and sel.tag.name not in (None, '*'):
+                self.names.add(sv.util.lower(sel.tag.name))
+            elif sel.ids:
+                self.ids.add(sel.ids[0])
+            elif sel.classes:
+                self.classes.add(sel.classes[0])
+            elif not any(self.is_subject(s) and self.add(s) for s in sel.selectors):
+                return False
+        return True
+
+    @staticmethod
+    def is_subject(selectors):
+        """Check if the element itself needs to match one of the selectors, as it does with `:is()`."""
+
+        return not selectors.is_not and all(
+            s is ct.Null or not s.relation or not s.relation[0].rel_type.startswith(':') for s in selectors
+        )
+
+    def can_match(self, el):
+        """Check if the element can possibly match."""
+
+        if sv.util.lower(el.name) in self.names:
+            return True
+        attrs = el.attrs
+        if self.ids:
+            value = attrs.get('id')
+            if value in self.ids or not isinstance(value, (str, type(None))):
+                return True
+        if self.classes:
+            value = attrs.get('class')
+            if isinstance(value, str):
+                value = tree.RE_NOT_WS.findall(value)
+            if value and not self.classes.isdisjoint(value):
+                return True
+        return False
+
+
+class IndexedMatcher:
+    """Match elements, but reject the elements that the selectors' index rules out without evaluating the selectors."""
+
+    __slots__ = ('index', 'matcher')
+
+    def __init__(self, matcher, index):
+        """Initialize."""
+
+        self.matcher = matcher
+        self.index = index
+
+    def match(self, el):
+        """Match the element."""
+
+        return self.index.can_match(el) and self.matcher.match(el)
+
 
 class XmlFilter(filters.Filter):
     """Spelling Python."""
@@ -42,6 +128,9 @@ class XmlFilter(filters.Filter):
         """Initialization."""
 
         self.user_break_tags = set()
+        self.indexes = {}
+        self._ancestry = {}
+        self._last_descendants = {}
         super().__init__(options, default_encoding)
 
     def get_default_config(self):
@@ -53,9 +142,17 @@ class XmlFilter(filters.Filter):
             "break_tags": [],
             "ignores": [],
             "captures": self.default_capture,
-            "namespaces": {}
+            "namespaces": {},
+            "engine": "bs4"
         }
 
+    def validate_options(self, k, v):
+        """Validate options."""
+
+        super().validate_options(k, v)
+        if k == 'engine' and v not in ENGINES:
+            raise ValueError(f"{self.__class__.__name__}: '{v}' is not a valid value for '{k}'")
+
     def setup(self):
         """Setup."""
 
@@ -68,6 +165,57 @@ class XmlFilter(filters.Filter):
         self.ignores = sv.compile(ignores, self.config['namespaces']) if ignores.strip() else None
         captures = ','.join(self.config['captures'])
         self.captures = sv.compile(captures, self.config['namespaces']) if captures.strip() else None
+        self.setup_engine()
+        self.setup_indexes()
+
+    def can_stream(self):
+        """
+        Check if documents can be parsed incrementally.
+
+        Only XML documents are streamed, and only if the ignore and capture selectors can be evaluated
+        without BeautifulSoup.
+        """
+
+        return self.parser == 'xml' and all(
+            tree.is_supported(s.selectors) for s in (self.ignores, self.captures) if s is not None
+        )
+
+    def setup_engine(self):
+        """
+        Setup the parsing engine.
+
+        The `lxml` engine is only used if it can evaluate the ignore and capture selectors,
+        otherwise BeautifulSoup is used.
+        """
+
+        self.engine = self.config['engine']
+        if self.engine == 'lxml' and not all(
+            tree.is_supported(s.selectors) for s in (self.ignores, self.captures) if s is not None
+        ):
+            self.engine = 'bs4'
+
+    def setup_indexes(self):
+        """Index the ignore and capture selectors, see `get_matcher`."""
+
+        for sieve in (self.ignores, self.captures):
+            if sieve is not None and sieve not in self.indexes:
+                self.indexes[sieve] = SelectorIndex(sieve.selectors)
+
+    def get_matcher(self, sieve, doc=None):
+        """
+        Get an object that matches elements against the compiled selectors, or `None` if there are no selectors.
+
+        Elements are matched by Soup Sieve, or by `tree.Matcher` if the document was parsed by the `lxml` engine.
+        If the selectors are indexed, elements that can't possibly match are rejected without evaluating them.
+        """
+
+        if sieve is None:
+            return None
+        index = self.indexes.get(sieve)
+        if index is None:
+            index = self.indexes[sieve] = SelectorIndex(sieve.selectors)
+        matcher = sieve if doc is None else tree.Matcher(sieve, doc)
+        return IndexedMatcher(matcher, index) if index.indexed else matcher
 
     def _has_xml_encode(self, content):
         """Check XML encoding."""
@@ -127,37 +275,61 @@ class XmlFilter(filters.Filter):
         name = el.name
         return name in self.break_tags or name in self.user_break_tags
 
+    def format_block(self, el, text):
+        """Format the text of a block, returning the content and its context, or `None` if the block is empty."""
+
+        content = ''.join(text)
+        return (content, self.construct_selector(el)) if content else None
+
     def format_blocks(self):
         """Format the text as for a block."""
 
         block_text = []
         for el, text in self._block_text.items():
-            content = ''.join(text)
-            if content:
-                block_text.append((content, self.construct_selector(el)))
+            block = self.format_block(el, text)
+            if block is not None:
+                block_text.append(block)
         return block_text
 
     def construct_selector(self, el, attr=''):
         """Construct an selector for context."""
 
-        selector = deque()
-
-        ancestor = el
-        while ancestor and ancestor.parent:
-            if ancestor is not el:
-                selector.appendleft(ancestor.name)
-            else:
-                tag = ancestor.name
-                prefix = ancestor.prefix
-                sel = ''
-                if prefix:
-                    sel += prefix + '|'
-                sel = tag
-                if attr:
-                    sel += '[%s]' % attr
-                selector.appendleft(sel)
-            ancestor = ancestor.parent
-        return '>'.join(selector)
+        if el.parent is None:
+            return ''
+
+        tag = el.name
+        prefix = el.prefix
+        sel = ''
+        if prefix:
+            sel += prefix + '|'
+        sel = tag
+        if attr:
+            sel += '[%s]' % attr
+        return self.get_ancestry(el) + sel
+
+    def get_ancestry(self, el):
+        """
+        Get the names of the element's ancestors, each followed by `>`, as they lead up to it in a context selector.
+
+        The path is memoized per element, so it is only built once for each ancestor, by extending
+        the path of its parent, instead of walking up to the root for every selector.
+        """
+
+        chain = []
+        path = ''
+        parent = el.parent
+        while parent is not None and parent.parent is not None:
+            cached = self._ancestry.get(id(parent))
+            if cached is not None and cached[0] is parent:
+                path = cached[1]
+                break
+            chain.append(parent)
+            parent = parent.parent
+
+        for ancestor in reversed(chain):
+            path += ancestor.name + '>'
+            self._ancestry[id(ancestor)] = (ancestor, path)
+        return path
 
     def extract_tag_metadata(self, el):
         """Extract meta data."""
@@ -171,10 +343,18 @@ class XmlFilter(filters.Filter):
         if node.next_sibling is not None:
             last_descendant = node.next_sibling
         else:
+            # Every tag down the chain of last children shares the same end, so it is only searched once.
+            cached = self._last_descendants.get(id(node))
+            if cached is not None and cached[0] is node:
+                return cached[1]
+            chain = []
             last_child = node
             while isinstance(last_child, bs4.Tag) and last_child.contents:
+                chain.append(last_child)
                 last_child = last_child.contents[-1]
             last_descendant = last_child.next_element
+            for tag in chain:
+                self._last_descendants[id(tag)] = (tag, last_descendant)
 
         return last_descendant
 
@@ -190,10 +370,15 @@ class XmlFilter(filters.Filter):
     def extract_string(self, node, is_comments):
         """Extract string."""
 
-        string = str(node).strip()
+        self.extract_text(str(node), node.parent, is_comments)
+
+    def extract_text(self, string, parent, is_comments):
+        """Extract the text of a string or comment."""
+
+        string = string.strip()
         if string:
             if is_comments:
-                sel = self.construct_selector(node.parent) + '<!--comment-->'
+                sel = self.construct_selector(parent) + '<!--comment-->'
                 self._comments.append((string, sel))
             else:
                 self._block_text[self._current_block].append(string)
@@ -212,9 +397,14 @@ class XmlFilter(filters.Filter):
         self.pop_block(node, force)
 
         if force or self.is_break_tag(node):
-            self._block_stack.append((node, self.get_last_descendant(node)))
-            self._block_text[node] = []
-            self._current_block = node
+            self.push_block(node, self.get_last_descendant(node))
+
+    def push_block(self, node, end):
+        """Push a block that ends when the `end` node is popped."""
+
+        self._block_stack.append((node, end))
+        self._block_text[node] = []
+        self._current_block = node
 
     def to_text(self, root):
         """Extract text from the document node."""
@@ -222,16 +412,20 @@ class XmlFilter(filters.Filter):
         last_capture = None
         last_capture_value = False
         next_good = None
+        self._last_descendants = {}
+        ignores = self.get_matcher(self.ignores)
+        captures = self.get_matcher(self.captures)
 
         self._attributes = []
         self._comments = []
         self._block_text = OrderedDict()
         self._block_stack = []
+        self._ancestry = {}
         self.set_block(root, force=True)
         self.extract_tag_metadata(root)
 
-        if not (self.ignores.match(root) if self.ignores else None):
-            capture = self.captures.match(root) if self.captures is not None else None
+        if not (ignores.match(root) if ignores else None):
+            capture = captures.match(root) if captures is not None else None
             last_capture = root
             last_capture_value = capture
 
@@ -256,9 +450,9 @@ class XmlFilter(filters.Filter):
                     self.extract_tag_metadata(node)
                     self.set_block(node)
 
-                    if not (self.ignores.match(node) if self.ignores else None):
+                    if not (ignores.match(node) if ignores else None):
                         # Handle tags that are not ignored
-                        capture = self.captures.match(node) if self.captures is not None else None
+                        capture = captures.match(node) if captures is not None else None
                         last_capture = node
                         last_capture_value = capture
                         # Elements that are scheduled to be captured should be checked for attributes to check
@@ -285,8 +479,8 @@ class XmlFilter(filters.Filter):
                             capture = True
                         elif parent is last_capture:
                             capture = last_capture_value
-                        elif not (self.captures.match(parent) if self.captures is not None else None):
-                            capture = self.captures.match(parent) if self.captures is not None else None
+                        elif not (captures.match(parent) if captures is not None else None):
+                            capture = captures.match(parent) if captures is not None else None
                             last_capture = parent
                             last_capture_value = capture
 
@@ -300,32 +494,303 @@ class XmlFilter(filters.Filter):
 
         return self.format_blocks(), self._attributes, self._comments
 
+    def extract_ignored_comments(self, doc, node):
+        """Extract the comments of an ignored element parsed by the `lxml` engine."""
+
+        nodes = {node.element: node}
+        for comment in node.element.iter(etree.Comment):
+            # Only wrap the ancestors that are needed to construct the comment's selector.
+            chain = []
+            el = comment.getparent()
+            while el not in nodes:
+                chain.append(el)
+                el = el.getparent()
+            for el in reversed(chain):
+                nodes[el] = doc.node(el, nodes[el.getparent()])
+            self.extract_text(comment.text or '', nodes[comment.getparent()], True)
+
+    def to_text_lxml(self, doc):
+        """
+        Extract text from a document parsed by the `lxml` engine.
+
+        This walks the tree exactly like `to_text` walks a BeautifulSoup tree, but as elements
+        are visited in a tree walk instead of a flat list of nodes, blocks are simply popped
+        when their element is closed, and ignored elements are skipped without searching for
+        their last descendant.
+        """
+
+        ignores = self.get_matcher(self.ignores, doc)
+        captures = self.get_matcher(self.captures, doc)
+
+        self._attributes = []
+        self._comments = []
+        self._block_text = OrderedDict()
+        self._block_stack = []
+        self._ancestry = {}
+        self.push_block(doc, None)
+        self.extract_tag_metadata(doc)
+
+        # The document itself is never ignored or captured.
+        capture = False if captures is not None else None
+        last_capture = doc
+        last_capture_value = capture
+
+        stack = [(doc, tree.iter_content(doc.children()))]
+        while stack:
+            parent, items = stack[-1]
+            item = next(items, None)
+
+            if item is None:
+                stack.pop()
+                self.pop_block(parent)
+            elif isinstance(item, str):
+                # See `to_text` for how capturing of text is tracked.
+                if parent is last_capture:
+                    capture = last_capture_value
+                elif not (captures.match(parent) if captures is not None else None):
+                    capture = captures.match(parent) if captures is not None else None
+                    last_capture = parent
+                    last_capture_value = capture
+
+                if capture:
+                    self.extract_text(item, parent, False)
+            elif item.tag is etree.Comment:
+                if self.comments:
+                    capture = True
+                    self.extract_text(item.text or '', parent, True)
+            elif isinstance(item.tag, str):
+                node = doc.node(item, parent)
+                self.extract_tag_metadata(node)
+                if self.is_break_tag(node):
+                    self.push_block(node, node)
+
+                if not (ignores.match(node) if ignores else None):
+                    capture = captures.match(node) if captures is not None else None
+                    last_capture = node
+                    last_capture_value = capture
+                    if capture:
+                        self.extract_attributes(node)
+                    stack.append((node, tree.iter_content(item)))
+                else:
+                    # Comments are excluded from ignored elements, and are captured regardless.
+                    # Like `to_text`, stop if nothing follows an ignored element.
+                    if not doc.has_following(item):
+                        break
+                    if self.comments:
+                        self.extract_ignored_comments(doc, node)
+                    self.pop_block(node)
+
+        return self.format_blocks(), self._attributes, self._comments
+
+    def to_text_stream(self, chunks):
+        """
+        Extract text from a document that is parsed incrementally from chunks of text.
+
+        Text is extracted exactly like `to_text_lxml` does, but instead of returning everything at the end,
+        `(kind, text, context)` is yielded for comments and attributes as soon as they are found, and for
+        blocks as soon as their element is closed. Closed elements are then freed, so memory doesn't grow
+        with the size of the document. Blocks that grow larger than `STREAM_CHUNK_SIZE` are yielded in parts.
+
+        As blocks are yielded one by one, blocks that serialize the same are not merged like BeautifulSoup does.
+        """
+
+        selectors = [s for s in (self.ignores, self.captures) if s is not None]
+        # Elements are only freed if no selector needs to look at previous siblings.
+        free = not any(tree.has_sibling_relations(s.selectors) for s in selectors)
+        doc = tree.Document(None, True)
+        ignores = captures = None
+
+        self._attributes = []
+        self._comments = []
+        self._block_text = OrderedDict()
+        self._block_stack = []
+        self._ancestry = {}
+        self.push_block(doc, None)
+        self.extract_tag_metadata(doc)
+        sizes = {doc: 0}
+
+        capture = False if self.captures is not None else None
+        last_capture = doc
+        last_capture_value = capture
+
+        stack = [doc]
+        # The element and attribute that hold the text before the current event.
+        last = None
+        namespaces = []
+        # Depth within ignored elements.
+        ignored = 0
+        # Comments of an ignored element are held until we know that something follows it, see `to_text_lxml`.
+        held = False
+
+        for event, item in tree.iterparse(chunks):
+            if event == 'start-ns':
+                namespaces.append(item)
+                continue
+
+            parent = stack[-1]
+            text = getattr(*last) if last is not None else None
+            if held and (text or event != 'end'):
+                held = False
+                for comment in self._comments:
+                    yield ('comment', *comment)
+                self._comments.clear()
+            if text and not ignored:
+                # See `to_text` for how capturing of text is tracked.
+                if parent is last_capture:
+                    capture = last_capture_value
+                elif not (captures.match(parent) if captures is not None else None):
+                    capture = captures.match(parent) if captures is not None else None
+                    last_capture = parent
+                    last_capture_value = capture
+
+                if capture:
+                    self.extract_text(text, parent, False)
+                    block = self._current_block
+                    sizes[block] += len(text)
+                    if sizes[block] > self.STREAM_CHUNK_SIZE:
+                        content = self.format_block(block, self._block_text[block])
+                        if content is not None:
+                            yield ('content', *content)
+                        self._block_text[block] = []
+                        sizes[block] = 0
+
+            if event == 'start':
+                if doc.root is None:
+                    doc.set_root(item)
+                    ignores = self.get_matcher(self.ignores, doc)
+                    captures = self.get_matcher(self.captures, doc)
+                if namespaces:
+                    doc.declarations[item] = namespaces
+                    namespaces = []
+                node = doc.node(item, parent)
+                if free:
+                    doc.declarations.pop(item, None)
+                # Blocks are never merged, so nodes don't need to be compared by their content.
+                node.hash = id(node)
+                stack.append(node)
+                last = (item, 'text')
+
+                if ignored:
+                    ignored += 1
+                else:
+                    self.extract_tag_metadata(node)
+                    if self.is_break_tag(node):
+                        self.push_block(node, node)
+                        sizes[node] = 0
+
+                    if not (ignores.match(node) if ignores else None):
+                        capture = captures.match(node) if captures is not None else None
+                        last_capture = node
+                        last_capture_value = capture
+                        if capture:
+                            self.extract_attributes(node)
+                    else:
+                        ignored = 1
+
+            elif event == 'end':
+                node = stack.pop()
+                last = (item, 'tail')
+                self._ancestry.pop(id(node), None)
+                if ignored:
+                    ignored -= 1
+                    held = not ignored
+
+                self.pop_block(node)
+                text = self._block_text.pop(node, None)
+                if text is not None:
+                    del sizes[node]
+                    block = self.format_block(node, text)
+                    if block is not None:
+                        yield ('content', *block)
+
+                if free:
+                    item.clear(keep_tail=True)
+                    # The tails of previous siblings have all been processed.
+                    if node.parent is not doc:
+                        while item.getprevious() is not None:
+                            del node.parent.element[0]
+                else:
+                    del item[:]
+
+            else:
+                last = (item, 'tail')
+                if event == 'comment' and self.comments:
+                    if not ignored:
+                        capture = True
+                    self.extract_text(item.text or '', parent, True)
+
+            if not ignored and not held:
+                for comment in self._comments:
+                    yield ('comment', *comment)
+                self._comments.clear()
+            for attribute in self._attributes:
+                yield ('attribute', *attribute)
+            self._attributes.clear()
+
+        if not held:
+            for comment in self._comments:
+                yield ('comment', *comment)
+        self._comments.clear()
+        for el, text in self._block_text.items():
+            block = self.format_block(el, text)
+            if block is not None:
+                yield ('content', *block)
+        self._block_text.clear()
+
+    def stream(self, chunks, context, encoding):
+        """Filter a document that is parsed incrementally from chunks of text."""
+
+        for kind, text, desc in self.to_text_stream(chunks):
+            yield filters.SourceText(text, filters.LazyContext('%s: %s', context, desc), encoding, self.type + kind)
+
+    def parse(self, text):
+        """Parse the text with the `lxml` engine, returning `None` if BeautifulSoup should be used instead."""
+
+        if self.engine != 'lxml' or self.parser not in ('lxml', 'xml'):
+            return None
+        return tree.parse(text, self.parser == 'xml')
+
     def _filter(self, text, context, encoding):
         """Filter the source text."""
 
+        doc = self.parse(text)
+        if doc is not None:
+            blocks, attributes, comments = self.to_text_lxml(doc)
+        else:
+            blocks, attributes, comments = self.to_text(bs4.BeautifulSoup(text, self.parser))
+        return self.get_sources(blocks, attributes, comments, context, encoding)
+
+    def get_sources(self, blocks, attributes, comments, context, encoding):
+        """Get the source text of the extracted blocks, attributes, and comments."""
+
         content = []
-        blocks, attributes, comments = self.to_text(bs4.BeautifulSoup(text, self.parser))
         if self.comments:
             for c, desc in comments:
-                content.append(filters.SourceText(c, context + ': ' + desc, encoding, self.type + 'comment'))
+                loc = filters.LazyContext('%s: %s', context, desc)
+                content.append(filters.SourceText(c, loc, encoding, self.type + 'comment'))
         if self.attributes:
             for a, desc in attributes:
-                content.append(filters.SourceText(a, context + ': ' + desc, encoding, self.type + 'attribute'))
+                loc = filters.LazyContext('%s: %s', context, desc)
+                content.append(filters.SourceText(a, loc, encoding, self.type + 'attribute'))
         for b, desc in blocks:
-            content.append(filters.SourceText(b, context + ': ' + desc, encoding, self.type + 'content'))
+            loc = filters.LazyContext('%s: %s', context, desc)
+            content.append(filters.SourceText(b, loc, encoding, self.type + 'content'))
         return content
 
     def filter(self, source_file, encoding):  # noqa A001
         """Parse XML file."""
 
-        with codecs.open(source_file, 'r', encoding=encoding) as f:
-            text = f.read()
+        if self.is_very_large_file(source_file) and self.can_stream():
+            chunks = self.stream_text(source_file, encoding, normalize_newlines=False, split_lines=False)
+            return self.stream(chunks, source_file, encoding)
+
+        text = self.read_text(source_file, encoding, normalize_newlines=False)
         return self._filter(text, source_file, encoding)
 
     def sfilter(self, source):
         """Filter."""
 
-        return self._filter(source.text, source.context, source.encoding)
+        return self._filter(source.text, source.lazy_context, source.encoding)
 
 
 def get_plugin():
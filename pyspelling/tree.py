@@ -0,0 +1,524 @@
+"""
+Document trees parsed directly with `lxml`.
+
+The XML based filters normally parse documents into a `bs4.BeautifulSoup` tree. The `lxml` engine
+instead parses with `lxml` and wraps the elements in light `Node` objects that look enough like
+`bs4.Tag` (`name`, `prefix`, `namespace`, `attrs`, and `parent`) for the filters' context and
+block logic to work unchanged. `Matcher` evaluates compiled Soup Sieve selectors against these
+nodes with the same semantics as Soup Sieve, but only for the selector features listed in
+`is_supported`, filters use BeautifulSoup for anything else.
+"""
+import re
+from lxml import etree
+import bs4.builder
+import soupsieve as sv
+# `Matcher` reads Soup Sieve's compiled selectors, which aren't public API. Keep the range of
+# Soup Sieve versions in the requirements to the ones that have been tested.
+from soupsieve import css_types as ct
+
+NS_XHTML = 'http://www.w3.org/1999/xhtml'
+NS_XML = 'http://www.w3.org/XML/1998/namespace'
+
+RE_NOT_WS = re.compile('[^ \t\r\n\f]+')
+RE_HTML_END = re.compile(r'(?i)</html\s*>')
+RE_HTML_TRAILING = re.compile(r'(?:\s+|<!--.*?-->|<\?.*?>)*', re.DOTALL)
+
+# Attributes that BeautifulSoup splits into a list of values in HTML documents.
+CDATA_LIST_ATTRIBUTES = bs4.builder.HTMLTreeBuilder.DEFAULT_CDATA_LIST_ATTRIBUTES
+# Elements in which BeautifulSoup doesn't collapse strings of whitespace in HTML documents.
+PRESERVE_WHITESPACE_TAGS = bs4.builder.HTMLTreeBuilder.DEFAULT_PRESERVE_WHITESPACE_TAGS
+ASCII_SPACES = bs4.BeautifulSoup.ASCII_SPACES
+
+REL_PARENT = ' '
+REL_CLOSE_PARENT = '>'
+REL_SIBLING = '~'
+REL_CLOSE_SIBLING = '+'
+RELATIONS = (REL_PARENT, REL_CLOSE_PARENT, REL_SIBLING, REL_CLOSE_SIBLING)
+
+
+class Node:
+    """
+    An element (or the document) in the shape of a `bs4.Tag`.
+
+    Nodes are also equal whenever BeautifulSoup's tags would be equal, as the filters key their
+    text blocks by element, and BeautifulSoup merges the blocks of elements that serialize the same.
+    """
+
+    __slots__ = ('attrs', 'document', 'element', 'hash', 'name', 'namespace', 'parent', 'prefix', 'prefixes')
+
+    def __init__(self, element, name, prefix, namespace, attrs, parent, prefixes=None):
+        """Initialize."""
+
+        self.element = element
+        self.name = name
+        self.prefix = prefix
+        self.namespace = namespace
+        self.attrs = attrs
+        self.parent = parent
+        self.document = parent.document if parent is not None else self
+        # Prefixes of the namespaces in scope, keyed by namespace (XML only).
+        self.prefixes = prefixes
+        self.hash = None
+
+    def get_document(self):
+        """Get the document."""
+
+        return self.document
+
+    def __eq__(self, other):
+        """Compare the serialized elements."""
+
+        if self is other:
+            return True
+        if not isinstance(other, Node) or self.element is None or other.element is None or hash(self) != hash(other):
+            return False
+        doc = self.document
+        return doc is other.document and doc.signature(self) == doc.signature(other)
+
+    def __hash__(self):
+        """Hash the serialized element."""
+
+        if self.hash is None:
+            self.hash = hash(self.get_document().signature(self)) if self.element is not None else id(self)
+        return self.hash
+
+
+class Document(Node):
+    """The document node that holds the root element, just like a `bs4.BeautifulSoup` object."""
+
+    __slots__ = ('declarations', 'has_html_namespace', 'interned', 'is_xml', 'root', 'signatures', 'trailing')
+
+    def __init__(self, root, is_xml, trailing=False, declarations=None):
+        """Initialize."""
+
+        super().__init__(None, '[document]', None, None, {}, None, {NS_XML: 'xml'})
+        self.root = root
+        self.is_xml = is_xml
+        self.trailing = trailing
+        # Namespaces declared by each element, `lxml` only exposes the namespaces in scope.
+        self.declarations = declarations or {}
+        # Signatures of the elements, blocks are nested so their signatures share descendants.
+        self.signatures = {}
+        # Distinct signatures are numbered, and elements refer to the signatures of their children by number.
+        self.interned = {}
+        self.has_html_namespace = False
+        if root is not None:
+            self.set_root(root)
+
+    def set_root(self, root):
+        """Set the root element, documents that are parsed incrementally only know it once it is started."""
+
+        self.root = root
+        self.has_html_namespace = self.is_xml and split_tag(root.tag)[0] == NS_XHTML
+
+    def children(self):
+        """Get the top level nodes: the root element and any comments or processing instructions around it."""
+
+        nodes = list(self.root.itersiblings(preceding=True))
+        nodes.reverse()
+        nodes.append(self.root)
+        nodes.extend(self.root.itersiblings())
+        return nodes
+
+    def has_following(self, el):
+        """Check if any content follows the element in document order."""
+
+        while el is not None:
+            if el.tail or el.getnext() is not None:
+                return True
+            el = el.getparent()
+        return self.trailing
+
+    def signature(self, node):
+        """
+        Get a value that is equal for elements that BeautifulSoup would serialize the same.
+
+        Signatures are numbers: an element's signature is the number of its name, attributes, and content,
+        where child elements are represented by their own signatures. Descendants are visited with
+        an explicit stack, as documents can be nested deeper than the recursion limit.
+        """
+
+        signature = self.signatures.get(node.element)
+        if signature is not None:
+            return signature
+
+        preserve = False
+        if not self.is_xml:
+            ancestor = node
+            while ancestor is not None and not preserve:
+                preserve = ancestor.name in PRESERVE_WHITESPACE_TAGS
+                ancestor = ancestor.parent
+
+        stack = [(node, preserve, iter_content(node.element), [])]
+        while True:
+            current, preserve, items, content = stack[-1]
+            item = next(items, None)
+            if item is None:
+                attrs = tuple((k, tuple(v) if isinstance(v, list) else v) for k, v in current.attrs.items())
+                key = (current.prefix, current.name, attrs, tuple(content))
+                signature = self.signatures[current.element] = self.interned.setdefault(key, len(self.interned))
+                stack.pop()
+                if not stack:
+                    return signature
+                stack[-1][3].append(signature)
+            elif isinstance(item, str):
+                content.append(self.collapse(item, preserve))
+            elif item.tag is etree.Comment:
+                content.append(('comment', self.collapse(item.text or '', preserve)))
+            elif item.tag is etree.PI:
+                content.append(('pi', item.target + ' ' + (item.text or '')))
+            elif isinstance(item.tag, str):
+                signature = self.signatures.get(item)
+                if signature is not None:
+                    content.append(signature)
+                else:
+                    child = self.node(item, current)
+                    child_preserve = preserve or (not self.is_xml and child.name in PRESERVE_WHITESPACE_TAGS)
+                    stack.append((child, child_preserve, iter_content(item), []))
+            else:
+                content.append(('entity', item.text))
+
+    @staticmethod
+    def collapse(string, preserve):
+        """Collapse strings of whitespace like BeautifulSoup."""
+
+        if not preserve and not string.strip(ASCII_SPACES):
+            return '\n' if '\n' in string else ' '
+        return string
+
+    def node(self, el, parent):
+        """Create a node for the element."""
+
+        if not self.is_xml:
+            name = el.tag
+            attrs = {}
+            lists = CDATA_LIST_ATTRIBUTES['*'] | CDATA_LIST_ATTRIBUTES.get(name, set())
+            for k, v in el.attrib.items():
+                attrs[k] = RE_NOT_WS.findall(v) if k in lists else v
+            return Node(el, name, None, None, attrs, parent)
+
+        # Like BeautifulSoup, namespace declarations are attributes, and names use the prefix
+        # most recently declared for their namespace.
+        declared = {}
+        prefixes = parent.prefixes
+        if el in self.declarations:
+            prefixes = dict(prefixes)
+            for p, ns in self.declarations[el]:
+                declared['xmlns:' + p if p else 'xmlns'] = ns
+                prefixes[ns] = p
+
+        attrs = {}
+        for k, v in el.attrib.items():
+            if k[0] == '{':
+                ns, local = k[1:].split('}', 1)
+                p = prefixes.get(ns)
+                k = p + ':' + local if p else local
+            attrs[k] = v
+        attrs.update(declared)
+
+        namespace, name = split_tag(el.tag)
+        return Node(el, name, prefixes.get(namespace) if namespace else None, namespace, attrs, parent, prefixes)
+
+
+def split_tag(tag):
+    """
+    Split an element's tag into its namespace and local name.
+
+    `lxml` keeps the prefix in the tag if it can't resolve it (for instance, if the prefix is declared
+    with an empty namespace), BeautifulSoup drops the prefix and gives the element no namespace.
+    """
+
+    if tag[0] == '{':
+        namespace, name = tag[1:].split('}', 1)
+        return namespace, name
+    return None, tag.rsplit(':', 1)[-1]
+
+
+def parse(text, is_xml):
+    """
+    Parse the text the same way BeautifulSoup's `lxml` tree builders do.
+
+    Returns `None` if the document can't be parsed, or if BeautifulSoup would build a different tree.
+    Elements with a prefix that `lxml` couldn't resolve are left to BeautifulSoup, which handles them
+    differently from `lxml`.
+    """
+
+    # BeautifulSoup's tree builders don't limit how deep documents can be nested, `lxml` only builds
+    # trees deeper than 255 elements with `huge_tree`.
+    trailing = False
+    declarations = {}
+    if is_xml:
+        if text[:1] == '\ufeff':
+            text = text[1:]
+        if 'xmlns' in text:
+            parser = etree.XMLPullParser(events=('start-ns', 'start'), strip_cdata=False, recover=True, huge_tree=True)
+        else:
+            parser = etree.XMLParser(strip_cdata=False, recover=True, huge_tree=True)
+    else:
+        # BeautifulSoup keeps what follows the closing `html` tag outside of the `html` element,
+        # but `lxml` moves text into the body and drops whitespace.
+        m = None
+        for m in RE_HTML_END.finditer(text):  # noqa: B007
+            pass
+        if m is not None:
+            end = RE_HTML_TRAILING.match(text, m.end()).end()
+            if end != len(text):
+                return None
+            trailing = m.end() != len(text)
+        parser = etree.HTMLParser(recover=True, huge_tree=True)
+    try:
+        parser.feed(text)
+        root = parser.close()
+    except (etree.LxmlError, ValueError):
+        root = None
+
+    if is_xml and root is not None:
+        for el in root.iter():
+            if isinstance(el.tag, str) and el.tag[0] != '{' and ':' in el.tag:
+                return None
+
+    if isinstance(parser, etree.XMLPullParser) and root is not None:
+        pending = []
+        for event, value in parser.read_events():
+            if event == 'start-ns':
+                pending.append(value)
+            elif pending:
+                declarations[value] = pending
+                pending = []
+    return Document(root, is_xml, trailing, declarations) if root is not None else None
+
+
+def iterparse(chunks):
+    """
+    Parse XML text incrementally, yielding the parser's events as `(event, value)`.
+
+    Events are `start-ns`, `start`, `end`, `comment`, and `pi`. When an event is read, the text that
+    precedes it is complete: the `text` of the last started element, or the `tail` of the last closed
+    element, comment, or processing instruction.
+    """
+
+    parser = etree.XMLPullParser(
+        events=('start-ns', 'start', 'end', 'comment', 'pi'), strip_cdata=False, recover=True, huge_tree=True
+    )
+    first = True
+    for chunk in chunks:
+        if first:
+            if chunk[:1] == '\ufeff':
+                chunk = chunk[1:]
+            first = False
+        parser.feed(chunk)
+        yield from parser.read_events()
+    try:
+        parser.close()
+    except (etree.LxmlError, ValueError):
+        pass
+    yield from parser.read_events()
+
+
+def iter_content(el):
+    """Iterate the text and the child nodes of an element (or a list of top level nodes) in document order."""
+
+    if not isinstance(el, list) and el.text:
+        yield el.text
+    for child in el:
+        yield child
+        if child.tail:
+            yield child.tail
+
+
+def is_supported(selectors):
+    """Check if compiled selectors only use features that `Matcher` supports."""
+
+    if selectors.is_html:
+        return False
+    for sel in selectors:
+        if sel is ct.Null:
+            continue
+        if sel.flags or sel.nth or sel.contains or sel.lang:
+            return False
+        if any(a.prefix for a in sel.attributes):
+            return False
+        if not all(is_supported(s) for s in sel.selectors):
+            return False
+        if sel.relation:
+            if sel.relation[0].rel_type not in RELATIONS or not is_supported(sel.relation):
+                return False
+    return True
+
+
+def has_sibling_relations(selectors):
+    """Check if compiled selectors match against sibling elements."""
+
+    for sel in selectors:
+        if sel is ct.Null:
+            continue
+        if any(has_sibling_relations(s) for s in sel.selectors):
+            return True
+        if sel.relation:
+            if sel.relation[0].rel_type in (REL_SIBLING, REL_CLOSE_SIBLING) or has_sibling_relations(sel.relation):
+                return True
+    return False
+
+
+class Matcher:
+    """Match compiled Soup Sieve selectors against the nodes of a document."""
+
+    def __init__(self, sieve, doc):
+        """Initialize."""
+
+        self.selectors = sieve.selectors
+        self.namespaces = sieve.namespaces or {}
+        self.doc = doc
+        self.is_xml = doc.is_xml
+        self.supports_namespaces = doc.is_xml or doc.has_html_namespace
+
+    def match(self, el):
+        """Match the element (the document never matches)."""
+
+        return el is not self.doc and self.match_selectors(el, self.selectors)
+
+    def get_parent(self, el):
+        """Get the parent element."""
+
+        parent = el.parent
+        return None if parent is self.doc else parent
+
+    def get_previous_tags(self, el):
+        """Get the previous sibling elements."""
+
+        parent = el.parent
+        for sibling in el.element.itersiblings(preceding=True):
+            if isinstance(sibling.tag, str):
+                yield self.doc.node(sibling, parent)
+
+    def get_tag_ns(self, el):
+        """Get tag namespace."""
+
+        if self.supports_namespaces:
+            return el.namespace or ''
+        return NS_XHTML
+
+    def get_attribute_by_name(self, el, name, default=None):
+        """Get attribute by name."""
+
+        value = default
+        if self.is_xml:
+            if name in el.attrs:
+                v = el.attrs[name]
+                value = '' if v is None else v
+        else:
+            for k, v in el.attrs.items():
+                if sv.util.lower(k) == name:
+                    value = '' if v is None else v
+                    break
+        return value
+
+    def match_attribute_name(self, el, attr):
+        """Match attribute name and return value if it exists."""
+
+        value = None
+        for k, v in el.attrs.items():
+            if (self.is_xml and attr == k) or (not self.is_xml and sv.util.lower(attr) == sv.util.lower(k)):
+                value = v
+                break
+        return value
+
+    def match_namespace(self, el, tag):
+        """Match the namespace of the element."""
+
+        match = True
+        namespace = self.get_tag_ns(el)
+        default_namespace = self.namespaces.get('')
+        tag_ns = '' if tag.prefix is None else self.namespaces.get(tag.prefix)
+        if tag.prefix is None and (default_namespace is not None and namespace != default_namespace):
+            match = False
+        elif (tag.prefix is not None and tag.prefix == '' and namespace):
+            match = False
+        elif tag.prefix and tag.prefix != '*' and (tag_ns is None or namespace != tag_ns):
+            match = False
+        return match
+
+    def match_attributes(self, el, attributes):
+        """Match attributes."""
+
+        for a in attributes:
+            temp = self.match_attribute_name(el, a.attribute)
+            pattern = a.xml_type_pattern if self.is_xml and a.xml_type_pattern else a.pattern
+            if temp is None:
+                if a.inverse:
+                    continue
+                return False
+            value = temp if isinstance(temp, str) else ' '.join(temp)
+            if pattern is not None and pattern.match(value) is None:
+                return False
+        return True
+
+    def match_tag(self, el, tag):
+        """Match the tag."""
+
+        if tag is None:
+            return True
+        name = sv.util.lower(tag.name) if not self.is_xml and tag.name is not None else tag.name
+        if name is not None and name != '*':
+            el_name = el.name if self.is_xml else sv.util.lower(el.name)
+            if name != el_name:
+                return False
+        return self.match_namespace(el, tag)
+
+    def match_id(self, el, ids):
+        """Match element's ID."""
+
+        return all(i == self.get_attribute_by_name(el, 'id', '') for i in ids)
+
+    def match_classes(self, el, classes):
+        """Match element's classes."""
+
+        current = self.get_attribute_by_name(el, 'class', [])
+        if isinstance(current, str):
+            current = RE_NOT_WS.findall(current)
+        return all(c in current for c in classes)
+
+    def match_relations(self, el, relation):
+        """Match relationship to other elements."""
+
+        rel_type = relation[0].rel_type
+        if rel_type == REL_PARENT:
+            parent = self.get_parent(el)
+            while parent is not None:
+                if self.match_selectors(parent, relation):
+                    return True
+                parent = self.get_parent(parent)
+        elif rel_type == REL_CLOSE_PARENT:
+            parent = self.get_parent(el)
+            return parent is not None and self.match_selectors(parent, relation)
+        elif rel_type == REL_SIBLING:
+            return any(self.match_selectors(sibling, relation) for sibling in self.get_previous_tags(el))
+        elif rel_type == REL_CLOSE_SIBLING:
+            sibling = next(self.get_previous_tags(el), None)
+            return sibling is not None and self.match_selectors(sibling, relation)
+        return False
+
+    def match_selectors(self, el, selectors):
+        """Check if element matches one of the selectors."""
+
+        match = False
+        is_not = selectors.is_not
+        for selector in selectors:
+            match = is_not
+            if selector is ct.Null:
+                continue
+            if not self.match_tag(el, selector.tag):
+                continue
+            if selector.ids and not self.match_id(el, selector.ids):
+                continue
+            if selector.classes and not self.match_classes(el, selector.classes):
+                continue
+            if not self.match_attributes(el, selector.attributes):
+                continue
+            if selector.selectors and not all(self.match_selectors(el, s) for s in selector.selectors):
+                continue
+            if selector.relation and not self.match_relations(el, selector.relation):
+                continue
+            match = not is_not
+            break
+        return match
@@ -9,9 +9,17 @@ import re
 import locale
 from functools import wraps
 import warnings
+import codecs
 
 RE_LAST_SPACE_IN_CHUNK = re.compile(rb'(\s+)(?=\S+\Z)')
 
+# Control characters that don't show up in text (excludes tab, line feeds, form feed, and escape).
+# Shift in and out (`\x0e` and `\x0f`) and escape (`\x1b`) are used by some legacy encodings.
+RE_BINARY_CONTROLS = re.compile(rb'[\x01-\x08\x10-\x1a\x1c-\x1f\x7f]')
+UNICODE_BOMS = (codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE, codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+BINARY_SAMPLE_SIZE = 8192
+BINARY_THRESHOLD = 0.3
+
 
 def deprecated(message):  # pragma: no cover
     """
@@ -144,6 +152,26 @@ def random_name_gen(size=6):
     ) if size > 0 else ''
 
 
+def is_binary_file(file_name, sample_size=BINARY_SAMPLE_SIZE):
+    """
+    Guess if a file is binary by looking at the start of the file.
+
+    Files with NUL bytes are binary unless they start with a UTF-16 or UTF-32 BOM. Otherwise,
+    files where more than 30% of the sample are control characters are binary. Bytes that are
+    not valid UTF-8 are not counted, as text can be in any legacy encoding.
+    """
+
+    with open(file_name, 'rb') as f:
+        sample = f.read(sample_size)
+
+    if not sample:
+        return False
+    if b'\x00' in sample:
+        return not sample.startswith(UNICODE_BOMS)
+
+    return len(RE_BINARY_CONTROLS.findall(sample)) > len(sample) * BINARY_THRESHOLD
+
+
 def yaml_load(source, loader=yaml.Loader):
     """
     Wrap PyYaml's loader so we can extend it to suit our needs.
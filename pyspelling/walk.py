@@ -0,0 +1,182 @@
+"""Directory walking shared between tasks."""
+import os
+import gzip
+import inspect
+import json
+import time
+from wcmatch import glob
+
+CACHE_VERSION = 1
+
+# Entry flags in the cache file.
+IS_DIR = 0x1
+IS_LINK = 0x2
+
+# A directory modified this recently could change again without its modification time changing,
+# so its listing is not trusted to be up to date on the next run.
+RACY_NS = 2_000_000_000
+
+
+def _supports_index():
+    """
+    Check that `wcmatch` reads directories through the method `IndexedGlob` overrides.
+
+    The method is internal to `wcmatch`, so if it ever changes, globbing falls back to `wcmatch`'s own
+    directory reads instead of silently finding the wrong files.
+    """
+
+    try:
+        params = list(inspect.signature(glob.Glob._iter).parameters)
+    except (AttributeError, TypeError, ValueError):  # pragma: no cover
+        return False
+    return params == ['self', 'curdir', 'dir_only', 'deep']
+
+
+SUPPORTS_INDEX = _supports_index()
+
+
+class DirectoryIndex:
+    """
+    Directory listings shared by all the tasks of a run.
+
+    Each task still globs with its own patterns, flags, and limits, but a directory
+    is only ever read from the file system once.
+
+    If a cache file is provided, listings are persisted between runs. A directory's
+    cached listing is only used if the directory's modification time and inode
+    are unchanged, otherwise the directory is read again.
+    """
+
+    def __init__(self, cache_file=None):
+        """Initialize."""
+
+        self.listings = {}
+        self.cache_file = cache_file
+        self.cache = self.load(cache_file) if cache_file else {}
+        self.modified = False
+
+    @staticmethod
+    def load(cache_file):
+        """Load the cache file."""
+
+        try:
+            with gzip.open(cache_file, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION:
+                return data['dirs']
+        except Exception:
+            # A missing or corrupt cache is simply rebuilt.
+            pass
+        return {}
+
+    def save(self):
+        """Save the cache file if anything changed."""
+
+        if not self.cache_file or not self.modified:
+            return
+
+        parent = os.path.dirname(os.path.abspath(self.cache_file))
+        os.makedirs(parent, exist_ok=True)
+        temp = self.cache_file + '.tmp'
+        with gzip.open(temp, 'wt', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'dirs': self.cache}, f, separators=(',', ':'))
+        os.replace(temp, self.cache_file)
+        self.modified = False
+
+    @staticmethod
+    def _scan(path):
+        """Read the entries of a directory as a list of `(name, flags)`."""
+
+        entries = []
+        try:
+            with os.scandir(path) as scan:
+                for f in scan:
+                    try:
+                        flags = IS_DIR if f.is_dir() else 0
+                        if f.is_symlink():
+                            flags |= IS_LINK
+                        entries.append((f.name, flags))
+                    except OSError:  # pragma: no cover # noqa: PERF203
+                        pass
+        except OSError:
+            pass
+        return entries
+
+    def _read(self, path, key):
+        """Read the directory, using the cache file if the directory has not changed."""
+
+        if not self.cache_file:
+            return self._scan(path)
+
+        try:
+            st = os.stat(path)
+        except OSError:
+            return []
+
+        stamp = [st.st_mtime_ns, st.st_ino]
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] == stamp:
+            entries = []
+            for name, flags in cached[1]:
+                if flags & IS_LINK:
+                    # The target of a link can change without the directory changing.
+                    is_dir = os.path.isdir(os.path.join(path, name))
+                    flags = (flags | IS_DIR) if is_dir else (flags & ~IS_DIR)
+                entries.append((name, flags))
+            return entries
+
+        entries = self._scan(path)
+        if time.time_ns() - st.st_mtime_ns > RACY_NS:
+            self.cache[key] = [stamp, entries]
+        else:
+            self.cache.pop(key, None)
+        self.modified = True
+        return entries
+
+    def scandir(self, path):
+        """Get the entries of a directory as a list of `(name, is_dir, is_link)`."""
+
+        key = os.path.abspath(path)
+        entries = self.listings.get(key)
+        if entries is None:
+            entries = []
+            for name, flags in self._read(path, key):
+                is_dir = bool(flags & IS_DIR)
+                # Links are only relevant for directories.
+                entries.append((name, is_dir, is_dir and bool(flags & IS_LINK)))
+            self.listings[key] = entries
+        return entries
+
+    def iglob(self, patterns, *, flags=0, limit=1000):
+        """Glob using the shared directory listings."""
+
+        if not SUPPORTS_INDEX:  # pragma: no cover
+            yield from glob.iglob(patterns, flags=flags, limit=limit)
+            return
+        yield from IndexedGlob(patterns, index=self, flags=flags, limit=limit).glob()
+
+
+class IndexedGlob(glob.Glob):
+    """Glob that reads directories from a `DirectoryIndex`."""
+
+    def __init__(self, patterns, *, index, **kwargs):
+        """Initialize."""
+
+        super().__init__(patterns, **kwargs)
+        self.index = index
+
+    def _iter(self, curdir, dir_only, deep):
+        """Iterate the directory."""
+
+        if self.is_abs_pattern and curdir:
+            scandir = curdir
+        else:
+            scandir = os.path.join(self.root_dir, curdir) if curdir else self.root_dir
+
+        # Python will never return . or .., so fake it.
+        for special in self.specials:
+            yield special, True, True, False
+
+        for name, is_dir, is_link in self.index.scandir(scandir):
+            if not dir_only or is_dir:
+                yield name, is_dir, self._is_hidden(name), is_link
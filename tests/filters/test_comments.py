@@ -0,0 +1,160 @@
+"""Test comments plugin."""
+from .. import util
+from pyspelling.filters.comments import CommentsFilter
+
+
+class TestCommentsShell(util.PluginTestCase):
+    """Test comments plugin with shell scripts."""
+
+    def setup_fs(self):
+        """Setup file system."""
+
+        config = self.dedent(
+            """
+            matrix:
+            - name: shell
+              sources:
+              - '{}/**/*.txt'
+              aspell:
+                lang: en
+                d: en_US
+              hunspell:
+                d: en_US
+              pipeline:
+              - pyspelling.filters.comments:
+                  language: shell
+                  strings: true
+            """
+        ).format(self.tempdir)
+        self.mktemp('.comments_shell.yml', config, 'utf-8')
+
+    def test_comments_shell(self):
+        """Test shell comments, strings, and heredocs."""
+
+        bad_comments = ['helo', 'begn']
+        bad_strings = ['flga', 'graet']
+        bad_heredoc = ['recieve', 'teh']
+        good_words = ['yes', 'word']
+        template = self.dedent(
+            """
+            # {}
+            echo "{}" ${{#xyzzy}} $#qwrty
+            cat <<EOF
+            {}
+            EOF
+            """
+        ).format(
+            ' '.join(bad_comments + good_words),
+            ' '.join(bad_strings + good_words),
+            ' '.join(bad_heredoc + good_words)
+        )
+        self.mktemp('test.txt', template, 'utf-8')
+        self.assert_spellcheck('.comments_shell.yml', bad_comments + bad_strings + bad_heredoc)
+
+
+class TestCommentsLanguages(util.PluginTestCase):
+    """Test the built-in language tables."""
+
+    def extract(self, language, text, **options):
+        """Extract comments and strings."""
+
+        sources = CommentsFilter(dict(options, language=language, strings=True))._filter(text, 'test', 'utf-8')
+        return [(s.text, s.context, s.category) for s in sources]
+
+    def test_rust(self):
+        """Test nested comments, raw strings, and lifetimes."""
+
+        text = (
+            "fn f<'a>(s: &'a str) { // don't\n"
+            '    /* a /* nested */ b */\n'
+            '    let r = r#"raw "quoted""#; let c = \'"\';\n'
+            '}\n'
+        )
+        self.assertEqual(
+            self.extract('rust', text),
+            [
+                ('a /* nested */ b ', 'test (2)', 'rust-block-comment'),
+                ("don't", 'test (1)', 'rust-line-comment'),
+                ('raw "quoted"', 'test (3)', 'rust-string')
+            ]
+        )
+
+    def test_lua(self):
+        """Test long comments and strings."""
+
+        text = '-- line\n--[==[ long\n]] still ]==] x = [[long string]] .. "s"\n'
+        self.assertEqual(
+            self.extract('lua', text),
+            [
+                (' long\n]] still ', 'test (2)', 'lua-block-comment'),
+                ('line', 'test (1)', 'lua-line-comment'),
+                ('long string', 'test (3)', 'lua-string'),
+                ('s', 'test (3)', 'lua-string')
+            ]
+        )
+
+    def test_sql(self):
+        """Test doubled quotes and quoted identifiers."""
+
+        text = "select 'it''s' -- comment\nfrom \"table--name\" /* block */\n"
+        self.assertEqual(
+            self.extract('sql', text),
+            [
+                ('block ', 'test (2)', 'sql-block-comment'),
+                ('comment', 'test (1)', 'sql-line-comment'),
+                ("it's", 'test (1)', 'sql-string')
+            ]
+        )
+
+    def test_yaml_grouped(self):
+        """Test grouped comments and comment markers in values."""
+
+        text = 'key: value#text # tail\n# first\n# second\nother: 1\n'
+        self.assertEqual(
+            self.extract('yaml', text, group_comments=True, prefix='config'),
+            [
+                ('tail', 'test (1)', 'config-line-comment'),
+                ('first\nsecond', 'test (2)', 'config-line-comment')
+            ]
+        )
+
+        text = (
+            "description: don't panic # first comment\n"
+            "name: 'quoted # not a comment'\n"
+            "key: value # second comment\n"
+            "list: ['a', \"b\"]\n"
+            "- 'item'\n"
+            "  'key': it's \"plain\"\n"
+        )
+        self.assertEqual(
+            self.extract('yaml', text),
+            [
+                ('first comment', 'test (1)', 'yaml-line-comment'),
+                ('second comment', 'test (3)', 'yaml-line-comment'),
+                ('quoted # not a comment', 'test (2)', 'yaml-string'),
+                ('a', 'test (4)', 'yaml-string'),
+                ('b', 'test (4)', 'yaml-string'),
+                ('item', 'test (5)', 'yaml-string'),
+                ('key', 'test (6)', 'yaml-string')
+            ]
+        )
+
+    def test_shell_heredoc_line(self):
+        """Test that the rest of the line that starts a heredoc is scanned before the heredoc."""
+
+        text = 'cat <<-EOF | grep "x" # after\n\tbody # not a comment\n\tEOF\n# last\n'
+        self.assertEqual(
+            self.extract('shell', text),
+            [
+                ('after', 'test (1)', 'shell-line-comment'),
+                ('last', 'test (4)', 'shell-line-comment'),
+                ('x', 'test (1)', 'shell-string'),
+                ('body # not a comment\n', 'test (2)', 'shell-string')
+            ]
+        )
+
+    def test_invalid_language(self):
+        """Test that a language is required."""
+
+        self.assertRaises(ValueError, CommentsFilter, {'language': 'cobol'})
+        self.assertRaises(ValueError, CommentsFilter, {})
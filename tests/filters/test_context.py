@@ -1,5 +1,6 @@
 """Test context plugin."""
 from .. import util
+from pyspelling.filters.context import ContextFilter
 
 
 class TestContext(util.PluginTestCase):
@@ -56,6 +57,31 @@ class TestContext(util.PluginTestCase):
         self.mktemp('test.txt', template, 'utf-8')
         self.assert_spellcheck('.context.yml', bad_words)
 
+    def test_context_stream(self):
+        """Test context with a file that is large enough to be streamed in small chunks."""
+
+        ContextFilter.MAX_GUESS_SIZE = 64
+        ContextFilter.STREAM_CHUNK_SIZE = 16
+        self.addCleanup(delattr, ContextFilter, 'MAX_GUESS_SIZE')
+        self.addCleanup(delattr, ContextFilter, 'STREAM_CHUNK_SIZE')
+
+        bad_words = ['helo', 'begn']
+        good_words = ['yes', 'word']
+        template = self.dedent(
+            """
+            {}
+            ```
+            djlask dkjsl dksj
+            kudk alks
+            ```
+
+            Line with `incoretc txet`.
+            {}
+            """
+        ).format('\n'.join(bad_words), '\n'.join(good_words))
+        self.mktemp('test.txt', template, 'utf-8')
+        self.assert_spellcheck('.context.yml', bad_words)
+
 
 class TestContextChained(util.PluginTestCase):
     """Test chained context plugin."""
@@ -111,3 +137,39 @@ class TestContextChained(util.PluginTestCase):
         ).format('\n'.join(bad_words + good_words))
         self.mktemp('test.txt', template, 'utf-8')
         self.assert_spellcheck('.context.yml', bad_words)
+
+
+class TestContextCombined(util.PluginTestCase):
+    """Test that delimiters searched together behave as if each was tried on its own."""
+
+    def test_groups_and_flags(self):
+        """Test delimiters that share group names, refer to groups by number, and use global flags."""
+
+        f = ContextFilter(
+            {
+                'escapes': r'(?x) \\ .  # escaped characters',
+                'delimiters': [
+                    {'open': r'(?s)^(?P<open>`{3,})$', 'close': r'^(?P=open)$'},
+                    {'open': r'(?P<open>`+)', 'close': r'(?P=open)'},
+                    {'open': r"(['])", 'close': r'\1'},
+                    {'open': r'(?i)todo:', 'close': r'$'}
+                ]
+            }
+        )
+        self.assertIsNotNone(f.pattern)
+        text = 'a \\`b ``c`d`` \'e\' TODO: f\n```\ng\n```\n'
+        self.assertEqual(f._filter(text), 'c`d e  f \ng\n')
+
+    def test_first_delimiter_wins(self):
+        """Test that the first delimiter that matches at a position is used."""
+
+        f = ContextFilter(
+            {
+                'context_visible_first': True,
+                'delimiters': [
+                    {'open': r'<', 'close': r'>'},
+                    {'open': r'<<', 'close': r'>>'}
+                ]
+            }
+        )
+        self.assertEqual(f._filter('a <<b>> c'), 'a  > c')
@@ -1,5 +1,8 @@
 """Test CPP plugin."""
+import pickle
 from .. import util
+from pyspelling.filters import LazyContext
+from pyspelling.filters.cpp import CppFilter
 
 
 class TestCPP(util.PluginTestCase):
@@ -64,6 +67,37 @@ class TestCPP(util.PluginTestCase):
         self.mktemp('test.txt', template, 'utf-8')
         self.assert_spellcheck('.cpp.yml', bad_words)
 
+    def test_cpp_stream(self):
+        """Test CPP with a file that is large enough to be streamed in small chunks."""
+
+        CppFilter.MAX_GUESS_SIZE = 64
+        CppFilter.STREAM_CHUNK_SIZE = 16
+        self.addCleanup(delattr, CppFilter, 'MAX_GUESS_SIZE')
+        self.addCleanup(delattr, CppFilter, 'STREAM_CHUNK_SIZE')
+
+        bad_block = ['helo', 'begn']
+        bad_comments = ['flga', 'graet']
+        bad_comments2 = ['recieve', 'teh']
+        good_words = ['yes', 'word']
+        template = self.dedent(
+            """
+            /*
+            {}
+            */
+            const char * str = "/* not a comment \\
+            // still not a comment";
+            // {} \
+            {}
+            """
+        ).format(
+            '\n'.join(bad_block + good_words),
+            ' '.join(bad_comments + good_words),
+            ' '.join(bad_comments2 + good_words)
+        )
+
+        self.mktemp('test.txt', template, 'utf-8')
+        self.assert_spellcheck('.cpp.yml', bad_block + bad_comments + bad_comments2)
+
 
 class TestCPPGroupedComments(util.PluginTestCase):
     """Test CPP plugin."""
@@ -565,3 +599,80 @@ class TestCPPChained(util.PluginTestCase):
         )
         self.mktemp('test.txt', template, 'utf-8')
         self.assert_spellcheck('.cpp.yml', bad_words)
+
+
+class TestCPPLazyContext(util.PluginTestCase):
+    """Test that the context of CPP comments is only rendered when it is read."""
+
+    def test_cpp_lazy_context(self):
+        """Test lazy context."""
+
+        text = '/* helo */\nint x;\n// begn\n'
+        sources = CppFilter({})._filter(text, 'test.cpp', 'utf-8')
+        self.assertTrue(all(isinstance(s.lazy_context, LazyContext) for s in sources))
+        self.assertEqual([s.context for s in sources], ['test.cpp (1)', 'test.cpp (3)'])
+
+        # Only the format and its arguments are sent to other processes.
+        sources = pickle.loads(pickle.dumps(sources))
+        self.assertEqual([s.context for s in sources], ['test.cpp (1)', 'test.cpp (3)'])
+
+
+class TestCPPSkipCode(util.PluginTestCase):
+    """Test that code between comments and strings is skipped without losing track of lines."""
+
+    def test_cpp_skip_code(self):
+        """Test skipping code."""
+
+        text = (
+            'int a = b / c;\n'
+            'char *s = u8"helo";  // begn\n'
+            'auto r = LR"x(flga\n)x" + xR"(graet)";\n'
+            '\n'
+            '    // recieve\n'
+            '/* teh */ int d = e * f;\n'
+        )
+        sources = CppFilter({'strings': True, 'string_types': 'sulr'})._filter(text, 'test.cpp', 'utf-8')
+        self.assertEqual(
+            [(s.text, s.context, s.category) for s in sources],
+            [
+                ('teh ', 'test.cpp (7)', 'cpp-block-comment'),
+                ('begn', 'test.cpp (2)', 'cpp-line-comment'),
+                ('recieve', 'test.cpp (6)', 'cpp-line-comment'),
+                ('helo', 'test.cpp (2)', 'cpp-string'),
+                ('flga\n', 'test.cpp (3)', 'cpp-string'),
+                ('graet', 'test.cpp (4)', 'cpp-string')
+            ]
+        )
+
+
+class TestCPPStreamChunks(util.PluginTestCase):
+    """Test that streamed text gives the same sources as text that is read at once."""
+
+    def test_cpp_stream_prefixed_strings(self):
+        """Test prefixed strings that continue on the next chunk."""
+
+        text = 'auto s = u"helo\\\nbegn";\n// flga\n/* graet\n*/\nauto t = L"recieve\nteh";\n'
+        f = CppFilter({'strings': True, 'group_comments': True})
+        expected = sorted((s.text, s.context, s.category) for s in f._filter(text, 'test.cpp', 'utf-8'))
+        sources = f._filter(iter(text.splitlines(True)), 'test.cpp', 'utf-8')
+        self.assertEqual(sorted((s.text, s.context, s.category) for s in sources), expected)
+
+    def test_cpp_stream_progressive(self):
+        """Test that sources are sent as soon as their chunk is read, and grouped comments are kept together."""
+
+        read = []
+
+        def chunks():
+            """Record which chunks have been read."""
+
+            for chunk in ('/* helo */\n', '// begn\n', '// flga\n', 'int x;\n', '/* graet */\n'):
+                read.append(chunk)
+                yield chunk
+
+        sources = CppFilter({'group_comments': True})._filter(chunks(), 'test.cpp', 'utf-8')
+        self.assertEqual(next(sources).text, 'helo ')
+        self.assertEqual(len(read), 1)
+        self.assertEqual(
+            [(s.text, s.context) for s in sources],
+            [('graet ', 'test.cpp (5)'), ('begn\nflga', 'test.cpp (2)')]
+        )
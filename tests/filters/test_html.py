@@ -63,6 +63,62 @@ class TestHTML(util.PluginTestCase):
         self.assert_spellcheck('.html.yml', bad_words)
 
 
+class TestHTMLIndexedIgnores(util.PluginTestCase):
+    """Test ignores that are rejected by tag name, ID, or class before they are evaluated."""
+
+    def setup_fs(self):
+        """Setup file system."""
+
+        config = self.dedent(
+            """
+            matrix:
+            - name: html
+              sources:
+              - '{}/**/*.txt'
+              aspell:
+                lang: en
+                d: en_US
+              hunspell:
+                d: en_US
+              pipeline:
+              - pyspelling.filters.html:
+                  ignores:
+                  - 'DIV.note'
+                  - '#skip'
+                  - '.skip:not(p)'
+                  - ':is(kbd, samp)'
+            """
+        ).format(self.tempdir)
+        self.mktemp('.html.yml', config, 'utf-8')
+
+    def test_html_indexed_ignores(self):
+        """Test indexed ignores."""
+
+        bad_words = ['helo', 'begn', 'flga', 'graet']
+        good_words = ['yes', 'word']
+
+        template = self.dedent(
+            """
+            <html>
+            <body>
+            <div class="note">kjaljw aljwk</div>
+            <div class="other">{}</div>
+            <p id="skip">uouqei euowuw</p>
+            <span class="skip">dksj dkjsk</span>
+            <p class="skip">{}</p>
+            <kbd>ksjk</kbd><samp>akjsks</samp>
+            </body>
+            </html>
+            """
+        ).format(
+            ' '.join(bad_words[:2] + good_words),
+            ' '.join(bad_words[2:] + good_words)
+        )
+
+        self.mktemp('test.txt', template, 'utf-8')
+        self.assert_spellcheck('.html.yml', bad_words)
+
+
 class TestCSSEscapes(util.PluginTestCase):
     """Test CSS escapes."""
 
@@ -1557,3 +1613,98 @@ class TestHTMLContext(util.PluginTestCase):
                 'test.txt: html>body>ol>li>p'
             ]
         )
+
+
+class TestHTMLLxmlEngine(util.PluginTestCase):
+    """Test HTML plugin with the `lxml` engine."""
+
+    def setup_fs(self):
+        """Setup file system."""
+
+        config = self.dedent(
+            """
+            matrix:
+            - name: html
+              sources:
+              - '{}/**/*.txt'
+              aspell:
+                lang: en
+                d: en_US
+              hunspell:
+                d: en_US
+              pipeline:
+              - pyspelling.filters.html:
+                  engine: lxml
+                  attributes:
+                  - alt
+                  ignores:
+                  - ':is(code, pre)'
+                  - 'span:matches(.some-class, #some-id)'
+            - name: fallback
+              sources:
+              - '{}/**/*.txt'
+              aspell:
+                lang: en
+                d: en_US
+              hunspell:
+                d: en_US
+              pipeline:
+              - pyspelling.filters.html:
+                  engine: lxml
+                  ignores:
+                  - 'p:first-child'
+            """
+        ).format(self.tempdir, self.tempdir)
+        self.mktemp('.html.yml', config, 'utf-8')
+
+    def test_html_lxml(self):
+        """Test HTML with the `lxml` engine."""
+
+        template = self.dedent(
+            """
+            <html>
+            <head>
+            </head>
+            <body>
+            <!-- helo -->
+            <ol>
+            <li>
+            <p>Some <code>dkdd</code> text
+                flga</p>
+                <div><pre><code>kdjk</code></pre></div>
+                <img src="./image.png" alt="teh"/>
+                begn
+            </li>
+            </ol>
+            </html>
+            """
+        )
+
+        self.mktemp('test.txt', template, 'utf-8')
+        self.assert_spellcheck('.html.yml', ['helo', 'flga', 'teh', 'begn'], names=['html'])
+        self.assert_context(
+            '.html.yml',
+            [
+                'test.txt: html>body<!--comment-->',
+                'test.txt: html>body>ol>li>img[alt]',
+                'test.txt: html>body>ol>li',
+                'test.txt: html>body>ol>li>p'
+            ],
+            names=['html']
+        )
+
+    def test_html_lxml_fallback(self):
+        """Test that selectors the `lxml` engine doesn't support fall back to BeautifulSoup."""
+
+        template = self.dedent(
+            """
+            <html>
+            <body>
+            <div><p>dkdd</p><p>flga</p></div>
+            </body>
+            </html>
+            """
+        )
+
+        self.mktemp('test.txt', template, 'utf-8')
+        self.assert_spellcheck('.html.yml', ['flga'], names=['fallback'])
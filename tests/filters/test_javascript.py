@@ -1,5 +1,6 @@
 """Test JavaScript plugin."""
 from .. import util
+from pyspelling.filters.javascript import JavaScriptFilter
 
 
 class TestJavaScript(util.PluginTestCase):
@@ -137,6 +138,20 @@ class TestJavaScriptStrings(util.PluginTestCase):
         self.mktemp('test.txt', template, 'utf-8')
         self.assert_spellcheck('.javascript.yml', bad_words)
 
+    def test_javascript_unterminated_substitution(self):
+        """Test that a template whose substitution is never closed ends with the text."""
+
+        text = 'x = a / b;\n// helo\ny = `begn ${"flga"\n+ z'
+        sources = JavaScriptFilter({'strings': True})._filter(text, 'test.js', 'utf-8')
+        self.assertEqual(
+            [(s.text, s.context, s.category) for s in sources],
+            [
+                ('helo', 'test.js (2)', 'js-line-comment'),
+                ('flga', 'test.js (3)', 'js-strings'),
+                ('begn ', 'test.js (4)', 'js-strings')
+            ]
+        )
+
 
 class TestJavaScriptGroupedComments(util.PluginTestCase):
     """Test JavaScript plugin."""
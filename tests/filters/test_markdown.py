@@ -1,5 +1,6 @@
 """Test Markdown plugin."""
 from .. import util
+from pyspelling.filters.markdown import MarkdownFilter
 
 
 class TestMarkdown(util.PluginTestCase):
@@ -112,3 +113,149 @@ class TestMarkdownChained(util.PluginTestCase):
 
         self.mktemp('test.txt', template, 'utf-8')
         self.assert_spellcheck('.markdown.yml', bad_words)
+
+
+class TestMarkdownExtractText(util.PluginTestCase):
+    """Test Markdown plugin extracting text from the element tree."""
+
+    def setup_fs(self):
+        """Setup file system."""
+
+        config = self.dedent(
+            """
+            matrix:
+            - name: markdown
+              sources:
+              - '{}/**/*.txt'
+              aspell:
+                lang: en
+                d: en_US
+              hunspell:
+                d: en_US
+              pipeline:
+              - pyspelling.filters.markdown:
+                  markdown_extensions:
+                  - markdown.extensions.fenced_code:
+                  - markdown.extensions.footnotes:
+                  extract_text: true
+                  attributes:
+                  - alt
+                  ignores:
+                  - code
+                  - pre
+                  - .skip
+            """
+        ).format(self.tempdir)
+        self.mktemp('.markdown.yml', config, 'utf-8')
+
+    def test_markdown_extract_text(self):
+        """Test extracting text."""
+
+        template = self.dedent(
+            """
+            ## Title
+
+            helo[^1] <span class="skip">kdjkd</span> &amp; <b>begn</b>
+
+            ![teh](image.png)
+
+            <!-- flga -->
+
+            ```
+            skjadf alsdkjls
+            ```
+
+            [^1]: graet
+            """
+        )
+
+        self.mktemp('test.txt', template, 'utf-8')
+        self.assert_spellcheck('.markdown.yml', ['flga', 'teh', 'helo', 'begn', 'graet'])
+        self.assert_context(
+            '.markdown.yml',
+            [
+                'test.txt: html>body<!--comment-->',
+                'test.txt: html>body>p>img[alt]',
+                'test.txt: html>body>h2',
+                'test.txt: html>body>p',
+                'test.txt: html>body>div>ol>li>p'
+            ]
+        )
+
+
+class TestMarkdownStripCode(util.PluginTestCase):
+    """Test stripping front matter and code before Markdown is converted."""
+
+    def setup_fs(self):
+        """Setup file system."""
+
+        config = self.dedent(
+            """
+            matrix:
+            - name: markdown
+              sources:
+              - '{}/**/*.txt'
+              aspell:
+                lang: en
+                d: en_US
+              hunspell:
+                d: en_US
+              pipeline:
+              - pyspelling.filters.markdown:
+                  strip_front_matter: true
+                  strip_fenced_code: true
+                  strip_indented_code: true
+              - pyspelling.filters.html:
+            """
+        ).format(self.tempdir)
+        self.mktemp('.markdown.yml', config, 'utf-8')
+
+    def test_markdown_strip_code(self):
+        """Test stripping code."""
+
+        bad_words = ['helo', 'begn', 'flga']
+        template = self.dedent(
+            """
+            ---
+            title: kdjkd aldksj
+            ---
+            ## Title
+
+            helo
+
+            ```python
+            skjadf alsdkjls
+            ```
+
+                iowqeu zmxncb
+
+            - begn
+
+                flga
+            """
+        )
+
+        self.mktemp('test.txt', template, 'utf-8')
+        self.assert_spellcheck('.markdown.yml', bad_words)
+
+    def test_markdown_strip_code_lines(self):
+        """Test that stripping code doesn't move the remaining lines."""
+
+        text = '---\na: b\n---\ntext\n\n~~~~\ncode\n~~~~~\n\n    code\n\nmore\n\n```\nnever closed\n'
+        flt = MarkdownFilter({'strip_front_matter': True, 'strip_fenced_code': True, 'strip_indented_code': True})
+        self.assertEqual(
+            flt.strip_code(text),
+            '\n\n\ntext\n\n\n\n\n\n\n\nmore\n\n```\nnever closed\n'
+        )
+
+    def test_markdown_strip_code_indented_list(self):
+        """Test that paragraphs continuing a list with an indented marker are not code."""
+
+        flt = MarkdownFilter({'strip_indented_code': True})
+        for text in (
+            'Intro\n\n * item one\n\n    continuation paragraph\n',
+            'Intro\n\n  1) item one\n\n    continuation paragraph\n',
+            'Intro\n\n- item one\n\n  second paragraph\n\n    continuation paragraph\n'
+        ):
+            self.assertEqual(flt.strip_code(text), text)
+        self.assertEqual(flt.strip_code('Intro\n\n   text\n\n    code\n'), 'Intro\n\n   text\n\n\n')
@@ -1,5 +1,7 @@
 """Test ODF plugin."""
 from .. import util
+from pyspelling import filters
+from pyspelling.filters.odf import OdfFilter
 
 
 class TestODFFilter(util.PluginTestCase):
@@ -89,6 +91,58 @@ class TestODFFilter(util.PluginTestCase):
         self.mktemp('.ods.yml', config, 'utf-8')
         self.assert_spellcheck('.ods.yml', ['tihs', 'smoe', 'txet'])
 
+    def test_odt_stream(self):
+        """Test `odt` files that are large enough to be streamed."""
+
+        OdfFilter.MAX_GUESS_SIZE = 64
+        OdfFilter.STREAM_CHUNK_SIZE = 16
+        self.addCleanup(delattr, OdfFilter, 'MAX_GUESS_SIZE')
+        self.addCleanup(delattr, OdfFilter, 'STREAM_CHUNK_SIZE')
+
+        config = self.dedent(
+            """
+            matrix:
+            - name: odt
+              sources:
+              - 'tests/**/*.odt'
+              aspell:
+                lang: en
+                d: en_US
+              hunspell:
+                d: en_US
+              pipeline:
+              - pyspelling.filters.odf
+            """
+        ).format(self.tempdir)
+        self.mktemp('.odt.yml', config, 'utf-8')
+        self.assert_spellcheck('.odt.yml', ['tihs', 'smoe', 'txet'])
+
+    def test_odp_stream(self):
+        """Test `odp` files that are large enough to be streamed."""
+
+        OdfFilter.MAX_GUESS_SIZE = 64
+        OdfFilter.STREAM_CHUNK_SIZE = 16
+        self.addCleanup(delattr, OdfFilter, 'MAX_GUESS_SIZE')
+        self.addCleanup(delattr, OdfFilter, 'STREAM_CHUNK_SIZE')
+
+        config = self.dedent(
+            """
+            matrix:
+            - name: odp
+              sources:
+              - 'tests/**/*.odp'
+              aspell:
+                lang: en
+                d: en_US
+              hunspell:
+                d: en_US
+              pipeline:
+              - pyspelling.filters.odf
+            """
+        ).format(self.tempdir)
+        self.mktemp('.odp.yml', config, 'utf-8')
+        self.assert_spellcheck('.odp.yml', ['tihs', 'smoe', 'txet'])
+
     def test_odt_chained(self):
         """Test `odt` chained files."""
 
@@ -133,3 +187,33 @@ class TestODFFilter(util.PluginTestCase):
         ).format(self.tempdir)
         self.mktemp('.fodt.yml', config, 'utf-8')
         self.assert_spellcheck('.fodt.yml', ['tihs', 'smoe', 'txet'])
+
+
+class TestODFBinarySource(util.PluginTestCase):
+    """Test binary sources from a previous filter."""
+
+    def extract(self, text, encoding):
+        """Filter the source and get the text and contexts."""
+
+        sources = OdfFilter({})._run(filters.SourceText(text, 'test', encoding, 'text'))
+        return [(s.text, s.context, s.encoding) for s in sources]
+
+    def test_binary_zip(self):
+        """Test that `bytes` and `memoryview` content filters the same as text."""
+
+        with open('tests/test_files/odf/test.odt', 'rb') as f:
+            content = f.read()
+        expected = self.extract(content.decode('latin-1'), 'latin-1')
+        self.assertTrue(expected)
+        self.assertEqual(self.extract(content, ''), expected)
+        self.assertEqual(self.extract(memoryview(content), ''), expected)
+
+    def test_binary_flat(self):
+        """Test that binary flat XML is decoded."""
+
+        with open('tests/test_files/odf/test.fodt', 'rb') as f:
+            content = f.read()
+        expected = self.extract(content.decode('utf-8'), 'utf-8')
+        self.assertTrue(expected)
+        self.assertEqual(self.extract(content, ''), expected)
+        self.assertEqual(self.extract(bytearray(content), 'utf-8'), expected)
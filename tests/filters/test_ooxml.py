@@ -1,5 +1,6 @@
 """Test Office Open XML plugin."""
 from .. import util
+from pyspelling.filters.ooxml import OoxmlFilter
 
 
 class TestOOOXMLFilter(util.PluginTestCase):
@@ -68,6 +69,58 @@ class TestOOOXMLFilter(util.PluginTestCase):
         self.mktemp('.xlsx.yml', config, 'utf-8')
         self.assert_spellcheck('.xlsx.yml', ['tihs', 'smoe', 'txet'])
 
+    def test_docx_stream(self):
+        """Test `docx` files that are large enough to be streamed."""
+
+        OoxmlFilter.MAX_GUESS_SIZE = 64
+        OoxmlFilter.STREAM_CHUNK_SIZE = 16
+        self.addCleanup(delattr, OoxmlFilter, 'MAX_GUESS_SIZE')
+        self.addCleanup(delattr, OoxmlFilter, 'STREAM_CHUNK_SIZE')
+
+        config = self.dedent(
+            """
+            matrix:
+            - name: docx
+              sources:
+              - 'tests/**/*.docx'
+              aspell:
+                lang: en
+                d: en_US
+              hunspell:
+                d: en_US
+              pipeline:
+              - pyspelling.filters.ooxml
+            """
+        ).format(self.tempdir)
+        self.mktemp('.docx.yml', config, 'utf-8')
+        self.assert_spellcheck('.docx.yml', ['tihs', 'smoe', 'txet'])
+
+    def test_xlsx_stream(self):
+        """Test `xlsx` files that are large enough to be streamed."""
+
+        OoxmlFilter.MAX_GUESS_SIZE = 64
+        OoxmlFilter.STREAM_CHUNK_SIZE = 16
+        self.addCleanup(delattr, OoxmlFilter, 'MAX_GUESS_SIZE')
+        self.addCleanup(delattr, OoxmlFilter, 'STREAM_CHUNK_SIZE')
+
+        config = self.dedent(
+            """
+            matrix:
+            - name: xlsx
+              sources:
+              - 'tests/**/*.xlsx'
+              aspell:
+                lang: en
+                d: en_US
+              hunspell:
+                d: en_US
+              pipeline:
+              - pyspelling.filters.ooxml
+            """
+        ).format(self.tempdir)
+        self.mktemp('.xlsx.yml', config, 'utf-8')
+        self.assert_spellcheck('.xlsx.yml', ['tihs', 'smoe', 'txet'])
+
     def test_docx_chained(self):
         """Test `docx` chained files."""
 
@@ -90,3 +143,37 @@ class TestOOOXMLFilter(util.PluginTestCase):
         ).format(self.tempdir)
         self.mktemp('.docx.yml', config, 'utf-8')
         self.assert_spellcheck('.docx.yml', ['tihs', 'smoe', 'txet'])
+
+
+class TestOOXMLJobs(util.PluginTestCase):
+    """Test parsing the parts of a package in worker processes."""
+
+    def extract(self, filename, f=None, **options):
+        """Filter the file and get the text and contexts."""
+
+        if f is None:
+            f = OoxmlFilter(options)
+        return [(s.text, s.context, s.category) for s in f._run_first(filename)]
+
+    def test_pptx_order(self):
+        """Test that slides keep their order when parsed by workers."""
+
+        expected = self.extract('tests/test_files/ooxml/test.pptx')
+        self.assertEqual(len(expected), 2)
+        self.assertEqual(self.extract('tests/test_files/ooxml/test.pptx', jobs=2), expected)
+
+    def test_pool_reused(self):
+        """Test that the pool of worker processes is created once and reused for every package."""
+
+        f = OoxmlFilter({'jobs': 2})
+        expected = self.extract('tests/test_files/ooxml/test.pptx')
+        self.assertEqual(self.extract('tests/test_files/ooxml/test.pptx', f), expected)
+        pool = f.pool
+        self.assertIsNotNone(pool)
+        self.assertEqual(self.extract('tests/test_files/ooxml/test.pptx', f), expected)
+        self.assertIs(f.pool, pool)
+
+    def test_invalid_jobs(self):
+        """Test that `jobs` cannot be negative."""
+
+        self.assertRaises(ValueError, OoxmlFilter, {'jobs': -1})
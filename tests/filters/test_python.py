@@ -1,7 +1,9 @@
 """Test Python plugin."""
 from .. import util
+from pyspelling.filters.python import PythonFilter
 import pytest
 import sys
+import warnings
 
 class TestPython(util.PluginTestCase):
     """Test Python plugin."""
@@ -457,6 +459,86 @@ class TestPythonStringAllow(util.PluginTestCase):
         self.assert_spellcheck('.python.yml', ['aaaa', 'bbbb', 'eeee'])
 
 
+class TestPythonDocstrings(util.PluginTestCase):
+    """Test that docstrings found from the syntax tree match those found from the tokens."""
+
+    def get_docstrings(self, content, tokens=False):
+        """Get docstrings with their context."""
+
+        f = PythonFilter({'comments': False, 'strings': False})
+        if tokens:
+            f.find_docstrings = lambda text, context: None
+        return [(s.text, str(s.context), s.category) for s in f._filter(content, 'test.py', 'utf-8')]
+
+    def test_docstrings(self):
+        """Test docstrings, ancestry, and strings that are not docstrings."""
+
+        content = self.dedent(
+            '''
+            """Module."""
+            import os
+
+            "Not after a blank line."
+            # Comment
+
+            "After a comment."
+            class Example(Base):
+                """Class."""
+
+                def method(self, value='default'):
+                    """Method without ancestry, as strings in the header end it."""
+
+                    def inner():
+                        """Inner."""
+
+                    x = 1
+                    "After a statement."
+                    if x:
+                        "In a block."
+                    elif value:
+                        pass
+
+                    "After a block."
+            '''
+        )
+        docstrings = self.get_docstrings(content)
+        self.assertIsNotNone(PythonFilter({}).find_docstrings(content, 'test.py'))
+        self.assertEqual(docstrings, self.get_docstrings(content, True))
+        self.assertEqual(
+            [d[:2] for d in docstrings],
+            [
+                ('Module.', 'test.py(1): '),
+                ('After a comment.', 'test.py(7): '),
+                ('Class.', 'test.py(9): Example'),
+                ('Method without ancestry, as strings in the header end it.', 'test.py(12): Example'),
+                ('Inner.', 'test.py(15): Example.inner()'),
+                ('After a statement.', 'test.py(18): Example'),
+                ('In a block.', 'test.py(20): Example'),
+                ('After a block.', 'test.py(24): Example')
+            ]
+        )
+
+    def test_fallback(self):
+        """Test code that needs the tokens."""
+
+        for content in (
+            'def function(): return False\n"""Docstring."""\n',
+            'if True:\n  """Two spaces."""\n',
+            'x = 1; \\\n"""Continued."""\n',
+            'print "Python 2"\n'
+        ):
+            self.assertIsNone(PythonFilter({}).find_docstrings(content, 'test.py'))
+            self.assertEqual(self.get_docstrings(content), self.get_docstrings(content, True))
+
+    def test_no_warnings(self):
+        """Test that parsing code with invalid escapes doesn't warn."""
+
+        content = '"""Docstring."""\npattern = "\\d+"\n'
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            self.assertIsNotNone(PythonFilter({}).find_docstrings(content, 'test.py'))
+
+
 class TestPythonChained(util.PluginTestCase):
     """Test Python plugin."""
 
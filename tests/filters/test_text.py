@@ -50,6 +50,33 @@ class TestText(util.PluginTestCase):
         self.mktemp('test.txt', '\n'.join(bad_words + good_words), 'utf-32')
         self.assert_spellcheck('.text.yml', bad_words)
 
+    def test_text_default_encoding(self):
+        """Test text that is decoded with the default encoding from the already read buffer."""
+
+        config = self.dedent(
+            """
+            matrix:
+            - name: text
+              default_encoding: latin-1
+              sources:
+              - '{}/**/*.txt'
+              aspell:
+                lang: en
+                d: en_US
+              hunspell:
+                d: en_US
+              pipeline:
+              - pyspelling.filters.text:
+                  convert_encoding: utf-8
+            """
+        ).format(self.tempdir)
+        self.mktemp('.latin.yml', config, 'utf-8')
+
+        bad_words = ['helo', 'begn']
+        good_words = ['yes', 'word', '\xa7']
+        self.mktemp('test.txt', '\r\n'.join(bad_words + good_words), 'latin-1')
+        self.assert_spellcheck('.latin.yml', bad_words)
+
 
 class TestTextChained(util.PluginTestCase):
     """Test text extension."""
@@ -1,5 +1,6 @@
 """Test URL plugin."""
 from .. import util
+from pyspelling.filters.url import URLFilter
 
 
 class TestURL(util.PluginTestCase):
@@ -81,3 +82,15 @@ class TestURLChained(util.PluginTestCase):
         ).format(' '.join(bad_words + good_words))
         self.mktemp('test.txt', text, 'utf-8')
         self.assert_spellcheck('.url.yml', bad_words)
+
+
+class TestURLLines(util.PluginTestCase):
+    """Test that links and emails are only removed from the lines that can hold them."""
+
+    def test_url_lines(self):
+        """Test lines with and without links and emails."""
+
+        f = URLFilter({})
+        text = 'plain\nsee WWW.example.com_x and\nme@mail.com\nuser@www.example.com\nhttp://ab.cd\n_http://ef.gh'
+        self.assertEqual(f._filter(text), 'plain\nsee  and\n\nuser@\n\n_')
+        self.assertEqual(f._filter('no links here'), 'no links here')
@@ -1,5 +1,6 @@
 """Test XML plugin."""
 from .. import util
+from pyspelling.filters.xml import XmlFilter
 
 
 class TestXMLNamespaceNoDefault(util.PluginTestCase):
@@ -201,3 +202,266 @@ class TestXMLNamespace(util.PluginTestCase):
 
         self.mktemp('test.txt', template, 'utf-8')
         self.assert_spellcheck('.xml.yml', ['aaaa', 'dddd', 'ffff', 'jjjj'])
+
+
+class TestXMLNamespaceLxmlEngine(util.PluginTestCase):
+    """Test XML plugin namespaces with the `lxml` engine."""
+
+    def setup_fs(self):
+        """Setup file system."""
+
+        config = self.dedent(
+            """
+            matrix:
+            - name: xml
+              sources:
+              - '{}/**/*.txt'
+              aspell:
+                lang: en
+                d: en_US
+              hunspell:
+                d: en_US
+              pipeline:
+              - pyspelling.filters.xml:
+                  engine: lxml
+                  namespaces:
+                    "": http://me.com/namespaces/barbar
+                    foo: http://me.com/namespaces/foofoo
+                    bar: http://me.com/namespaces/foobar
+                  ignores:
+                  - 'foo|title'
+                  - 'bar|*'
+                  - '|head'
+                  - '*|e2'
+                  - e3
+            """
+        ).format(self.tempdir)
+        self.mktemp('.xml.yml', config, 'utf-8')
+
+    def test_xml_namespace_lxml(self):
+        """Test XML namespace with the `lxml` engine."""
+
+        template = self.dedent(
+            """
+            <?xml version="1.0" encoding="UTF-8"?>
+            <tag xmlns="http://me.com/namespaces/barbar">
+              <head>aaaa
+              </head>
+              <foo:other xmlns:foo="http://me.com/namespaces/foofoo"
+                     xmlns:bar="http://me.com/namespaces/foobar">
+              <foo:head>
+                <foo:title>bbbb</foo:title>
+                <bar:title>cccc</bar:title>
+              </foo:head>
+              <body>
+                <foo:e1>dddd</foo:e1>
+                <bar:e1>eeee</bar:e1>
+                <e1>ffff</e1>
+                <foo:e2>gggg</foo:e2>
+                <bar:e2>hhhh</bar:e2>
+                <e2>iiii</e2>
+                <foo:e3>jjjj</foo:e3>
+                <bar:e3>kkkk</bar:e3>
+                <e3>llll</e3>
+              </body>
+              </foo:other>
+            </tag>
+            """
+        )
+
+        self.mktemp('test.txt', template, 'utf-8')
+        self.assert_spellcheck('.xml.yml', ['aaaa', 'dddd', 'ffff', 'jjjj'])
+
+    def test_xml_empty_namespace_prefix_lxml(self):
+        """Test that prefixes declared with an empty namespace fall back to BeautifulSoup."""
+
+        template = self.dedent(
+            """
+            <?xml version="1.0" encoding="UTF-8"?>
+            <n0:tag xmlns:n0="">
+              <n0:e1>aaaa</n0:e1>
+              <e3>bbbb</e3>
+              <n0:e3>cccc</n0:e3>
+            </n0:tag>
+            """
+        )
+
+        self.mktemp('test.txt', template, 'utf-8')
+        self.assert_spellcheck('.xml.yml', ['aaaa', 'bbbb', 'cccc'])
+
+
+class TestXMLNamespaceStream(util.PluginTestCase):
+    """Test XML plugin namespaces with a file that is large enough to be streamed."""
+
+    def setup_fs(self):
+        """Setup file system."""
+
+        config = self.dedent(
+            """
+            matrix:
+            - name: xml
+              sources:
+              - '{}/**/*.txt'
+              aspell:
+                lang: en
+                d: en_US
+              hunspell:
+                d: en_US
+              pipeline:
+              - pyspelling.filters.xml:
+                  namespaces:
+                    "": http://me.com/namespaces/barbar
+                    foo: http://me.com/namespaces/foofoo
+                    bar: http://me.com/namespaces/foobar
+                  ignores:
+                  - 'foo|title'
+                  - 'bar|*'
+                  - '|head'
+                  - '*|e2'
+                  - e3
+            """
+        ).format(self.tempdir)
+        self.mktemp('.xml.yml', config, 'utf-8')
+
+    def test_xml_namespace_stream(self):
+        """Test XML namespace with a streamed file."""
+
+        XmlFilter.MAX_GUESS_SIZE = 64
+        XmlFilter.STREAM_CHUNK_SIZE = 16
+        self.addCleanup(delattr, XmlFilter, 'MAX_GUESS_SIZE')
+        self.addCleanup(delattr, XmlFilter, 'STREAM_CHUNK_SIZE')
+
+        template = self.dedent(
+            """
+            <?xml version="1.0" encoding="UTF-8"?>
+            <tag xmlns="http://me.com/namespaces/barbar">
+              <head>aaaa
+              </head>
+              <foo:other xmlns:foo="http://me.com/namespaces/foofoo"
+                     xmlns:bar="http://me.com/namespaces/foobar">
+              <foo:head>
+                <foo:title>bbbb</foo:title>
+                <bar:title>cccc</bar:title>
+              </foo:head>
+              <body>
+                <foo:e1>dddd</foo:e1>
+                <bar:e1>eeee</bar:e1>
+                <e1>ffff</e1>
+                <foo:e2>gggg</foo:e2>
+                <bar:e2>hhhh</bar:e2>
+                <e2>iiii</e2>
+                <foo:e3>jjjj</foo:e3>
+                <bar:e3>kkkk</bar:e3>
+                <e3>llll</e3>
+              </body>
+              </foo:other>
+            </tag>
+            """
+        )
+
+        self.mktemp('test.txt', template, 'utf-8')
+        self.assert_spellcheck('.xml.yml', ['aaaa', 'dddd', 'ffff', 'jjjj'])
+
+    def test_xml_empty_namespace_prefix_stream(self):
+        """Test that prefixes declared with an empty namespace are dropped like BeautifulSoup does."""
+
+        XmlFilter.MAX_GUESS_SIZE = 64
+        self.addCleanup(delattr, XmlFilter, 'MAX_GUESS_SIZE')
+
+        template = self.dedent(
+            """
+            <?xml version="1.0" encoding="UTF-8"?>
+            <n0:tag xmlns:n0="">
+              <n0:e1>aaaa</n0:e1>
+              <e3>bbbb</e3>
+              <n0:e3>cccc</n0:e3>
+            </n0:tag>
+            """
+        )
+
+        self.mktemp('test.txt', template, 'utf-8')
+        self.assert_spellcheck('.xml.yml', ['aaaa', 'bbbb', 'cccc'])
+
+
+class TestXMLDeepLxmlEngine(util.PluginTestCase):
+    """Test deeply nested XML with the `lxml` engine."""
+
+    def setup_fs(self):
+        """Setup file system."""
+
+        config = self.dedent(
+            """
+            matrix:
+            - name: xml
+              sources:
+              - '{}/**/*.txt'
+              aspell:
+                lang: en
+                d: en_US
+              hunspell:
+                d: en_US
+              pipeline:
+              - pyspelling.filters.xml:
+                  engine: lxml
+                  attributes:
+                  - title
+                  break_tags:
+                  - block
+                  ignores:
+                  - skip
+            """
+        ).format(self.tempdir)
+        self.mktemp('.xml.yml', config, 'utf-8')
+
+    def test_xml_deep_lxml(self):
+        """Test a document that is nested deeper than the recursion limit."""
+
+        bad_words = ['helo', 'begn', 'flga']
+        depth = 1500
+        template = '<root><block title="{}">{}{} <skip>kjaljw</skip><item>{}</item>{}</block></root>'.format(
+            bad_words[0], '<level>' * depth, bad_words[1], bad_words[2], '</level>' * depth
+        )
+
+        self.mktemp('test.txt', template, 'utf-8')
+        self.assert_spellcheck('.xml.yml', bad_words)
+
+
+class TestXMLEntitiesLxmlEngine(util.PluginTestCase):
+    """Test XML entities declared in the internal DTD with the `lxml` engine."""
+
+    def setup_fs(self):
+        """Setup file system."""
+
+        config = self.dedent(
+            """
+            matrix:
+            - name: xml
+              sources:
+              - '{}/**/*.txt'
+              aspell:
+                lang: en
+                d: en_US
+              hunspell:
+                d: en_US
+              pipeline:
+              - pyspelling.filters.xml:
+                  engine: lxml
+            """
+        ).format(self.tempdir)
+        self.mktemp('.xml.yml', config, 'utf-8')
+
+    def test_xml_entities_lxml(self):
+        """Test that the `lxml` engine expands entities."""
+
+        template = self.dedent(
+            """
+            <?xml version="1.0" encoding="UTF-8"?>
+            <!DOCTYPE root [
+            <!ENTITY ent1 "helo">
+            ]>
+            <root>&ent1; <item>begn</item></root>
+            """
+        )
+
+        self.mktemp('test.txt', template, 'utf-8')
+        self.assert_spellcheck('.xml.yml', ['helo', 'begn'])
@@ -1,5 +1,8 @@
 """Test text plugin."""
+import os
 from . import util
+from pyspelling import spellcheck, SpellingTask, SharedPipelines, STREAMED, util as pyspelling_util
+from pyspelling.filters.text import TextFilter
 from wcmatch._wcparse import PatternLimitException
 
 
@@ -382,3 +385,414 @@ class TestSkipDictionary(util.PluginTestCase):
         # will be overwritten with the format for the wrong spell checker.
         self.assert_spellcheck('.skip_compile.yml', [], skip_dict_compile=False, only_one=True)
         self.assert_spellcheck('.skip_compile.yml', [], skip_dict_compile=True, only_one=True)
+
+
+class TestSuggest(util.PluginTestCase):
+    """Test spelling suggestions."""
+
+    def test_suggest(self):
+        """Test that suggestions are attached to results with misspelled words."""
+
+        config = self.dedent(
+            """
+            matrix:
+            - name: suggest
+              default_encoding: utf-8
+              sources:
+              - '{}/**/*.txt'
+              aspell:
+                lang: en
+                d: en_US
+              hunspell:
+                d: en_US
+            """
+        ).format(self.tempdir)
+        self.mktemp('.suggest.yml', config, 'utf-8')
+
+        bad_words = ['helo', 'begn']
+        good_words = ['yes', 'word']
+        self.mktemp('test1.txt', '\n'.join(bad_words + good_words), 'utf-8')
+        self.mktemp('test2.txt', '\n'.join(bad_words), 'utf-8')
+
+        for checker, binary in (('hunspell', util.HUNSPELL), ('aspell', util.ASPELL)):
+            location = util.which(binary)
+            if not location:
+                continue
+            count = 0
+            for results in spellcheck(
+                os.path.join(self.tempdir, '.suggest.yml'),
+                checker=checker,
+                binary=location,
+                debug=True,
+                suggest=True
+            ):
+                if results.words:
+                    count += 1
+                    self.assertEqual(sorted(bad_words), sorted(results.suggestions))
+                    self.assertTrue(all(isinstance(s, list) for s in results.suggestions.values()))
+            self.assertEqual(count, 2)
+
+    def test_suggest_run(self):
+        """Test that suggestions are attached to the results of every task in the run."""
+
+        config = self.dedent(
+            """
+            matrix:
+            - name: first
+              default_encoding: utf-8
+              sources:
+              - '{0}/**/test1.txt'
+              aspell:
+                lang: en
+                d: en_US
+              hunspell:
+                d: en_US
+            - name: second
+              default_encoding: utf-8
+              sources:
+              - '{0}/**/test2.txt'
+              aspell:
+                lang: en
+                d: en_US
+              hunspell:
+                d: en_US
+            """
+        ).format(self.tempdir)
+        self.mktemp('.suggest_run.yml', config, 'utf-8')
+
+        self.mktemp('test1.txt', 'helo yes', 'utf-8')
+        self.mktemp('test2.txt', 'helo begn word', 'utf-8')
+
+        for checker, binary in (('hunspell', util.HUNSPELL), ('aspell', util.ASPELL)):
+            location = util.which(binary)
+            if not location:
+                continue
+            results = [
+                r for r in spellcheck(
+                    os.path.join(self.tempdir, '.suggest_run.yml'),
+                    checker=checker,
+                    binary=location,
+                    debug=True,
+                    suggest=True
+                )
+                if r.words
+            ]
+            self.assertEqual([sorted(r.suggestions) for r in results], [['helo'], ['begn', 'helo']])
+            self.assertEqual(results[0].suggestions['helo'], results[1].suggestions['helo'])
+
+
+class TestLanguages(util.PluginTestCase):
+    """Test checking multiple languages in one task."""
+
+    def setup_fs(self):
+        """Setup files."""
+
+        self.mktemp('.wordlist-one.txt', 'qwertyone', 'utf-8')
+        self.mktemp('.wordlist-two.txt', 'qwertytwo', 'utf-8')
+        self.mktemp('test.txt', 'qwertyone qwertytwo qwertythree yes', 'utf-8')
+
+    def get_config(self, results='intersection', pipeline=True):
+        """Get the configuration."""
+
+        return self.dedent(
+            """
+            matrix:
+            - name: languages
+              default_encoding: utf-8
+              language_results: {results}
+              sources:
+              - '{temp}/**/*.txt'
+              aspell:
+                lang: en
+                d: en_US
+              hunspell:
+                d: en_US
+              languages:
+              - name: one
+                dictionary:
+                  wordlists:
+                  - '{temp}/.wordlist-one.txt'
+                  output: '{temp}/one.dic'
+              - name: two
+                dictionary:
+                  wordlists:
+                  - '{temp}/.wordlist-two.txt'
+                  output: '{temp}/two.dic'
+              {pipeline}
+            """
+        ).format(temp=self.tempdir, results=results, pipeline='' if pipeline else 'pipeline: null')
+
+    def test_languages_intersection(self):
+        """Test that only words unknown to all languages are reported."""
+
+        self.mktemp('.languages.yml', self.get_config(), 'utf-8')
+        self.assert_spellcheck('.languages.yml', ['qwertythree'])
+
+    def test_languages_intersection_no_pipeline(self):
+        """Test that only words unknown to all languages are reported when not using a pipeline."""
+
+        self.mktemp('.languages.yml', self.get_config(pipeline=False), 'utf-8')
+        self.assert_spellcheck('.languages.yml', ['qwertythree'])
+
+    def test_languages_each(self):
+        """Test that results are reported per language."""
+
+        self.mktemp('.languages.yml', self.get_config('each'), 'utf-8')
+
+        for checker, binary in (('hunspell', util.HUNSPELL), ('aspell', util.ASPELL)):
+            location = util.which(binary)
+            if not location:
+                continue
+            words = {}
+            for results in spellcheck(
+                os.path.join(self.tempdir, '.languages.yml'),
+                checker=checker,
+                binary=location,
+                debug=True
+            ):
+                words.setdefault(results.language, set()).update(results.words)
+            self.assertEqual(words, {'one': {'qwertytwo', 'qwertythree'}, 'two': {'qwertyone', 'qwertythree'}})
+
+    def test_languages_pool(self):
+        """Test that all files of a task are checked in the same thread pool, which is shut down with the task."""
+
+        self.mktemp('test2.txt', 'qwertyone qwertythree', 'utf-8')
+        config = pyspelling_util.yaml_load(self.get_config())
+
+        for checker, binary in (('hunspell', util.HUNSPELL), ('aspell', util.ASPELL)):
+            location = util.which(binary)
+            if not location:
+                continue
+            task = SpellingTask(checker, config, location, jobs=1)
+            pools = set()
+            for _ in task.run_task(config['matrix'][0]):
+                pools.add(id(task.language_pool))
+            self.assertEqual(len(pools), 1)
+            self.assertIsNone(task.language_pool)
+
+
+class TestSharedPipeline(util.PluginTestCase):
+    """Test sharing pipeline output between tasks."""
+
+    def setup_fs(self):
+        """Setup files."""
+
+        config = self.dedent(
+            """
+            matrix:
+            - name: one
+              sources:
+              - '{temp}/**/*.txt'
+              aspell:
+                lang: en
+                d: en_US
+              hunspell:
+                d: en_US
+              dictionary:
+                wordlists:
+                - '{temp}/.wordlist-one.txt'
+                output: '{temp}/one.dic'
+              pipeline:
+              - pyspelling.filters.text:
+            - name: two
+              sources:
+              - '{temp}/**/*.txt'
+              aspell:
+                lang: en
+                d: en_US
+              hunspell:
+                d: en_US
+              dictionary:
+                wordlists:
+                - '{temp}/.wordlist-two.txt'
+                output: '{temp}/two.dic'
+              pipeline:
+              - pyspelling.filters.text:
+            """
+        ).format(temp=self.tempdir)
+        self.mktemp('.shared.yml', config, 'utf-8')
+        self.mktemp('.wordlist-one.txt', 'qwertyone', 'utf-8')
+        self.mktemp('.wordlist-two.txt', 'qwertytwo', 'utf-8')
+        self.mktemp('test.txt', 'qwertyone qwertytwo qwertythree', 'utf-8')
+
+    def test_pipeline_key(self):
+        """Test that tasks that only differ in spell checker options share a key."""
+
+        config = pyspelling_util.read_config(os.path.join(self.tempdir, '.shared.yml'))
+        one, two = config['matrix']
+        self.assertEqual(SpellingTask.get_pipeline_key(one), SpellingTask.get_pipeline_key(two))
+        self.assertIsNone(SpellingTask.get_pipeline_key({'sources': ['*.txt'], 'pipeline': None}))
+
+    def test_shared_pipeline(self):
+        """Test that each task reports its own results when the pipeline output is shared."""
+
+        for checker, binary in (('hunspell', util.HUNSPELL), ('aspell', util.ASPELL)):
+            location = util.which(binary)
+            if not location:
+                continue
+            for jobs in (1, 2):
+                words = [
+                    set(results.words) for results in spellcheck(
+                        os.path.join(self.tempdir, '.shared.yml'),
+                        checker=checker,
+                        binary=location,
+                        debug=True,
+                        jobs=jobs
+                    )
+                ]
+                self.assertEqual(words, [{'qwertytwo', 'qwertythree'}, {'qwertyone', 'qwertythree'}])
+
+    def test_shared_pipeline_streamed(self):
+        """Test that the output of streamed files is not held for other tasks, which filter the file themselves."""
+
+        TextFilter.MAX_GUESS_SIZE = 16
+        TextFilter.STREAM_CHUNK_SIZE = 16
+        self.addCleanup(delattr, TextFilter, 'MAX_GUESS_SIZE')
+        self.addCleanup(delattr, TextFilter, 'STREAM_CHUNK_SIZE')
+        self.mktemp('test.txt', 'qwertyone\nqwertytwo\nqwertythree\n', 'utf-8')
+
+        config = pyspelling_util.read_config(os.path.join(self.tempdir, '.shared.yml'))
+        for checker, binary in (('hunspell', util.HUNSPELL), ('aspell', util.ASPELL)):
+            location = util.which(binary)
+            if not location:
+                continue
+            for jobs in (1, 2):
+                shared = SharedPipelines(SpellingTask.get_pipeline_key(task) for task in config['matrix'])
+                key = SpellingTask.get_pipeline_key(config['matrix'][0])
+                words = []
+                for task in config['matrix']:
+                    spelltask = SpellingTask(checker, config, location, jobs=jobs)
+                    words.append({w for r in spelltask.run_task(task, shared=shared) for w in r.words})
+                    if not words[1:]:
+                        self.assertEqual(shared.get(key), [(os.path.join(self.tempdir, 'test.txt'), STREAMED)])
+                self.assertEqual(words, [{'qwertytwo', 'qwertythree'}, {'qwertyone', 'qwertythree'}])
+
+
+class TestSplitFile(util.PluginTestCase):
+    """Test splitting very large files into chunks that are checked in parallel."""
+
+    def setup_fs(self):
+        """Setup files."""
+
+        config = self.dedent(
+            """
+            matrix:
+            - name: split
+              sources:
+              - '{}/**/*.txt'
+              aspell:
+                lang: en
+                d: en_US
+              hunspell:
+                d: en_US
+              pipeline:
+              - pyspelling.filters.text:
+            """
+        ).format(self.tempdir)
+        self.mktemp('.split.yml', config, 'utf-8')
+        self.mktemp('test.txt', '\n'.join('qwert' + c for c in 'abcdefghijklmnopqrst'), 'utf-8')
+
+        TextFilter.MAX_GUESS_SIZE = 64
+        TextFilter.STREAM_CHUNK_SIZE = 32
+        self.addCleanup(delattr, TextFilter, 'MAX_GUESS_SIZE')
+        self.addCleanup(delattr, TextFilter, 'STREAM_CHUNK_SIZE')
+
+    def test_split_file(self):
+        """Test that a split file gives the same results in order with line ranges as context."""
+
+        for checker, binary in (('hunspell', util.HUNSPELL), ('aspell', util.ASPELL)):
+            location = util.which(binary)
+            if not location:
+                continue
+            results = {}
+            for jobs in (1, 2):
+                results[jobs] = [
+                    (os.path.basename(r.context), r.words) for r in spellcheck(
+                        os.path.join(self.tempdir, '.split.yml'),
+                        checker=checker,
+                        binary=location,
+                        debug=True,
+                        jobs=jobs
+                    )
+                ]
+            self.assertEqual(results[1], results[2])
+            self.assertEqual(results[1][0], ('test.txt (1-4)', ['qwerta', 'qwertb', 'qwertc', 'qwertd']))
+            self.assertEqual(
+                [w for _, words in results[2] for w in words], ['qwert' + c for c in 'abcdefghijklmnopqrst']
+            )
+
+
+class TestBinaryFiles(util.PluginTestCase):
+    """Test skipping binary files."""
+
+    def setup_fs(self):
+        """Setup files."""
+
+        template = self.dedent(
+            """
+            matrix:
+            - name: {name}
+              binary_files: {name}
+              sources:
+              - '{temp}/**/*.txt'
+              aspell:
+                lang: en
+                d: en_US
+              hunspell:
+                d: en_US
+              pipeline:
+              - pyspelling.filters.text:
+            """
+        )
+        for name in ('check', 'skip', 'report'):
+            self.mktemp('.%s.yml' % name, template.format(name=name, temp=self.tempdir), 'utf-8')
+        self.mktemp('test.txt', 'qwerty', 'utf-8')
+        with open(os.path.join(self.tempdir, 'binary.txt'), 'wb') as f:
+            f.write(b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\xff\xfe\x00\x10')
+
+    def test_is_binary_file(self):
+        """Test binary file detection."""
+
+        self.mktemp('utf16.txt', 'qwerty', 'utf-16')
+        self.mktemp('latin.txt', 'caf\xe9 qwerty', 'latin-1')
+        self.assertTrue(pyspelling_util.is_binary_file(os.path.join(self.tempdir, 'binary.txt')))
+        self.assertFalse(pyspelling_util.is_binary_file(os.path.join(self.tempdir, 'test.txt')))
+        self.assertFalse(pyspelling_util.is_binary_file(os.path.join(self.tempdir, 'utf16.txt')))
+        self.assertFalse(pyspelling_util.is_binary_file(os.path.join(self.tempdir, 'latin.txt')))
+
+    def test_is_binary_file_legacy_encodings(self):
+        """Test that text in legacy encodings, which is not valid UTF-8, is not binary."""
+
+        self.mktemp('cp1251.txt', 'Съешь же ещё этих мягких французских булок, да выпей чаю.\n' * 50, 'cp1251')
+        self.mktemp('sjis.txt', 'いろはにほへと ちりぬるを わかよたれそ つねならむ。\n' * 50, 'shift_jis')
+        self.mktemp('eucjp.txt', '日本語のテキストです。\n' * 50, 'euc-jp')
+        self.mktemp('iso2022kr.txt', '한국어 텍스트입니다.\n' * 50, 'iso2022_kr')
+        for name in ('cp1251.txt', 'sjis.txt', 'eucjp.txt', 'iso2022kr.txt'):
+            self.assertFalse(pyspelling_util.is_binary_file(os.path.join(self.tempdir, name)), name)
+
+        with open(os.path.join(self.tempdir, 'controls.bin'), 'wb') as f:
+            f.write(bytes(range(1, 32)) * 100)
+        self.assertTrue(pyspelling_util.is_binary_file(os.path.join(self.tempdir, 'controls.bin')))
+
+    def test_binary_files(self):
+        """Test that binary files are checked, skipped, or reported as skipped."""
+
+        for checker, binary in (('hunspell', util.HUNSPELL), ('aspell', util.ASPELL)):
+            location = util.which(binary)
+            if not location:
+                continue
+            results = {}
+            for name in ('check', 'skip', 'report'):
+                results[name] = {
+                    os.path.basename(r.context): r for r in spellcheck(
+                        os.path.join(self.tempdir, '.%s.yml' % name),
+                        checker=checker,
+                        binary=location,
+                        debug=True
+                    )
+                }
+            self.assertEqual(results['skip']['test.txt'].words, ['qwerty'])
+            self.assertNotIn('binary.txt', results['skip'])
+            self.assertEqual(results['report']['binary.txt'].skipped, 'binary file')
+            self.assertIsNone(results['report']['binary.txt'].error)
+            self.assertIsNotNone(results['check']['binary.txt'].error)
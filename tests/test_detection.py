@@ -0,0 +1,111 @@
+"""Test the encoding detection cache."""
+import os
+import pickle
+import time
+from . import util
+from pyspelling.detection import EncodingCache
+from pyspelling.filters.html import HtmlFilter
+
+
+class DetectRecorder(HtmlFilter):
+    """HTML filter that records which files actually have their encoding detected."""
+
+    def __init__(self, options, default_encoding='utf-8'):
+        """Initialize."""
+
+        self.detected = []
+        super().__init__(options, default_encoding)
+
+    def _detect_encoding(self, source_file):
+        """Record the detection."""
+
+        self.detected.append(os.path.basename(source_file))
+        return super()._detect_encoding(source_file)
+
+
+class TestEncodingCache(util.PluginTestCase):
+    """Test the encoding detection cache."""
+
+    def setup_fs(self):
+        """Setup files."""
+
+        self.mktemp('a.html', '<html><head><meta charset="latin-1"></head><body>caf\xe9</body></html>', 'latin-1')
+        self.mktemp('b.html', '<html><body>text</body></html>', 'utf-8')
+        self.cache_file = os.path.join(self.tempdir, '.cache', 'encodings.json.gz')
+        self.age()
+
+    def age(self, *names):
+        """Make files old enough that their encodings can be cached."""
+
+        past = time.time() - 60
+        for name in (names or ('a.html', 'b.html')):
+            os.utime(os.path.join(self.tempdir, name), (past, past))
+
+    def detect(self, cache, flt):
+        """Detect the encoding of all files (`None` if it can't be detected)."""
+
+        encodings = []
+        for name in ('a.html', 'b.html'):
+            try:
+                encodings.append(cache.detect(flt, os.path.join(self.tempdir, name)))
+            except UnicodeDecodeError:  # noqa: PERF203
+                encodings.append(None)
+        return encodings
+
+    def test_cache(self):
+        """Test that unchanged files are only detected once, even between runs."""
+
+        flt = DetectRecorder({})
+        cache = EncodingCache(self.cache_file)
+        encodings = self.detect(cache, flt)
+        self.assertEqual(encodings, ['latin-1', None])
+        self.assertEqual(self.detect(cache, flt), encodings)
+        self.assertEqual(flt.detected, ['a.html', 'b.html'])
+        cache.save()
+
+        flt = DetectRecorder({})
+        self.assertEqual(self.detect(EncodingCache(self.cache_file), flt), encodings)
+        self.assertEqual(flt.detected, [])
+
+    def test_invalidate(self):
+        """Test that changed files, filter options, and default encodings are detected again."""
+
+        cache = EncodingCache(self.cache_file)
+        self.detect(cache, DetectRecorder({}))
+
+        self.mktemp('b.html', '<html><head><meta charset="utf-8"></head><body>text</body></html>', 'utf-8')
+        self.age('b.html')
+        flt = DetectRecorder({})
+        self.detect(cache, flt)
+        self.assertEqual(flt.detected, ['b.html'])
+
+        flt = DetectRecorder({}, 'latin-1')
+        self.detect(cache, flt)
+        self.assertEqual(flt.detected, ['a.html', 'b.html'])
+
+        flt = DetectRecorder({'mode': 'xhtml'})
+        self.detect(cache, flt)
+        self.assertEqual(flt.detected, ['a.html', 'b.html'])
+
+    def test_racy(self):
+        """Test that recently modified files are not cached."""
+
+        self.mktemp('b.html', '<html><body>text</body></html>', 'utf-8')
+        cache = EncodingCache(self.cache_file)
+        self.detect(cache, DetectRecorder({}))
+        flt = DetectRecorder({})
+        self.detect(cache, flt)
+        self.assertEqual(flt.detected, ['b.html'])
+
+    def test_worker(self):
+        """Test that entries detected by a worker are merged back."""
+
+        cache = EncodingCache(self.cache_file)
+        worker = pickle.loads(pickle.dumps(cache))
+        self.detect(worker, DetectRecorder({}))
+        cache.merge(worker.take())
+        self.assertEqual(worker.take(), [])
+
+        flt = DetectRecorder({})
+        self.detect(cache, flt)
+        self.assertEqual(flt.detected, [])
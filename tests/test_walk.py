@@ -0,0 +1,151 @@
+"""Test shared directory walking."""
+import os
+import time
+from . import util
+from pyspelling.walk import DirectoryIndex, SUPPORTS_INDEX
+from wcmatch import glob
+
+
+class TestDirectoryIndex(util.PluginTestCase):
+    """Test globbing with shared directory listings."""
+
+    def setup_fs(self):
+        """Setup files."""
+
+        for name in (
+            'a.txt', 'b.md', '.hidden.txt', 'sub/c.txt', 'sub/d.md', 'sub/deep/e.txt', '.dot/f.txt', 'other/g.txt'
+        ):
+            self.mktemp(name, 'text', 'utf-8')
+
+    def assert_glob(self, patterns, flags=glob.N | glob.B | glob.G):
+        """Assert that globbing with the index returns the same files, in the same order, as `glob`."""
+
+        index = DirectoryIndex()
+        for pattern in patterns:
+            pattern = pattern.format(temp=self.tempdir)
+            flags |= glob.S | glob.O
+            self.assertEqual(list(index.iglob(pattern, flags=flags)), list(glob.iglob(pattern, flags=flags)))
+
+    def test_patterns(self):
+        """Test that results match `glob` for a variety of patterns."""
+
+        self.assert_glob(
+            [
+                '{temp}/**/*.txt',
+                '{temp}/*.{{txt,md}}',
+                '{temp}/**/*.txt|!{temp}/sub/**',
+                '{temp}/sub/*/*.txt',
+                '{temp}/.dot/*.txt',
+                '{temp}/missing/**/*.txt'
+            ]
+        )
+
+    def test_dotglob(self):
+        """Test that hidden files are handled per glob."""
+
+        self.assert_glob(['{temp}/**/*.txt', '{temp}/*'], glob.N | glob.B | glob.G | glob.D)
+
+    def test_absolute(self):
+        """Test absolute patterns."""
+
+        self.assert_glob([os.path.abspath(self.tempdir).replace('\\', '/') + '/**/*.md'])
+
+    def test_single_scan(self):
+        """Test that directories are only read once across globs."""
+
+        index = ScanRecorder()
+        list(index.iglob(self.tempdir + '/**/*.txt', flags=glob.G | glob.O))
+        count = len(index.scanned)
+        list(index.iglob(self.tempdir + '/**/*.md', flags=glob.G | glob.O))
+        self.assertEqual(count, len(index.scanned))
+        self.assertEqual(len(index.scanned), len(set(index.scanned)))
+
+    def test_index_hook(self):
+        """Test that `wcmatch` still reads directories through the index, if this fails, review `IndexedGlob`."""
+
+        self.assertTrue(SUPPORTS_INDEX)
+        index = ScanRecorder()
+        list(index.iglob(self.tempdir + '/**/*.txt', flags=glob.G | glob.O))
+        expected = {os.path.abspath(os.path.join(self.tempdir, d)) for d in ('', 'sub', 'sub/deep', 'other')}
+        self.assertTrue(expected <= set(index.scanned))
+
+
+class ScanRecorder(DirectoryIndex):
+    """Directory index that records which directories are actually read."""
+
+    def __init__(self, cache_file=None):
+        """Initialize."""
+
+        super().__init__(cache_file)
+        self.scanned = []
+
+    def _scan(self, path):
+        """Record the scan."""
+
+        self.scanned.append(os.path.abspath(path))
+        return super()._scan(path)
+
+
+class TestDirectoryCache(util.PluginTestCase):
+    """Test the persistent directory cache."""
+
+    def setup_fs(self):
+        """Setup files."""
+
+        for name in ('a.txt', 'sub/b.txt', 'sub/deep/c.txt', 'sub/d.md'):
+            self.mktemp(name, 'text', 'utf-8')
+        os.makedirs(os.path.join(self.tempdir, '.cache'))
+        self.age()
+        self.cache_file = os.path.join(self.tempdir, '.cache', 'dirs.json.gz')
+        self.root = os.path.abspath(self.tempdir)
+        self.pattern = self.root.replace('\\', '/') + '/**/*.txt'
+
+    def age(self):
+        """Make directories old enough that their listings can be cached."""
+
+        past = time.time() - 60
+        for root, dirs, _ in os.walk(self.tempdir):
+            for d in [root, *(os.path.join(root, d) for d in dirs)]:
+                os.utime(d, (past, past))
+
+    def glob(self, index):
+        """Glob all text files."""
+
+        return list(index.iglob(self.pattern, flags=glob.N | glob.B | glob.G | glob.S | glob.O))
+
+    def test_cache(self):
+        """Test that cached listings are reused and refreshed when a directory changes."""
+
+        expected = list(glob.iglob(self.pattern, flags=glob.N | glob.B | glob.G | glob.S | glob.O))
+
+        index = DirectoryIndex(self.cache_file)
+        self.assertEqual(self.glob(index), expected)
+        self.assertTrue(index.modified)
+        index.save()
+        self.assertTrue(os.path.exists(self.cache_file))
+
+        # Nothing changed, so nothing in the tree is read again.
+        index = ScanRecorder(self.cache_file)
+        self.assertEqual(self.glob(index), expected)
+        self.assertEqual([d for d in index.scanned if d.startswith(self.root)], [])
+
+        # Adding a file changes the directory, so only it must be read again.
+        self.mktemp('sub/deep/e.txt', 'text', 'utf-8')
+        expected = list(glob.iglob(self.pattern, flags=glob.N | glob.B | glob.G | glob.S | glob.O))
+        index = ScanRecorder(self.cache_file)
+        self.assertEqual(self.glob(index), expected)
+        self.assertEqual(
+            [d for d in index.scanned if d.startswith(self.root)],
+            [os.path.join(self.root, 'sub', 'deep')]
+        )
+
+    def test_corrupt_cache(self):
+        """Test that a corrupt cache is ignored."""
+
+        self.mktemp('.cache/dirs.json.gz', 'not a cache', 'utf-8')
+        index = DirectoryIndex(self.cache_file)
+        self.assertEqual(index.cache, {})
+        self.assertEqual(
+            self.glob(index),
+            list(glob.iglob(self.pattern, flags=glob.N | glob.B | glob.G | glob.S | glob.O))
+        )